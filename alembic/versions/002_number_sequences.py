@@ -0,0 +1,44 @@
+"""Add number sequences table
+
+Revision ID: 002
+Revises: 001, add_system_settings
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import date
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = ('001', 'add_system_settings')
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'number_sequences',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('next_value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_number_sequences_id'), 'number_sequences', ['id'], unique=False)
+    op.create_index(op.f('ix_number_sequences_name'), 'number_sequences', ['name'], unique=True)
+    
+    # Numbers issued today by the old scheme were "<prefix>-<day>-<last id + 1>",
+    # so start today's sequences past the highest id to avoid colliding with them
+    today = date.today().strftime('%Y%m%d')
+    for prefix, table in (('SALE', 'sales'), ('PO', 'purchase_orders')):
+        op.execute(
+            f"INSERT INTO number_sequences (name, next_value) "
+            f"SELECT '{prefix}-{today}', COALESCE(MAX(id), 0) + 1 FROM {table}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_number_sequences_name'), table_name='number_sequences')
+    op.drop_index(op.f('ix_number_sequences_id'), table_name='number_sequences')
+    op.drop_table('number_sequences')
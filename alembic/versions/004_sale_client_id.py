@@ -0,0 +1,28 @@
+"""Add client id to sales for offline ingestion
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.add_column(sa.Column('client_id', sa.String(length=64), nullable=True))
+        batch_op.create_index(op.f('ix_sales_client_id'), ['client_id'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.drop_index(op.f('ix_sales_client_id'))
+        batch_op.drop_column('client_id')
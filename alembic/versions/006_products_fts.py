@@ -0,0 +1,75 @@
+"""Add products_fts full-text search index
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+# The FTS5 table, its ranking weights, the sync triggers and the initial fill
+STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, sku, category,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    # Rank name matches above SKU matches above category matches
+    "INSERT INTO products_fts(products_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, sku, category)
+        VALUES (new.id, new.name, new.sku, (SELECT name FROM categories WHERE id = new.category_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, sku, category_id ON products BEGIN
+        UPDATE products_fts
+        SET name = new.name, sku = new.sku, category = (SELECT name FROM categories WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_category_update AFTER UPDATE OF name ON categories BEGIN
+        UPDATE products_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO products_fts(rowid, name, sku, category)
+    SELECT p.id, p.name, p.sku, c.name FROM products p LEFT JOIN categories c ON c.id = p.category_id
+    """
+]
+
+
+def upgrade() -> None:
+    # FTS5 is SQLite-only; other databases search with LIKE
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS products_fts_category_update")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_insert")
+    op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,48 @@
+"""Add indexes for report, list and lookup queries
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns), each taken from a filter, join or ORDER BY in the routers and services
+INDEXES = [
+    ('ix_sales_datetime', 'sales', ['datetime']),
+    ('ix_sales_shift_id_tender_type', 'sales', ['shift_id', 'tender_type']),
+    ('ix_sale_lines_sale_id', 'sale_lines', ['sale_id']),
+    ('ix_sale_lines_product_id', 'sale_lines', ['product_id']),
+    ('ix_returns_original_sale_id', 'returns', ['original_sale_id']),
+    ('ix_return_lines_return_id', 'return_lines', ['return_id']),
+    ('ix_inventory_adjustments_item_type_item_id', 'inventory_adjustments', ['item_type', 'item_id']),
+    ('ix_ar_entries_customer_id_entry_type_balance', 'ar_entries', ['customer_id', 'entry_type', 'balance']),
+    ('ix_ar_entries_sale_id', 'ar_entries', ['sale_id']),
+    ('ix_batches_produced_at', 'batches', ['produced_at']),
+    ('ix_batch_consumption_batch_id', 'batch_consumption', ['batch_id']),
+    ('ix_shifts_cashier_id_status', 'shifts', ['cashier_id', 'status']),
+    ('ix_shifts_opened_at', 'shifts', ['opened_at']),
+    ('ix_cash_events_shift_id', 'cash_events', ['shift_id']),
+    ('ix_purchase_orders_date', 'purchase_orders', ['date']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    if op.get_bind().dialect.name == 'sqlite':
+        # Give the planner row counts for the new indexes
+        op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,65 @@
+"""Add business_date to sales and backfill it
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+from app.services.business_day import business_date_for_utc
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 5000
+
+sales = sa.table(
+    'sales',
+    sa.column('id', sa.Integer),
+    sa.column('datetime', sa.DateTime(timezone=True)),
+    sa.column('business_date', sa.Date),
+)
+
+
+def _as_datetime(value) -> datetime:
+    # SQLite hands back the stored text
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def upgrade() -> None:
+    op.add_column('sales', sa.Column('business_date', sa.Date(), nullable=True))
+    
+    # Stored sale times are database now() values, i.e. UTC; the store's
+    # timezone and day start hour from settings decide each sale's date
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(sales.c.id, sales.c.datetime)
+            .where(sales.c.id > last_id)
+            .order_by(sales.c.id)
+            .limit(BACKFILL_CHUNK)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            sales.update().where(sales.c.id == sa.bindparam('sale_id')).values(business_date=sa.bindparam('day')),
+            [{'sale_id': sale_id, 'day': business_date_for_utc(_as_datetime(sold_at))} for sale_id, sold_at in rows]
+        )
+        last_id = rows[-1][0]
+    
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.alter_column('business_date', existing_type=sa.Date(), nullable=False)
+        batch_op.create_index(op.f('ix_sales_business_date'), ['business_date'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.drop_index(op.f('ix_sales_business_date'))
+        batch_op.drop_column('business_date')
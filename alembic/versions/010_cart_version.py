@@ -0,0 +1,28 @@
+"""Add a version to carts and index their last update
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('carts') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_carts_updated_at'), 'carts', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_carts_updated_at'), table_name='carts')
+    with op.batch_alter_table('carts') as batch_op:
+        batch_op.drop_column('version')
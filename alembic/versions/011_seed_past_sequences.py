@@ -0,0 +1,54 @@
+"""Start every day's number sequence past the numbers already issued
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import re
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+# "<prefix>-<yyyymmdd>-<n>", as issued by the old id-based scheme and by the sequences
+NUMBER_PATTERN = re.compile(r"^((?:SALE|PO)-\d{8})-(\d+)$")
+
+number_sequences = sa.table(
+    'number_sequences',
+    sa.column('name', sa.String),
+    sa.column('next_value', sa.Integer),
+)
+
+
+def upgrade() -> None:
+    # 002 only seeded today's counters, but offline sales are numbered for
+    # the day they were rung up; a past day's counter starting at 1 would
+    # hand out numbers the old "<prefix>-<day>-<id>" scheme already used
+    connection = op.get_bind()
+    highest = {}
+    for table, column in (('sales', 'sale_number'), ('purchase_orders', 'po_number')):
+        for (number,) in connection.execute(sa.text(f"SELECT {column} FROM {table}")):
+            match = NUMBER_PATTERN.match(number or "")
+            if match:
+                name, value = match.group(1), int(match.group(2))
+                highest[name] = max(highest.get(name, 0), value)
+    
+    current = dict(connection.execute(sa.select(number_sequences.c.name, number_sequences.c.next_value)).all())
+    for name, value in highest.items():
+        if name not in current:
+            connection.execute(number_sequences.insert().values(name=name, next_value=value + 1))
+        elif current[name] <= value:
+            connection.execute(
+                number_sequences.update().where(number_sequences.c.name == name).values(next_value=value + 1)
+            )
+
+
+def downgrade() -> None:
+    # The seeded counters are still correct for the older revisions
+    pass
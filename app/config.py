@@ -5,15 +5,75 @@ from typing import Optional
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./bakery.db"
+    read_database_url: str = ""  # Reports and dashboards read from here, e.g. a replica; empty means database_url, read-only
+    db_threadpool_size: int = 40  # Threads running plain def handlers, and so their queries, off the event loop
+    db_pool_size: int = 10  # Connections kept open per worker
+    db_max_overflow: int = 20  # Extra connections opened under load and closed when returned
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection before failing the request
+    db_pool_recycle: int = 1800  # Seconds before a server connection is replaced (PostgreSQL)
+    
+    # SQLite profile, applied to every connection
+    sqlite_journal_mode: str = "WAL"  # Readers no longer block the writer, nor the writer readers
+    sqlite_synchronous: str = "NORMAL"  # Safe with WAL; only the last commits can be lost on power failure
+    sqlite_busy_timeout: int = 5000  # Milliseconds a writer waits for the lock before "database is locked"
+    sqlite_cache_size: int = -65536  # Page cache per connection; negative means KiB (64 MiB)
+    sqlite_mmap_size: int = 268435456  # Bytes of the file read through mmap (256 MiB)
+    sqlite_temp_store: str = "MEMORY"  # Sorts and temp tables for reports stay off disk
     
     # Security
     secret_key: str = "your-secret-key-change-in-production"
+    bcrypt_rounds: int = 12  # Cost factor for new password hashes; older hashes are upgraded at login
+    password_hash_workers: int = 2  # Threads that hash and verify passwords off the event loop
     session_cookie_name: str = "bakery_session"
     session_max_age: int = 86400  # 24 hours
+    session_backend: str = "database"  # "database" to share sessions between workers, or "memory"
+    session_cache_size: int = 10000  # Sessions kept in memory in front of the session table
+    session_cache_ttl: int = 60  # Seconds a worker trusts its cached copy before rechecking the table
+    principal_cache_size: int = 10000  # Users whose id, role and permissions are kept in memory
+    principal_cache_ttl: int = 30  # Seconds a cached principal is trusted before reloading user and role
+    sweep_interval: int = 300  # Seconds between purges of expired sessions, idempotency keys and carts
+    
+    # Catalog
+    catalog_ttl: int = 30  # Seconds a worker serves its catalog snapshot before rebuilding it; checkout rechecks its products
+    
+    # Customer search
+    customer_index_ttl: int = 60  # Seconds before the search index is rebuilt to pick up other workers' edits
+    
+    # Carts
+    cart_cookie_name: str = "cart_id"
+    cart_max_age: int = 86400  # 24 hours; carts untouched this long are purged
+    cart_cache_size: int = 1000  # Carts kept in memory before falling back to the carts table
+    cart_cache_ttl: int = 5  # Seconds a worker shows its cached copy of a cart before rereading the row
+    
+    # Receipts
+    receipt_cache_size: int = 500  # Rendered receipts kept in memory for reprints
+    
+    # Offline sale ingestion
+    bulk_sale_chunk_size: int = 100  # Sales committed per transaction
+    
+    # Idempotency keys
+    idempotency_header: str = "Idempotency-Key"
+    idempotency_ttl: int = 86400  # Seconds a completed response is replayed for
+    idempotency_lease: int = 300  # Seconds a request in progress holds its key; keep above the longest request, a retry after that takes it over
+    
+    # Trading day
+    store_timezone: str = "UTC"  # IANA zone the store trades in, e.g. "America/Port_of_Spain"
+    business_day_start_hour: int = 0  # Sales before this hour count towards the previous business date
     
     # Tax
     default_tax_rate: float = 0.10  # 10%
     
+    # Document numbering
+    sequence_block_size: int = 20  # Sale/PO numbers reserved per worker per trip to the database
+    
+    # Query instrumentation
+    query_stats: bool = True  # Count queries per request and report them in X-DB-* response headers
+    n_plus_one_threshold: int = 5  # Runs of one statement in a request that flag a likely N+1
+    query_stats_history: int = 200  # Requests kept for /debug/queries
+    slow_query_ms: int = 250  # Statements slower than this are logged with their query plan; 0 turns the log off
+    slow_query_history: int = 100  # Slow statements kept for /debug/slow-queries
+    slow_query_log_path: str = ""  # Also append each slow statement to this JSONL file, e.g. logs/slow_queries.jsonl
+    
     # Application
     app_name: str = "Bakery POS"
     debug: bool = False
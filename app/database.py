@@ -1,16 +1,102 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-    echo=settings.debug
-)
+
+def sqlite_pragmas() -> dict:
+    """PRAGMAs from settings applied to every new SQLite connection"""
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout,
+        "cache_size": settings.sqlite_cache_size,
+        "mmap_size": settings.sqlite_mmap_size,
+        "temp_store": settings.sqlite_temp_store,
+    }
+
+
+def apply_sqlite_pragmas(engine, pragmas: dict):
+    """Run the given PRAGMAs on each connection the engine opens"""
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def make_engine(database_url: str):
+    """Create an engine for a URL with the pool and SQLite profile from settings"""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+            echo=settings.debug
+        )
+    
+    options = {}
+    if url.database and url.database != ":memory:":
+        # File databases get a real pool; connections are cheap but the page
+        # cache and mmap set up by the PRAGMAs belong to each connection
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout
+        )
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout / 1000},
+        echo=settings.debug,
+        **options
+    )
+    apply_sqlite_pragmas(engine, sqlite_pragmas())
+    return engine
+
+
+def make_read_engine(database_url: str):
+    """Create an engine whose connections refuse writes
+    
+    On SQLite every read session runs in one explicit transaction, which in
+    WAL mode is a snapshot: a long report sees consistent data and never
+    blocks, or is blocked by, checkout commits. On PostgreSQL transactions
+    are opened READ ONLY, which also suits a hot standby replica.
+    """
+    engine = make_engine(database_url)
+    if engine.dialect.name != "sqlite":
+        return engine.execution_options(postgresql_readonly=True)
+    
+    @event.listens_for(engine, "connect")
+    def set_read_only(dbapi_connection, connection_record):
+        # Let the "begin" hook below start transactions, so SELECTs get one too
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA query_only=ON")
+    
+    @event.listens_for(engine, "begin")
+    def begin_snapshot(connection):
+        connection.exec_driver_sql("BEGIN")
+    
+    return engine
+
+
+engine = make_engine(settings.database_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if settings.read_database_url or make_url(settings.database_url).database not in (None, "", ":memory:"):
+    read_engine = make_read_engine(settings.read_database_url or settings.database_url)
+else:
+    # An in-memory database only exists on the main engine's connection
+    read_engine = engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
 
@@ -22,3 +108,12 @@ def get_db():
     finally:
         db.close()
 
+
+def get_read_db():
+    """Dependency for a read-only session, for reports and dashboards"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
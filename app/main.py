@@ -3,15 +3,52 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.exceptions import RequestValidationError
+from anyio.to_thread import current_default_thread_limiter
 from app.config import settings
 from app.routers import (
-    auth, pos, products, inventory, reports, transactions
+    auth, pos, products, inventory, reports, transactions, ar, shifts, production
 )
 from app.routers import settings as settings_router
+from app.routers import debug
+from app.services.sweeper import sweeper
+from app.services.query_stats import track_queries, route_context, query_log
+import app.services.slow_queries  # Registers the slow query log on every engine
 
 app = FastAPI(title=settings.app_name, debug=settings.debug)
 
 
+@app.on_event("startup")
+async def size_threadpool():
+    """Size the threadpool that runs plain def handlers and their database work"""
+    current_default_thread_limiter().total_tokens = settings.db_threadpool_size
+
+
+@app.on_event("startup")
+async def start_sweeper():
+    """Purge expired sessions and idempotency keys in the background"""
+    sweeper.start()
+
+
+@app.on_event("shutdown")
+async def stop_sweeper():
+    sweeper.stop()
+
+
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    """Report each request's query count, rows and DB time in X-DB-* headers"""
+    if request.url.path.startswith("/static"):
+        return await call_next(request)
+    with route_context(f"{request.method} {request.url.path}"):
+        if not settings.query_stats:
+            return await call_next(request)
+        with track_queries() as stats:
+            response = await call_next(request)
+    response.headers.update(stats.headers())
+    query_log.record(request.method, request.url.path, response.status_code, stats)
+    return response
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions, especially for HTMX requests"""
@@ -46,10 +83,12 @@ app.include_router(products.router, tags=["products"])
 app.include_router(inventory.router, tags=["inventory"])
 app.include_router(transactions.router, tags=["transactions"])
 app.include_router(settings_router.router, tags=["settings"])
-# Simplified - removed production, purchasing, ar, shifts
-# app.include_router(production.router, tags=["production"])
+app.include_router(debug.router, tags=["debug"])
+app.include_router(ar.router, tags=["ar"])
+app.include_router(shifts.router, tags=["shifts"])
+app.include_router(production.router, tags=["production"])
+# Simplified - removed purchasing
 # app.include_router(purchasing.router, tags=["purchasing"])
-# app.include_router(ar.router, tags=["ar"])
 app.include_router(reports.router, tags=["reports"])
 
 
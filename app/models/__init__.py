@@ -1,5 +1,6 @@
 from app.models.user import User, Role
 from app.models.product import Product, Category
+from app.models.product_search import products_fts
 from app.models.sale import Sale, SaleLine, Return, ReturnLine
 from app.models.inventory import InventoryAdjustment
 from app.models.recipe import Ingredient, Recipe, RecipeLine, Batch, BatchConsumption
@@ -7,10 +8,14 @@ from app.models.purchasing import Vendor, PurchaseOrder, POLine, ReceivedLine
 from app.models.ar import Customer, AREntry
 from app.models.shift import Shift, CashEvent
 from app.models.settings import SystemSettings
+from app.models.sequence import NumberSequence
+from app.models.cart import Cart
+from app.models.idempotency import IdempotencyKey
+from app.models.session import UserSession
 
 __all__ = [
     "User", "Role",
-    "Product", "Category",
+    "Product", "Category", "products_fts",
     "Sale", "SaleLine", "Return", "ReturnLine",
     "InventoryAdjustment",
     "Ingredient", "Recipe", "RecipeLine", "Batch", "BatchConsumption",
@@ -18,5 +23,9 @@ __all__ = [
     "Customer", "AREntry",
     "Shift", "CashEvent",
     "SystemSettings",
+    "NumberSequence",
+    "Cart",
+    "IdempotencyKey",
+    "UserSession",
 ]
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Enum as SQLEnum, Date
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Index, Enum as SQLEnum, Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -31,12 +31,15 @@ class AREntry(Base):
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
     entry_type = Column(SQLEnum(AREntryType), nullable=False)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=True)  # For invoice entries
+    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=True, index=True)  # For invoice entries
     amount = Column(Numeric(10, 2), nullable=False)
     date = Column(Date, nullable=False, server_default=func.current_date())
     due_date = Column(Date)
     balance = Column(Numeric(10, 2), nullable=False)  # Remaining balance
     notes = Column(String(500))
     
+    # Aging reads a customer's open invoices; statements read all their entries
+    __table_args__ = (Index("ix_ar_entries_customer_id_entry_type_balance", "customer_id", "entry_type", "balance"),)
+    
     customer = relationship("Customer", back_populates="ar_entries")
 
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Cart(Base):
+    __tablename__ = "carts"
+    
+    id = Column(String(64), primary_key=True)  # Opaque cart id carried in the cart_id cookie
+    items = Column(Text, nullable=False, default="[]")  # JSON list of cart lines
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped by every save; writes check it
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(128), unique=True, nullable=False, index=True)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path, user and form body
+    status_code = Column(Integer, nullable=True)  # NULL while the original request is still running
+    lease_token = Column(String(32), nullable=True)  # Held by the request running under the key; NULL once completed
+    response_body = Column(Text)
+    response_headers = Column(Text)  # JSON object of headers replayed with the body
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
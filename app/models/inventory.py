@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -20,4 +20,7 @@ class InventoryAdjustment(Base):
     reason = Column(String(500), nullable=False)
     datetime = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    # Stock history is always read for one product or one ingredient
+    __table_args__ = (Index("ix_inventory_adjustments_item_type_item_id", "item_type", "item_id"),)
 
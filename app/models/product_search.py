@@ -0,0 +1,60 @@
+from sqlalchemy import event, table, column, text
+from app.models.product import Product
+
+# Full-text index over product name, SKU and category name, keyed by product id.
+# Triggers keep it in sync with every write, including bulk statements that
+# bypass the ORM; stock changes don't touch the indexed columns and skip it.
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, sku, category,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    # Rank name matches above SKU matches above category matches
+    "INSERT INTO products_fts(products_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, sku, category)
+        VALUES (new.id, new.name, new.sku, (SELECT name FROM categories WHERE id = new.category_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, sku, category_id ON products BEGIN
+        UPDATE products_fts
+        SET name = new.name, sku = new.sku, category = (SELECT name FROM categories WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_category_update AFTER UPDATE OF name ON categories BEGIN
+        UPDATE products_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO products_fts(rowid, name, sku, category)
+    SELECT p.id, p.name, p.sku, c.name FROM products p LEFT JOIN categories c ON c.id = p.category_id
+    """
+]
+
+products_fts = table("products_fts", column("rowid"), column("rank"))
+
+
+def create_search_index(connection):
+    """Create and fill the product search index"""
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Product.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    """Create the search index alongside the products table (create_all)"""
+    if connection.dialect.name == "sqlite":
+        create_search_index(connection)
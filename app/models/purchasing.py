@@ -32,7 +32,7 @@ class PurchaseOrder(Base):
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(Integer, ForeignKey("vendors.id"), nullable=False)
     po_number = Column(String(50), unique=True, nullable=False, index=True)
-    date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     status = Column(SQLEnum(POStatus), default=POStatus.DRAFT)
     total = Column(Numeric(10, 2), default=0)
     
@@ -49,7 +49,7 @@ class Batch(Base):
     id = Column(Integer, primary_key=True, index=True)
     recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False)
     qty_produced = Column(Numeric(10, 2), nullable=False)
-    produced_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    produced_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     wastage = Column(Numeric(10, 2), default=0)
     notes = Column(String(500))
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -63,7 +63,7 @@ class BatchConsumption(Base):
     __tablename__ = "batch_consumption"
     
     id = Column(Integer, primary_key=True, index=True)
-    batch_id = Column(Integer, ForeignKey("batches.id"), nullable=False)
+    batch_id = Column(Integer, ForeignKey("batches.id"), nullable=False, index=True)
     ingredient_id = Column(Integer, ForeignKey("ingredients.id"), nullable=False)
     qty_used = Column(Numeric(10, 2), nullable=False)
     
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Date, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
+from app.services.business_day import business_today
 
 
 class TenderType(str, enum.Enum):
@@ -23,7 +24,8 @@ class Sale(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     sale_number = Column(String(50), unique=True, nullable=False, index=True)
-    datetime = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    datetime = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    business_date = Column(Date, nullable=False, default=business_today, index=True)  # Trading day in store time; filter dates on this
     cashier_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     shift_id = Column(Integer, ForeignKey("shifts.id"), nullable=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)
@@ -34,6 +36,10 @@ class Sale(Base):
     tender_type = Column(SQLEnum(TenderType), nullable=False)
     status = Column(SQLEnum(SaleStatus), default=SaleStatus.COMPLETED)
     notes = Column(String(500))
+    client_id = Column(String(64), unique=True, nullable=True, index=True)  # Id assigned by the till for offline sales
+    
+    # Shift reconciliation totals a shift's sales by tender
+    __table_args__ = (Index("ix_sales_shift_id_tender_type", "shift_id", "tender_type"),)
     
     cashier = relationship("User", back_populates="sales")
     shift = relationship("Shift", back_populates="sales")
@@ -46,8 +52,8 @@ class SaleLine(Base):
     __tablename__ = "sale_lines"
     
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     qty = Column(Numeric(10, 2), nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
     line_discount = Column(Numeric(10, 2), default=0)
@@ -62,7 +68,7 @@ class Return(Base):
     __tablename__ = "returns"
     
     id = Column(Integer, primary_key=True, index=True)
-    original_sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
+    original_sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False, index=True)
     datetime = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     reason = Column(String(500))
@@ -76,7 +82,7 @@ class ReturnLine(Base):
     __tablename__ = "return_lines"
     
     id = Column(Integer, primary_key=True, index=True)
-    return_id = Column(Integer, ForeignKey("returns.id"), nullable=False)
+    return_id = Column(Integer, ForeignKey("returns.id"), nullable=False, index=True)
     original_line_id = Column(Integer, ForeignKey("sale_lines.id"), nullable=False)
     qty_returned = Column(Numeric(10, 2), nullable=False)
     refund_amount = Column(Numeric(10, 2), nullable=False)
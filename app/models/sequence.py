@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+
+class NumberSequence(Base):
+    __tablename__ = "number_sequences"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False, index=True)  # e.g. SALE-20240101 or SALE-20240101-R2
+    next_value = Column(Integer, nullable=False, default=1)  # First value not yet handed to any worker
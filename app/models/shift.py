@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -21,7 +21,7 @@ class Shift(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     cashier_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    opened_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    opened_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     closed_at = Column(DateTime(timezone=True), nullable=True)
     opening_float = Column(Numeric(10, 2), nullable=False)
     expected_cash = Column(Numeric(10, 2), default=0)
@@ -29,6 +29,9 @@ class Shift(Base):
     over_short = Column(Numeric(10, 2), default=0)
     status = Column(SQLEnum(ShiftStatus), default=ShiftStatus.OPEN)
     
+    # Every shift action first finds the cashier's open shift
+    __table_args__ = (Index("ix_shifts_cashier_id_status", "cashier_id", "status"),)
+    
     cashier = relationship("User", back_populates="shifts")
     sales = relationship("Sale", back_populates="shift")
     cash_events = relationship("CashEvent", back_populates="shift", cascade="all, delete-orphan")
@@ -38,7 +41,7 @@ class CashEvent(Base):
     __tablename__ = "cash_events"
     
     id = Column(Integer, primary_key=True, index=True)
-    shift_id = Column(Integer, ForeignKey("shifts.id"), nullable=False)
+    shift_id = Column(Integer, ForeignKey("shifts.id"), nullable=False, index=True)
     event_type = Column(SQLEnum(CashEventType), nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
     reason = Column(String(500))
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Request, Form
+from fastapi import APIRouter, Depends, Request, Form, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
@@ -6,6 +6,8 @@ from app.database import get_db
 from app.routers.auth import require_auth, require_role
 from app.models.ar import Customer, AREntry, AREntryType
 from app.services.ar import calculate_aging
+from app.services.customer_search import customer_search
+from app.services.business_day import business_today
 from decimal import Decimal
 from datetime import date, timedelta
 
@@ -14,7 +16,7 @@ templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/ar", response_class=HTMLResponse)
-async def ar_dashboard(
+def ar_dashboard(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
@@ -29,6 +31,7 @@ async def ar_dashboard(
         "ar/dashboard.html",
         {
             "request": request,
+            "user": user_data["user"],
             "customers": customers,
             "total_ar": total_ar
         }
@@ -36,21 +39,27 @@ async def ar_dashboard(
 
 
 @router.get("/ar/customers", response_class=HTMLResponse)
-async def list_customers(
+def list_customers(
     request: Request,
+    q: str = Query(None),
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
-    """List customers"""
-    customers = db.query(Customer).order_by(Customer.name).all()
+    """List customers, or the best matches for a search"""
+    if q:
+        ids = [entry.id for entry in customer_search.search(db, q, limit=50)]
+        found = {c.id: c for c in db.query(Customer).filter(Customer.id.in_(ids)).all()}
+        customers = [found[customer_id] for customer_id in ids if customer_id in found]
+    else:
+        customers = db.query(Customer).order_by(Customer.name).all()
     return templates.TemplateResponse(
         "ar/customers.html",
-        {"request": request, "customers": customers}
+        {"request": request, "user": user_data["user"], "customers": customers, "q": q}
     )
 
 
 @router.post("/ar/customers", response_class=HTMLResponse)
-async def create_customer(
+def create_customer(
     request: Request,
     name: str = Form(...),
     email: str = Form(""),
@@ -75,7 +84,7 @@ async def create_customer(
 
 
 @router.get("/ar/customers/{customer_id}", response_class=HTMLResponse)
-async def customer_detail(
+def customer_detail(
     request: Request,
     customer_id: int,
     user_data: dict = Depends(require_auth),
@@ -95,6 +104,7 @@ async def customer_detail(
         "ar/customer_detail.html",
         {
             "request": request,
+            "user": user_data["user"],
             "customer": customer,
             "entries": entries,
             "aging": aging
@@ -103,7 +113,7 @@ async def customer_detail(
 
 
 @router.post("/ar/customers/{customer_id}/payment", response_class=HTMLResponse)
-async def record_payment(
+def record_payment(
     request: Request,
     customer_id: int,
     amount: float = Form(...),
@@ -112,7 +122,7 @@ async def record_payment(
     db: Session = Depends(get_db)
 ):
     """Record payment"""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = db.query(Customer).filter(Customer.id == customer_id).with_for_update().first()
     if not customer:
         return RedirectResponse(url="/ar/customers", status_code=302)
     
@@ -123,7 +133,7 @@ async def record_payment(
         customer_id=customer_id,
         entry_type=AREntryType.PAYMENT,
         amount=payment_amount,
-        date=date.today(),
+        date=business_today(),
         balance=payment_amount,  # Will be allocated
         notes=notes
     )
@@ -137,7 +147,7 @@ async def record_payment(
 
 
 @router.get("/ar/customers/{customer_id}/statement", response_class=HTMLResponse)
-async def customer_statement(
+def customer_statement(
     request: Request,
     customer_id: int,
     user_data: dict = Depends(require_auth),
@@ -155,6 +165,7 @@ async def customer_statement(
         "ar/statement.html",
         {
             "request": request,
+            "user": user_data["user"],
             "customer": customer,
             "entries": entries,
             "aging": aging
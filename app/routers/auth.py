@@ -2,29 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.auth import authenticate_user, get_user
+from app.database import get_db, get_read_db
+from app.services.auth import authenticate_user_async
 from app.schemas.user import LoginRequest, UserResponse
+from app.services.session import session_store
+from app.services.principal import principal_cache
 from app.config import settings
-import secrets
-from datetime import datetime
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
-# Simple session storage (in production, use Redis or database sessions)
-sessions = {}
-
-
 def get_current_user(request: Request, db: Session = Depends(get_db)) -> dict | None:
-    """Get current user from session"""
+    """Get the current user's principal from the session"""
     session_id = request.cookies.get(settings.session_cookie_name)
     if not session_id:
         return None
-    if session_id not in sessions:
+    user_id = session_store.get(db, session_id)
+    if user_id is None:
         return None
-    user_data = sessions[session_id]
-    user = get_user(db, user_data["user_id"])
+    user = principal_cache.get(db, user_id)
     if not user or not user.is_active:
         return None
     return {"user": user, "session_id": session_id}
@@ -47,8 +43,7 @@ def require_auth(request: Request, db: Session = Depends(get_db)):
 def require_role(allowed_roles: list[str]):
     """Decorator factory for role-based access control"""
     def role_checker(user_data: dict = Depends(require_auth)):
-        user = user_data["user"]
-        role_name = user.role.name.lower()
+        role_name = user_data["user"].role.name.lower()
         if role_name not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -72,7 +67,7 @@ async def login(
     db: Session = Depends(get_db)
 ):
     """Handle login"""
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user_async(db, username, password)
     if not user:
         return templates.TemplateResponse(
             "auth/login.html",
@@ -80,11 +75,7 @@ async def login(
         )
     
     # Create session
-    session_id = secrets.token_urlsafe(32)
-    sessions[session_id] = {
-        "user_id": user.id,
-        "created_at": str(datetime.now())
-    }
+    session_id = session_store.create(db, user.id)
     
     response = RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
     response.set_cookie(
@@ -99,11 +90,11 @@ async def login(
 
 
 @router.get("/logout")
-async def logout(request: Request):
+def logout(request: Request, db: Session = Depends(get_db)):
     """Handle logout"""
     session_id = request.cookies.get(settings.session_cookie_name)
-    if session_id and session_id in sessions:
-        del sessions[session_id]
+    if session_id:
+        session_store.delete(db, session_id)
     
     response = RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
     response.delete_cookie(key=settings.session_cookie_name)
@@ -111,23 +102,22 @@ async def logout(request: Request):
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(
+def dashboard(
     request: Request, 
     user_data: dict = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dashboard page"""
-    from datetime import datetime, date
     from app.models.sale import Sale
+    from app.services.business_day import business_today
     from sqlalchemy import func
     
     # Get today's sales
-    today = date.today()
     today_sales = db.query(
         func.count(Sale.id).label('transaction_count'),
         func.coalesce(func.sum(Sale.total), 0).label('total_sales')
     ).filter(
-        func.date(Sale.datetime) == today
+        Sale.business_date == business_today()
     ).first()
     
     return templates.TemplateResponse(
@@ -142,23 +132,22 @@ async def dashboard(
 
 
 @router.get("/dashboard/summary", response_class=HTMLResponse)
-async def dashboard_summary(
+def dashboard_summary(
     request: Request,
     user_data: dict = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get today's sales summary (for HTMX polling)"""
-    from datetime import date
     from app.models.sale import Sale
+    from app.services.business_day import business_today
     from sqlalchemy import func
     
     # Get today's sales
-    today = date.today()
     today_sales = db.query(
         func.count(Sale.id).label('transaction_count'),
         func.coalesce(func.sum(Sale.total), 0).label('total_sales')
     ).filter(
-        func.date(Sale.datetime) == today
+        Sale.business_date == business_today()
     ).first()
     
     sales_total = float(today_sales.total_sales) if today_sales else 0.0
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.templating import Jinja2Templates
+from app.routers.auth import require_role
+from app.services.query_stats import query_log
+from app.services.slow_queries import slow_query_log
+from app.config import settings
+
+router = APIRouter()
+templates = Jinja2Templates(directory="app/templates")
+
+
+@router.get("/debug/queries", response_class=HTMLResponse)
+async def recent_queries(
+    request: Request,
+    user_data: dict = Depends(require_role(["admin"]))
+):
+    """Query counts, DB time and likely N+1s of recent requests (admin only)"""
+    entries = query_log.entries()
+    return templates.TemplateResponse(
+        "debug/queries.html",
+        {
+            "request": request,
+            "user": user_data["user"],
+            "entries": entries,
+            "flagged": [entry for entry in entries if entry["n_plus_one"]]
+        }
+    )
+
+
+@router.post("/debug/queries/clear")
+async def clear_queries(
+    user_data: dict = Depends(require_role(["admin"]))
+):
+    """Forget the recorded requests"""
+    query_log.clear()
+    return RedirectResponse(url="/debug/queries", status_code=302)
+
+
+@router.get("/debug/slow-queries", response_class=HTMLResponse)
+async def slow_queries(
+    request: Request,
+    user_data: dict = Depends(require_role(["admin"]))
+):
+    """Recent slow statements with their query plans (admin only)"""
+    return templates.TemplateResponse(
+        "debug/slow_queries.html",
+        {
+            "request": request,
+            "user": user_data["user"],
+            "entries": slow_query_log.entries(),
+            "threshold_ms": settings.slow_query_ms,
+            "log_path": settings.slow_query_log_path
+        }
+    )
+
+
+@router.post("/debug/slow-queries/clear")
+async def clear_slow_queries(
+    user_data: dict = Depends(require_role(["admin"]))
+):
+    """Forget the recorded slow statements; the JSONL file is kept"""
+    slow_query_log.clear()
+    return RedirectResponse(url="/debug/slow-queries", status_code=302)
@@ -5,7 +5,8 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.routers.auth import require_auth, require_role
 from app.models.product import Product
-from app.models.inventory import InventoryAdjustment, ItemType
+from app.models.inventory import ItemType
+from app.services.inventory import apply_stock_changes
 from app.models.recipe import Ingredient
 from decimal import Decimal
 
@@ -14,7 +15,7 @@ templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/inventory", response_class=HTMLResponse)
-async def inventory_dashboard(
+def inventory_dashboard(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
@@ -41,7 +42,7 @@ async def inventory_dashboard(
 
 
 @router.post("/inventory/adjust", response_class=HTMLResponse)
-async def adjust_inventory(
+def adjust_inventory(
     request: Request,
     item_type: str = Form(...),
     item_id: int = Form(...),
@@ -51,34 +52,24 @@ async def adjust_inventory(
     db: Session = Depends(get_db)
 ):
     """Adjust inventory"""
-    if item_type == "product":
-        item = db.query(Product).filter(Product.id == item_id).first()
-        if not item:
-            return RedirectResponse(url="/inventory", status_code=302)
-        item.on_hand += Decimal(str(qty_change))
-    elif item_type == "ingredient":
-        item = db.query(Ingredient).filter(Ingredient.id == item_id).first()
-        if not item:
-            return RedirectResponse(url="/inventory", status_code=302)
-        item.on_hand += Decimal(str(qty_change))
-    else:
+    if item_type not in (ItemType.PRODUCT.value, ItemType.INGREDIENT.value):
         return RedirectResponse(url="/inventory", status_code=302)
     
-    adjustment = InventoryAdjustment(
-        item_type=ItemType(item_type),
-        item_id=item_id,
-        qty_change=Decimal(str(qty_change)),
-        reason=reason,
-        user_id=user_data["user"].id
+    # Applied in SQL so concurrent sales of the item aren't overwritten; unknown items are skipped
+    apply_stock_changes(
+        db,
+        ItemType(item_type),
+        {item_id: Decimal(str(qty_change))},
+        reason,
+        user_data["user"].id
     )
-    db.add(adjustment)
     db.commit()
     
     return RedirectResponse(url="/inventory", status_code=302)
 
 
 @router.get("/inventory/stocktake", response_class=HTMLResponse)
-async def stocktake_page(
+def stocktake_page(
     request: Request,
     user_data: dict = Depends(require_role(["admin", "manager"])),
     db: Session = Depends(get_db)
@@ -92,7 +83,7 @@ async def stocktake_page(
 
 
 @router.post("/inventory/stocktake", response_class=HTMLResponse)
-async def process_stocktake(
+def process_stocktake(
     request: Request,
     user_data: dict = Depends(require_role(["admin", "manager"])),
     db: Session = Depends(get_db)
@@ -1,76 +1,88 @@
-from fastapi import APIRouter, Depends, Request, Form, Query
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi import APIRouter, Depends, Request, Form, Query, HTTPException, status
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.routers.auth import require_auth
-from app.models.product import Product, Category
+from app.config import settings
+from app.routers.auth import require_auth, require_role
 from app.models.sale import TenderType, Sale, SaleLine
 # Shift system removed for simplicity
-from app.models.ar import Customer
-from app.services.pos import create_sale, get_sale, void_sale, create_return
-from app.schemas.sale import SaleCreate, SaleLineCreate
+from app.services.pos import create_sale, get_sale, void_sale, create_return, ingest_sales
+from app.services.cart import cart_store
+from app.services.catalog import catalog
+from app.services.receipt import receipt_cache
+from app.services.tax import compute_tax
+from app.services.product_search import search_product_ids
+from app.services.customer_search import customer_search
+from app.services.idempotency import (
+    get_idempotency_key, request_fingerprint, begin_request, complete_request, abandon_request
+)
+from app.schemas.cart import CartBatch
+from app.schemas.sale import (
+    SaleCreate, SaleLineCreate, BulkSaleCreate, BulkSaleResult, ReturnCreate, ReturnResponse
+)
 from decimal import Decimal
+from collections import OrderedDict
+from html import escape
 import json
+import threading
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/pos/checkout", response_class=HTMLResponse)
-async def checkout_page(
+def checkout_page(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """POS checkout page"""
-    from app.routers.settings import get_setting
-    
-    # Get default tax rate from settings
-    default_tax_rate_str = get_setting(db, "tax_rate", "0.10")
-    default_tax_rate = float(default_tax_rate_str)
-    
-    categories = db.query(Category).order_by(Category.sort_order, Category.name).all()
-    products = db.query(Product).filter(Product.is_active == True).order_by(Product.name).all()
-    
-    # Calculate price with tax for each product
-    for product in products:
-        if product.taxable:
-            # Use custom tax rate if set, otherwise use default
-            tax_rate = float(product.custom_tax_rate) if product.custom_tax_rate else default_tax_rate
-            product.price_with_tax = float(product.price) * (1 + tax_rate)
-        else:
-            product.price_with_tax = float(product.price)
+    snapshot = catalog.get_snapshot(db)
     
     return templates.TemplateResponse(
         "pos/checkout.html",
         {
             "request": request,
             "user": user_data["user"],
-            "categories": categories,
-            "products": products
+            "categories": snapshot.categories,
+            "products": snapshot.products,
+            "default_tax_rate": snapshot.default_tax_rate
         }
     )
 
 
+def get_cart_id(request: Request) -> str:
+    """Get the cart id from the request cookie, or a fresh one"""
+    return request.cookies.get(settings.cart_cookie_name) or cart_store.new_cart_id()
+
+
+def set_cart_cookie(response, cart_id: str):
+    """Attach the cart id cookie to a response"""
+    response.set_cookie(
+        settings.cart_cookie_name,
+        cart_id,
+        max_age=settings.cart_max_age,
+        httponly=True,
+        samesite="lax",
+        path="/"
+    )
+    return response
+
+
 @router.get("/pos/render-cart", response_class=HTMLResponse)
-async def render_cart(
+def render_cart(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """Render cart partial (GET endpoint for initial load)"""
-    cart = request.cookies.get("cart", "[]")
-    try:
-        cart_items = json.loads(cart)
-    except:
-        cart_items = []
-    
-    return render_cart_partial(cart_items, db)
+    cart_id = get_cart_id(request)
+    return set_cart_cookie(render_cart_partial(cart_store.items(db, cart_id), db), cart_id)
 
 
 @router.post("/pos/add-to-cart", response_class=HTMLResponse)
-async def add_to_cart(
+def add_to_cart(
     request: Request,
     product_id: int = Form(...),
     qty: float = Form(1),
@@ -78,180 +90,190 @@ async def add_to_cart(
     db: Session = Depends(get_db)
 ):
     """Add product to cart (HTMX endpoint)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = catalog.get_snapshot(db).get(product_id)
     if not product or not product.is_active:
         return HTMLResponse("<div class='alert alert-error'>Product not found</div>")
     
-    # Get cart from cookies
-    cart = request.cookies.get("cart", "[]")
-    try:
-        cart_items = json.loads(cart)
-    except:
-        cart_items = []
+    cart_id = get_cart_id(request)
+    change = "updated" if product_id in cart_store.get(db, cart_id) else "added"
+    cart_store.add_item(db, cart_id, product, qty)
+    return set_cart_cookie(
+        render_cart_update(cart_store.items(db, cart_id), db, product_id, change), cart_id
+    )
+
+
+@router.post("/pos/scan", response_class=HTMLResponse)
+def scan_to_cart(
+    request: Request,
+    code: str = Form(...),
+    qty: float = Form(1),
+    user_data: dict = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """Add a scanned or keyed SKU to the cart (HTMX endpoint)
     
-    # Check if product already in cart
-    found = False
-    for item in cart_items:
-        if item["product_id"] == product_id:
-            item["qty"] += qty
-            found = True
-            break
+    An exact SKU wins, and is refused if the product is inactive; otherwise
+    a partial code is accepted when it is the prefix of exactly one active
+    product.
+    """
+    snapshot = catalog.get_snapshot(db)
+    product = snapshot.find_sku(code)
+    if product is None:
+        matches = snapshot.match_sku_prefix(code, limit=2)
+        product = matches[0] if len(matches) == 1 else None
+        if len(matches) > 1:
+            return HTMLResponse(f"<div class='alert alert-error'>Several products match {escape(code)}</div>")
+    if product is None or not product.is_active:
+        return HTMLResponse(f"<div class='alert alert-error'>No product with SKU {escape(code)}</div>")
+    
+    cart_id = get_cart_id(request)
+    change = "updated" if product.id in cart_store.get(db, cart_id) else "added"
+    cart_store.add_item(db, cart_id, product, qty)
+    return set_cart_cookie(
+        render_cart_update(cart_store.items(db, cart_id), db, product.id, change), cart_id
+    )
+
+
+@router.get("/pos/sku-lookup")
+def sku_lookup(
+    q: str = Query(...),
+    limit: int = Query(10, le=50),
+    user_data: dict = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """Resolve a scanned SKU, or list the products a partial SKU could be (JSON API)"""
+    snapshot = catalog.get_snapshot(db)
+    product = snapshot.find_sku(q)
+    if product is None:
+        matches = snapshot.match_sku_prefix(q, limit)
+    else:
+        # A discontinued SKU is not found, rather than matching longer SKUs it prefixes
+        matches = [product] if product.is_active else []
+    return JSONResponse([
+        {
+            "id": p.id,
+            "sku": p.sku,
+            "name": p.name,
+            "price": float(p.price),
+            "taxable": p.taxable,
+            "tax_rate": float(p.tax_rate),
+            "exact": p is product
+        }
+        for p in matches
+    ])
+
+
+@router.get("/pos/product-search")
+def product_search(
+    q: str = Query(...),
+    limit: int = Query(50, le=200),
+    user_data: dict = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """Ids of the active products matching a search, best first (JSON API)"""
+    return JSONResponse(search_product_ids(db, q, limit))
+
+
+@router.post("/pos/cart/batch", response_class=HTMLResponse)
+def batch_cart(
+    request: Request,
+    operations: str = Form(...),
+    user_data: dict = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """Apply several cart operations at once and render the result once (HTMX endpoint)
     
-    if not found:
-        cart_items.append({
-            "product_id": product_id,
-            "product_name": product.name,
-            "product_sku": product.sku,
-            "qty": qty,
-            "unit_price": float(product.price),
-            "taxable": product.taxable,
-            "line_discount": 0
-        })
+    Takes the operations of a CartBatch as the JSON "operations" form field
+    that htmx posts.
+    """
+    try:
+        batch = CartBatch(operations=json.loads(operations))
+    except ValueError:
+        # json.JSONDecodeError and pydantic's ValidationError are both ValueErrors
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cart operations"
+        )
     
-    # Render cart partial with full cart container
-    import json as json_lib
-    cart_json = json_lib.dumps(cart_items)
-    response = render_cart_partial(cart_items, db)
-    # Ensure cookie is set with proper attributes
-    response.set_cookie("cart", cart_json, max_age=3600*24, httponly=False, samesite="lax", path="/")
-    return response
+    cart_id = get_cart_id(request)
+    changes = cart_store.apply(db, cart_id, batch.operations, catalog.get_snapshot(db))
+    return set_cart_cookie(render_cart_changes(cart_store.items(db, cart_id), db, changes), cart_id)
 
 
 @router.post("/pos/update-cart", response_class=HTMLResponse)
-async def update_cart(
+def update_cart(
     request: Request,
-    item_index: int = Form(None),
+    product_id: int = Form(None),
     qty: float = Form(None),
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """Update cart item quantity"""
-    # Try to get item_index from any form field name pattern
-    form_data = await request.form()
-    item_index = None
-    qty = None
-    
-    for key, value in form_data.items():
-        if key.startswith("item_index_"):
-            item_index = int(value)
-        elif key.startswith("qty_") and key != "qty":
-            qty = float(value)
-    
-    if item_index is None or qty is None:
-        # Fallback to direct form fields
-        item_index = form_data.get("item_index", None)
-        qty = form_data.get("qty", None)
-        if item_index is not None:
-            item_index = int(item_index)
-        if qty is not None:
-            qty = float(qty)
-    
-    cart = request.cookies.get("cart", "[]")
-    try:
-        cart_items = json.loads(cart)
-    except:
-        cart_items = []
-    
-    if item_index is not None and 0 <= item_index < len(cart_items):
-        if qty is not None:
-            if qty <= 0:
-                cart_items.pop(item_index)
-            else:
-                cart_items[item_index]["qty"] = qty
-    
-    import json as json_lib
-    cart_json = json_lib.dumps(cart_items)
-    response = render_cart_partial(cart_items, db)
-    response.set_cookie("cart", cart_json, max_age=3600*24, httponly=False, samesite="lax", path="/")
-    return response
+    cart_id = get_cart_id(request)
+    if product_id is None or qty is None or not cart_store.set_qty(db, cart_id, product_id, qty):
+        return set_cart_cookie(render_cart_partial(cart_store.items(db, cart_id), db), cart_id)
+    change = "removed" if qty <= 0 else "updated"
+    return set_cart_cookie(
+        render_cart_update(cart_store.items(db, cart_id), db, product_id, change), cart_id
+    )
 
 
 @router.post("/pos/remove-from-cart", response_class=HTMLResponse)
-async def remove_from_cart(
+def remove_from_cart(
     request: Request,
-    item_index: int = Form(None),
+    product_id: int = Form(None),
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """Remove item from cart"""
-    # Try to get item_index from any form field name pattern
-    form_data = await request.form()
-    item_index = None
-    
-    for key, value in form_data.items():
-        if key.startswith("item_index_"):
-            item_index = int(value)
-            break
-    
-    if item_index is None:
-        item_index = form_data.get("item_index", None)
-        if item_index is not None:
-            item_index = int(item_index)
-    
-    cart = request.cookies.get("cart", "[]")
-    try:
-        cart_items = json.loads(cart)
-    except:
-        cart_items = []
-    
-    if item_index is not None and 0 <= item_index < len(cart_items):
-        cart_items.pop(item_index)
-    
-    import json as json_lib
-    cart_json = json_lib.dumps(cart_items)
-    response = render_cart_partial(cart_items, db)
-    response.set_cookie("cart", cart_json, max_age=3600*24, httponly=False, samesite="lax", path="/")
-    return response
+    cart_id = get_cart_id(request)
+    if product_id is None or not cart_store.remove_item(db, cart_id, product_id):
+        return set_cart_cookie(render_cart_partial(cart_store.items(db, cart_id), db), cart_id)
+    return set_cart_cookie(
+        render_cart_update(cart_store.items(db, cart_id), db, product_id, "removed"), cart_id
+    )
 
 
 @router.post("/pos/apply-discount", response_class=HTMLResponse)
-async def apply_discount(
+def apply_discount(
     request: Request,
-    item_index: int = Form(None),
+    product_id: int = Form(None),
     discount: float = Form(0),
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """Apply discount to line or whole sale"""
-    cart = request.cookies.get("cart", "[]")
-    try:
-        cart_items = json.loads(cart)
-    except:
-        cart_items = []
-    
-    if item_index is not None and 0 <= item_index < len(cart_items):
-        cart_items[item_index]["line_discount"] = discount
-    else:
-        # Apply to whole sale (stored separately)
-        pass  # Will be handled in complete_sale
-    
-    return render_cart_partial(cart_items, db)
+    cart_id = get_cart_id(request)
+    if product_id is not None and cart_store.set_discount(db, cart_id, product_id, discount):
+        return set_cart_cookie(
+            render_cart_update(cart_store.items(db, cart_id), db, product_id, "updated"), cart_id
+        )
+    # Sale-level discounts are applied in complete_sale
+    return set_cart_cookie(render_cart_partial(cart_store.items(db, cart_id), db), cart_id)
 
 
 @router.post("/pos/complete-sale", response_class=HTMLResponse)
-async def complete_sale(
+def complete_sale(
     request: Request,
     tender_type: str = Form(...),
     customer_id: int = Form(None),
     sale_discount: float = Form(0),
     notes: str = Form(""),
+    cart_data: str = Form(None),
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """Complete a sale"""
     # Try to get cart from form data first (more reliable)
-    form_data = await request.form()
-    cart = None
-    cart_from_form = form_data.get("cart_data", None)
+    cart = cart_data
+    cart_id = request.cookies.get(settings.cart_cookie_name)
     
-    if cart_from_form:
-        cart = cart_from_form
-    else:
-        # Fallback to cookies
-        cart = request.cookies.get("cart", "[]")
+    cart_items = []
+    if not cart and cart_id:
+        # Fallback to the server-side cart
+        cart_items = cart_store.items(db, cart_id)
     
     # Parse cart JSON - handle various formats
-    cart_items = []
     if cart:
         try:
             # Try parsing directly
@@ -311,6 +333,17 @@ async def complete_sale(
         notes=notes
     )
     
+    # A retried or double-tapped submit replays the first response instead of selling twice
+    idempotency_key = get_idempotency_key(request)
+    if idempotency_key:
+        fingerprint = request_fingerprint(request, user_data["user"].id, json.dumps({
+            "tender_type": tender_type, "customer_id": customer_id, "sale_discount": sale_discount,
+            "notes": notes, "cart_data": cart_data
+        }, sort_keys=True))
+        replay = begin_request(db, idempotency_key, fingerprint)
+        if replay:
+            return replay
+    
     try:
         sale = create_sale(db, sale_data, user_data["user"].id, shift_id=None)
         
@@ -319,9 +352,15 @@ async def complete_sale(
             url=f"/pos/receipt/{sale.id}",
             status_code=302
         )
-        response.set_cookie("cart", "[]", max_age=0, path="/", samesite="lax", httponly=False)
+        if cart_id:
+            cart_store.clear(db, cart_id)
+            response.delete_cookie(settings.cart_cookie_name, path="/")
+        if idempotency_key:
+            complete_request(db, idempotency_key, response)
         return response
     except Exception as e:
+        if idempotency_key:
+            abandon_request(db, idempotency_key)
         return templates.TemplateResponse(
             "pos/checkout.html",
             {
@@ -332,8 +371,63 @@ async def complete_sale(
         )
 
 
+@router.get("/pos/catalog-stats")
+async def catalog_stats(
+    user_data: dict = Depends(require_role(["admin"]))
+):
+    """Catalog snapshot version and hit/miss counters"""
+    return JSONResponse(catalog.stats())
+
+
+@router.post("/pos/sales/bulk", response_model=list[BulkSaleResult])
+def bulk_ingest_sales(
+    payload: BulkSaleCreate,
+    user_data: dict = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """Ingest sales queued by a till while it was offline (JSON API)"""
+    return ingest_sales(db, payload.sales, user_data["user"].id)
+
+
+@router.post("/pos/returns", response_model=ReturnResponse)
+def create_return_endpoint(
+    request: Request,
+    return_data: ReturnCreate,
+    user_data: dict = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """Return lines of a sale (JSON API)"""
+    idempotency_key = get_idempotency_key(request)
+    if idempotency_key:
+        fingerprint = request_fingerprint(request, user_data["user"].id, return_data.model_dump_json())
+        replay = begin_request(db, idempotency_key, fingerprint)
+        if replay:
+            return replay
+    
+    try:
+        return_obj = create_return(db, {
+            "original_sale_id": return_data.original_sale_id,
+            "return_lines": [
+                {"line_id": line.line_id, "qty_returned": line.qty_returned}
+                for line in return_data.return_lines
+            ],
+            "reason": return_data.reason
+        }, user_data["user"].id)
+    except Exception:
+        if idempotency_key:
+            abandon_request(db, idempotency_key)
+        raise
+    
+    response = JSONResponse(
+        ReturnResponse.model_validate(return_obj).model_dump(mode="json")
+    )
+    if idempotency_key:
+        complete_request(db, idempotency_key, response)
+    return response
+
+
 @router.get("/pos/receipt/{sale_id}", response_class=HTMLResponse)
-async def receipt(
+def receipt(
     request: Request,
     sale_id: int,
     user_data: dict = Depends(require_auth),
@@ -342,35 +436,46 @@ async def receipt(
     """Display printable invoice/receipt after sale completion"""
     from sqlalchemy.orm import joinedload
     
-    # Load sale with all relationships for invoice display
-    sale = db.query(Sale).options(
-        joinedload(Sale.customer),
-        joinedload(Sale.cashier),
-        joinedload(Sale.sale_lines).joinedload(SaleLine.product)
-    ).filter(Sale.id == sale_id).first()
-    
-    if not sale:
+    user = user_data["user"]
+    version = receipt_cache.version(db, sale_id)
+    if version is None:
         return templates.TemplateResponse(
             "pos/checkout.html",
             {
                 "request": request,
-                "user": user_data["user"],
+                "user": user,
                 "error": "Sale not found"
             }
         )
     
-    return templates.TemplateResponse(
-        "pos/receipt.html",
-        {
-            "request": request,
-            "sale": sale,
-            "user": user_data["user"]
-        }
-    )
+    # Receipts only change on void/return, so a reprint can be answered from cache
+    etag = receipt_cache.etag(sale_id, version, user.id)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    body = receipt_cache.get(sale_id, version, user.id)
+    if body is None:
+        # Load sale with all relationships for invoice display
+        sale = db.query(Sale).options(
+            joinedload(Sale.customer),
+            joinedload(Sale.cashier),
+            joinedload(Sale.sale_lines).joinedload(SaleLine.product)
+        ).filter(Sale.id == sale_id).first()
+        
+        body = templates.get_template("pos/receipt.html").render(
+            request=request,
+            sale=sale,
+            user=user
+        )
+        receipt_cache.put(sale_id, version, user.id, body)
+    
+    return HTMLResponse(body, headers=headers)
 
 
 @router.get("/pos/search-customer", response_class=HTMLResponse)
-async def search_customer(
+def search_customer(
     request: Request,
     q: str = Query(""),
     user_data: dict = Depends(require_auth),
@@ -384,9 +489,7 @@ async def search_customer(
     if not q or len(q.strip()) < 2:
         return HTMLResponse("")
     
-    customers = db.query(Customer).filter(
-        Customer.name.ilike(f"%{q.strip()}%")
-    ).limit(10).all()
+    customers = customer_search.search(db, q, limit=10)
     
     return templates.TemplateResponse(
         "pos/customer_search_results.html",
@@ -394,114 +497,93 @@ async def search_customer(
     )
 
 
+# Compiled once; macros render the individual cart fragments
+cart_fragments = templates.get_template("pos/cart.html").module
+
+# Rendered cart lines and their totals, keyed by everything that affects the markup
+LINE_CACHE_SIZE = 5000
+_line_cache = OrderedDict()
+_line_cache_lock = threading.Lock()  # Handlers render carts from several threadpool threads
+
+
+def render_cart_line(item: dict, oob: str = None) -> tuple[str, Decimal]:
+    """Render one cart line, returning its HTML and line total"""
+    key = (
+        item["product_id"], item["product_name"], item["product_sku"],
+        item["qty"], item["unit_price"], item.get("line_discount", 0), oob
+    )
+    with _line_cache_lock:
+        cached = _line_cache.get(key)
+        if cached is not None:
+            _line_cache.move_to_end(key)
+            return cached
+    
+    line_total = Decimal(str(item["qty"])) * Decimal(str(item["unit_price"])) - Decimal(str(item.get("line_discount", 0)))
+    rendered = (str(cart_fragments.cart_line(item, line_total, oob)), line_total)
+    with _line_cache_lock:
+        _line_cache[key] = rendered
+        _line_cache.move_to_end(key)
+        while len(_line_cache) > LINE_CACHE_SIZE:
+            _line_cache.popitem(last=False)
+    return rendered
+
+
+def calculate_cart_totals(cart_items: list, db: Session) -> dict:
+    """Subtotal, tax and total for a cart, reusing cached line totals"""
+    totals = compute_tax(
+        catalog.get_snapshot(db),
+        ((item["product_id"], render_cart_line(item)[1], item.get("taxable", True)) for item in cart_items)
+    )
+    return {
+        "subtotal": totals.subtotal,
+        "tax_rate": totals.tax_rate,
+        "tax_amount": totals.tax_amount,
+        "total": totals.total,
+        "count": sum(float(item.get("qty", 1)) for item in cart_items)
+    }
+
+
 def render_cart_partial(cart_items: list, db: Session) -> HTMLResponse:
     """Render cart items container content for HTMX"""
-    from app.routers.settings import get_setting
-    import json as json_lib
-    
-    # Get tax rate from settings
-    tax_rate_str = get_setting(db, "tax_rate", "0.10")
-    tax_rate = Decimal(tax_rate_str)
-    
-    cart_count = sum(float(item.get("qty", 1)) for item in cart_items)
-    count_text = f"{int(cart_count)} item{'s' if cart_count != 1 else ''}"
-    
-    if not cart_items:
-        html = f"""
-        <div id="cart-items" style="flex: 1 1 auto; overflow-y: auto; overflow-x: hidden; min-height: 150px; max-height: 400px; background: white; border-radius: 8px; padding: 0.75rem; margin-bottom: 0.75rem;">
-            <div class="cart-empty">
-                <div class="cart-empty-icon">🛒</div>
-                <p>Your cart is empty</p>
-                <p style="font-size: 0.85rem; margin-top: 0.5rem;">Add products to get started</p>
-            </div>
-        </div>
-        <div class="cart-totals-modern" id="cart-totals" style="flex-shrink: 0;">
-            <div class="total-line">
-                <span>Subtotal</span>
-                <span>$0.00</span>
-            </div>
-            <div class="total-line">
-                <span>Tax</span>
-                <span>$0.00</span>
-            </div>
-            <div class="total-line total">
-                <span>Total</span>
-                <span>$0.00</span>
-            </div>
-        </div>
-        <p id="cart-count" hx-swap-oob="true">0 items</p>
-        <div id="complete-btn-wrapper" hx-swap-oob="true">
-            <button type="button" class="complete-sale-btn" id="complete-btn" onclick="completeSale()" style="opacity: 0.5; cursor: not-allowed;">Complete Sale</button>
-        </div>
-        """
-        response = HTMLResponse(html)
-        response.set_cookie("cart", "[]", max_age=3600*24, httponly=False, samesite="lax", path="/")
-        return response
-    
-    subtotal = Decimal('0')
-    taxable_subtotal = Decimal('0')
-    
-    for item in cart_items:
-        line_total = Decimal(str(item["qty"])) * Decimal(str(item["unit_price"])) - Decimal(str(item.get("line_discount", 0)))
-        subtotal += line_total
-        if item.get("taxable", True):
-            taxable_subtotal += line_total
-    
-    tax_amount = (taxable_subtotal * tax_rate).quantize(Decimal('0.01'))
-    total = subtotal + tax_amount
-    
-    items_html = "".join([f'''
-        <div class="cart-item-modern">
-            <div class="cart-item-info">
-                <div class="cart-item-name">{item["product_name"]}</div>
-                <div class="cart-item-details">{item["product_sku"]} • ${float(item["unit_price"]):.2f} each</div>
-            </div>
-            <div class="cart-item-qty">
-                <form hx-post="/pos/update-cart" hx-target=".cart-items-container" hx-swap="innerHTML" style="display: inline;">
-                    <input type="hidden" name="item_index" value="{idx}">
-                    <input type="hidden" name="qty" value="{max(0, item['qty'] - 1)}">
-                    <button class="qty-btn" type="submit">-</button>
-                </form>
-                <span class="qty-display">{item["qty"]}</span>
-                <form hx-post="/pos/update-cart" hx-target=".cart-items-container" hx-swap="innerHTML" style="display: inline;">
-                    <input type="hidden" name="item_index" value="{idx}">
-                    <input type="hidden" name="qty" value="{item['qty'] + 1}">
-                    <button class="qty-btn" type="submit">+</button>
-                </form>
-            </div>
-            <div class="cart-item-price">${float(Decimal(str(item["qty"])) * Decimal(str(item["unit_price"])) - Decimal(str(item.get("line_discount", 0)))):.2f}</div>
-            <form hx-post="/pos/remove-from-cart" hx-target=".cart-items-container" hx-swap="innerHTML" style="display: inline;">
-                <input type="hidden" name="item_index" value="{idx}">
-                <button class="qty-btn" type="submit" style="background: #fee; color: #c33;">×</button>
-            </form>
-        </div>
-    ''' for idx, item in enumerate(cart_items)])
+    lines_html = "".join(render_cart_line(item)[0] for item in cart_items)
+    html = (
+        str(cart_fragments.cart_items(lines_html))
+        + str(cart_fragments.cart_totals(calculate_cart_totals(cart_items, db)))
+        + str(cart_fragments.cart_script())
+    )
+    return HTMLResponse(html)
+
+
+def render_cart_update(cart_items: list, db: Session, product_id: int, change: str) -> HTMLResponse:
+    """Render only the changed cart line and the totals as out-of-band swaps
     
-    html = f"""
-    <div id="cart-items" style="flex: 1 1 auto; overflow-y: auto; overflow-x: hidden; min-height: 150px; max-height: 400px; background: white; border-radius: 8px; padding: 0.75rem; margin-bottom: 0.75rem;">
-        {items_html}
-    </div>
-    <div class="cart-totals-modern" id="cart-totals" style="flex-shrink: 0;">
-        <div class="total-line">
-            <span>Subtotal</span>
-            <span>${float(subtotal):.2f}</span>
-        </div>
-        <div class="total-line">
-            <span>Tax ({float(tax_rate)*100:.0f}%)</span>
-            <span>${float(tax_amount):.2f}</span>
-        </div>
-        <div class="total-line total">
-            <span>Total</span>
-            <span>${float(total):.2f}</span>
-        </div>
-    </div>
-    <p id="cart-count" hx-swap-oob="true">{count_text}</p>
-    <div id="complete-btn-wrapper" hx-swap-oob="true">
-        <button type="button" class="complete-sale-btn" id="complete-btn" onclick="completeSale()">Complete Sale (${float(total):.2f})</button>
-    </div>
+    change is "added" for a new line, "updated" for a changed line and
+    "removed" for a line that left the cart.
     """
-    
-    response = HTMLResponse(html)
-    response.set_cookie("cart", json_lib.dumps(cart_items), max_age=3600*24, httponly=False, samesite="lax", path="/")
-    return response
+    return render_cart_changes(cart_items, db, {product_id: change})
+
 
+def render_cart_changes(cart_items: list, db: Session, changes: dict) -> HTMLResponse:
+    """Render the changed cart lines and the totals as out-of-band swaps
+    
+    changes maps product id to "added", "updated" or "removed".
+    """
+    added = sum(1 for change in changes.values() if change == "added")
+    if not cart_items or added == len(cart_items):
+        # The empty-cart placeholder comes or goes; swap the whole list
+        lines_html = "".join(render_cart_line(item)[0] for item in cart_items)
+        html = str(cart_fragments.cart_items(lines_html, oob=True))
+    else:
+        html = ""
+        for product_id, change in changes.items():
+            if change == "removed":
+                html += f'<div id="cart-line-{product_id}" hx-swap-oob="delete"></div>'
+        for item in cart_items:
+            change = changes.get(item["product_id"])
+            if change == "added":
+                html += f'<div hx-swap-oob="beforeend:#cart-items">{render_cart_line(item)[0]}</div>'
+            elif change == "updated":
+                html += render_cart_line(item, oob="true")[0]
+    
+    html += str(cart_fragments.cart_totals(calculate_cart_totals(cart_items, db), oob=True))
+    return HTMLResponse(html)
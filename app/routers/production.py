@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
 from app.routers.auth import require_auth, require_role
 from app.models.recipe import Ingredient, Recipe, RecipeLine, Batch, BatchConsumption
 from app.models.product import Product
-from app.services.production import calculate_recipe_cost, create_batch
+from app.services.production import calculate_recipe_cost, recipe_costs, create_batch
 from decimal import Decimal
 from datetime import datetime, date
 
@@ -15,14 +15,14 @@ templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/production", response_class=HTMLResponse)
-async def production_dashboard(
+def production_dashboard(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """Production dashboard"""
     recipes = db.query(Recipe).order_by(Recipe.name).all()
-    batches_today = db.query(Batch).filter(
+    batches_today = db.query(Batch).options(joinedload(Batch.recipe)).filter(
         Batch.produced_at >= datetime.combine(date.today(), datetime.min.time())
     ).order_by(Batch.produced_at.desc()).all()
     
@@ -30,6 +30,7 @@ async def production_dashboard(
         "production/dashboard.html",
         {
             "request": request,
+            "user": user_data["user"],
             "recipes": recipes,
             "batches_today": batches_today
         }
@@ -37,7 +38,7 @@ async def production_dashboard(
 
 
 @router.get("/production/ingredients", response_class=HTMLResponse)
-async def list_ingredients(
+def list_ingredients(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
@@ -46,12 +47,12 @@ async def list_ingredients(
     ingredients = db.query(Ingredient).order_by(Ingredient.name).all()
     return templates.TemplateResponse(
         "production/ingredients.html",
-        {"request": request, "ingredients": ingredients}
+        {"request": request, "user": user_data["user"], "ingredients": ingredients}
     )
 
 
 @router.post("/production/ingredients", response_class=HTMLResponse)
-async def create_ingredient(
+def create_ingredient(
     request: Request,
     name: str = Form(...),
     unit: str = Form(...),
@@ -75,24 +76,25 @@ async def create_ingredient(
 
 
 @router.get("/production/recipes", response_class=HTMLResponse)
-async def list_recipes(
+def list_recipes(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """List recipes"""
     recipes = db.query(Recipe).order_by(Recipe.name).all()
+    costs = recipe_costs(db, [recipe.id for recipe in recipes])
     for recipe in recipes:
-        recipe.total_cost = calculate_recipe_cost(db, recipe.id)
+        recipe.total_cost = costs[recipe.id]
     
     return templates.TemplateResponse(
         "production/recipes.html",
-        {"request": request, "recipes": recipes}
+        {"request": request, "user": user_data["user"], "recipes": recipes}
     )
 
 
 @router.get("/production/recipes/{recipe_id}", response_class=HTMLResponse)
-async def view_recipe(
+def view_recipe(
     request: Request,
     recipe_id: int,
     user_data: dict = Depends(require_auth),
@@ -111,6 +113,7 @@ async def view_recipe(
         "production/recipe_detail.html",
         {
             "request": request,
+            "user": user_data["user"],
             "recipe": recipe,
             "recipe_lines": recipe_lines,
             "total_cost": total_cost,
@@ -120,7 +123,7 @@ async def view_recipe(
 
 
 @router.get("/production/recipes/new", response_class=HTMLResponse)
-async def new_recipe(
+def new_recipe(
     request: Request,
     user_data: dict = Depends(require_role(["admin", "manager"])),
     db: Session = Depends(get_db)
@@ -129,12 +132,12 @@ async def new_recipe(
     ingredients = db.query(Ingredient).order_by(Ingredient.name).all()
     return templates.TemplateResponse(
         "production/recipe_form.html",
-        {"request": request, "ingredients": ingredients}
+        {"request": request, "user": user_data["user"], "ingredients": ingredients}
     )
 
 
 @router.post("/production/recipes", response_class=HTMLResponse)
-async def create_recipe(
+def create_recipe(
     request: Request,
     name: str = Form(...),
     yield_qty: float = Form(...),
@@ -156,7 +159,7 @@ async def create_recipe(
 
 
 @router.post("/production/batches", response_class=HTMLResponse)
-async def create_batch_production(
+def create_batch_production(
     request: Request,
     recipe_id: int = Form(...),
     qty_produced: float = Form(...),
@@ -172,6 +175,6 @@ async def create_batch_production(
     except Exception as e:
         return templates.TemplateResponse(
             "production/dashboard.html",
-            {"request": request, "error": str(e)}
+            {"request": request, "user": user_data["user"], "error": str(e)}
         )
 
@@ -6,13 +6,15 @@ from app.database import get_db
 from app.routers.auth import require_auth, require_role
 from app.models.product import Product, Category
 from app.schemas.product import ProductCreate, ProductUpdate, CategoryCreate
+from app.services.catalog import catalog
+from app.services.product_search import search_products
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/products", response_class=HTMLResponse)
-async def list_products(
+def list_products(
     request: Request,
     category_id: int = Query(None),
     search: str = Query(None),
@@ -26,12 +28,11 @@ async def list_products(
         query = query.filter(Product.category_id == category_id)
     
     if search:
-        query = query.filter(
-            Product.name.ilike(f"%{search}%") |
-            Product.sku.ilike(f"%{search}%")
-        )
+        query = search_products(db, query, search)
+    else:
+        query = query.order_by(Product.name)
     
-    products = query.order_by(Product.name).all()
+    products = query.all()
     categories = db.query(Category).order_by(Category.sort_order, Category.name).all()
     
     return templates.TemplateResponse(
@@ -48,7 +49,7 @@ async def list_products(
 
 
 @router.get("/products/new", response_class=HTMLResponse)
-async def new_product(
+def new_product(
     request: Request,
     user_data: dict = Depends(require_role(["admin", "manager"])),
     db: Session = Depends(get_db)
@@ -62,7 +63,7 @@ async def new_product(
 
 
 @router.post("/products", response_class=HTMLResponse)
-async def create_product(
+def create_product(
     request: Request,
     sku: str = Form(...),
     name: str = Form(...),
@@ -110,12 +111,14 @@ async def create_product(
     )
     db.add(product)
     db.commit()
+    # Rebuild the catalog and its SKU index now, not on the next scan at the till
+    catalog.get_snapshot(db)
     
     return RedirectResponse(url="/products", status_code=302)
 
 
 @router.get("/products/{product_id}/edit", response_class=HTMLResponse)
-async def edit_product(
+def edit_product(
     request: Request,
     product_id: int,
     user_data: dict = Depends(require_role(["admin", "manager"])),
@@ -134,7 +137,7 @@ async def edit_product(
 
 
 @router.post("/products/{product_id}", response_class=HTMLResponse)
-async def update_product(
+def update_product(
     request: Request,
     product_id: int,
     sku: str = Form(...),
@@ -187,11 +190,13 @@ async def update_product(
     product.on_hand = Decimal(str(on_hand))
     
     db.commit()
+    # Rebuild the catalog and its SKU index now, not on the next scan at the till
+    catalog.get_snapshot(db)
     return RedirectResponse(url="/products", status_code=302)
 
 
 @router.get("/categories", response_class=HTMLResponse)
-async def list_categories(
+def list_categories(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
@@ -205,7 +210,7 @@ async def list_categories(
 
 
 @router.post("/categories", response_class=HTMLResponse)
-async def create_category(
+def create_category(
     request: Request,
     name: str = Form(...),
     sort_order: int = Form(0),
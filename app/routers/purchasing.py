@@ -6,15 +6,15 @@ from app.database import get_db
 from app.routers.auth import require_auth, require_role
 from app.models.purchasing import Vendor, PurchaseOrder, POLine, ReceivedLine, POStatus
 from app.models.recipe import Ingredient
+from app.services.sequence import sequences
 from decimal import Decimal
-from datetime import datetime
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/purchasing", response_class=HTMLResponse)
-async def purchasing_dashboard(
+def purchasing_dashboard(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
@@ -30,7 +30,7 @@ async def purchasing_dashboard(
 
 
 @router.get("/purchasing/vendors", response_class=HTMLResponse)
-async def list_vendors(
+def list_vendors(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
@@ -44,7 +44,7 @@ async def list_vendors(
 
 
 @router.post("/purchasing/vendors", response_class=HTMLResponse)
-async def create_vendor(
+def create_vendor(
     request: Request,
     name: str = Form(...),
     contact: str = Form(""),
@@ -68,7 +68,7 @@ async def create_vendor(
 
 
 @router.get("/purchasing/pos/new", response_class=HTMLResponse)
-async def new_po(
+def new_po(
     request: Request,
     user_data: dict = Depends(require_role(["admin", "manager"])),
     db: Session = Depends(get_db)
@@ -83,7 +83,7 @@ async def new_po(
 
 
 @router.post("/purchasing/pos", response_class=HTMLResponse)
-async def create_po(
+def create_po(
     request: Request,
     vendor_id: int = Form(...),
     user_data: dict = Depends(require_role(["admin", "manager"])),
@@ -91,8 +91,7 @@ async def create_po(
 ):
     """Create PO"""
     # Generate PO number
-    last_po = db.query(PurchaseOrder).order_by(PurchaseOrder.id.desc()).first()
-    po_number = f"PO-{datetime.now().strftime('%Y%m%d')}-{last_po.id + 1 if last_po else 1:04d}"
+    po_number = sequences.next_number(db, "PO")
     
     po = PurchaseOrder(
         vendor_id=vendor_id,
@@ -107,7 +106,7 @@ async def create_po(
 
 
 @router.get("/purchasing/pos/{po_id}", response_class=HTMLResponse)
-async def view_po(
+def view_po(
     request: Request,
     po_id: int,
     user_data: dict = Depends(require_auth),
@@ -125,7 +124,7 @@ async def view_po(
 
 
 @router.get("/purchasing/pos/{po_id}/receive", response_class=HTMLResponse)
-async def receive_po_page(
+def receive_po_page(
     request: Request,
     po_id: int,
     user_data: dict = Depends(require_role(["admin", "manager"])),
@@ -143,7 +142,7 @@ async def receive_po_page(
 
 
 @router.post("/purchasing/pos/{po_id}/receive", response_class=HTMLResponse)
-async def receive_po(
+def receive_po(
     request: Request,
     po_id: int,
     user_data: dict = Depends(require_role(["admin", "manager"])),
@@ -3,11 +3,13 @@ from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from app.database import get_db
+from app.database import get_read_db
 from app.routers.auth import require_auth
 from app.models.sale import Sale, SaleLine, TenderType
 from app.models.product import Product
 from app.models.recipe import Ingredient, Batch
+from app.services.business_day import business_today
+from app.services.reports import PERIODS, sales_by_period
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 import csv
@@ -18,10 +20,10 @@ templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/reports", response_class=HTMLResponse)
-async def reports_dashboard(
+def reports_dashboard(
     request: Request,
     user_data: dict = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Reports dashboard"""
     return templates.TemplateResponse(
@@ -31,24 +33,20 @@ async def reports_dashboard(
 
 
 @router.get("/reports/daily-sales", response_class=HTMLResponse)
-async def daily_sales_report(
+def daily_sales_report(
     request: Request,
     report_date: str = Query(None),
     user_data: dict = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Daily sales report"""
     if report_date:
         target_date = datetime.strptime(report_date, "%Y-%m-%d").date()
     else:
-        target_date = date.today()
-    
-    start_datetime = datetime.combine(target_date, datetime.min.time())
-    end_datetime = datetime.combine(target_date, datetime.max.time())
+        target_date = business_today()
     
     sales = db.query(Sale).filter(
-        Sale.datetime >= start_datetime,
-        Sale.datetime <= end_datetime,
+        Sale.business_date == target_date,
         Sale.status != "voided"
     ).all()
     
@@ -75,14 +73,14 @@ async def daily_sales_report(
 
 
 @router.get("/reports/top-products", response_class=HTMLResponse)
-async def top_products_report(
+def top_products_report(
     request: Request,
     days: int = Query(30),
     user_data: dict = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Top selling products report"""
-    start_date = datetime.now() - timedelta(days=days)
+    start_date = business_today() - timedelta(days=days - 1)
     
     # Query top products by quantity sold
     top_products = db.query(
@@ -96,7 +94,7 @@ async def top_products_report(
     ).join(
         Sale, Sale.id == SaleLine.sale_id
     ).filter(
-        Sale.datetime >= start_date,
+        Sale.business_date >= start_date,
         Sale.status != "voided"
     ).group_by(
         Product.id, Product.name, Product.sku
@@ -114,11 +112,38 @@ async def top_products_report(
     )
 
 
+@router.get("/reports/sales-trend", response_class=HTMLResponse)
+def sales_trend_report(
+    request: Request,
+    days: int = Query(90, ge=1),
+    period: str = Query("day"),
+    user_data: dict = Depends(require_auth),
+    db: Session = Depends(get_read_db)
+):
+    """Sales totals per day, week or month"""
+    if period not in PERIODS:
+        period = "day"
+    end = business_today() + timedelta(days=1)
+    rows = sales_by_period(db, end - timedelta(days=days), end, period)
+    
+    return templates.TemplateResponse(
+        "reports/sales_trend.html",
+        {
+            "request": request,
+            "rows": rows,
+            "days": days,
+            "period": period,
+            "periods": PERIODS,
+            "total_sales": sum(row.total_sales for row in rows)
+        }
+    )
+
+
 @router.get("/reports/inventory-valuation", response_class=HTMLResponse)
-async def inventory_valuation(
+def inventory_valuation(
     request: Request,
     user_data: dict = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Inventory valuation report"""
     products = db.query(Product).filter(Product.is_active == True).all()
@@ -142,12 +167,12 @@ async def inventory_valuation(
 
 
 @router.get("/reports/wastage", response_class=HTMLResponse)
-async def wastage_report(
+def wastage_report(
     request: Request,
     start_date: str = Query(None),
     end_date: str = Query(None),
     user_data: dict = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Wastage report"""
     if start_date:
@@ -162,7 +187,7 @@ async def wastage_report(
     
     batches = db.query(Batch).filter(
         Batch.produced_at >= start,
-        Batch.produced_at <= end,
+        Batch.produced_at < datetime.combine(end.date() + timedelta(days=1), datetime.min.time()),
         Batch.wastage > 0
     ).order_by(Batch.produced_at.desc()).all()
     
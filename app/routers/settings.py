@@ -28,7 +28,7 @@ def set_setting(db: Session, key: str, value: str, description: str = None):
     return setting
 
 @router.get("/settings", response_class=HTMLResponse)
-async def settings_page(
+def settings_page(
     request: Request,
     user_data: dict = Depends(require_role(["admin"])),
     db: Session = Depends(get_db)
@@ -46,7 +46,7 @@ async def settings_page(
     )
 
 @router.post("/settings/update", response_class=RedirectResponse)
-async def update_settings(
+def update_settings(
     request: Request,
     tax_rate: float = Form(...),
     user_data: dict = Depends(require_role(["admin"])),
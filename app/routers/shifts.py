@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
 from app.routers.auth import require_auth, require_role
 from app.models.shift import Shift, CashEvent, ShiftStatus, CashEventType
@@ -13,21 +13,21 @@ templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/shifts", response_class=HTMLResponse)
-async def list_shifts(
+def list_shifts(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """List all shifts"""
-    shifts = db.query(Shift).order_by(Shift.opened_at.desc()).limit(50).all()
+    shifts = db.query(Shift).options(joinedload(Shift.cashier)).order_by(Shift.opened_at.desc()).limit(50).all()
     return templates.TemplateResponse(
         "shifts/list.html",
-        {"request": request, "shifts": shifts}
+        {"request": request, "user": user_data["user"], "shifts": shifts}
     )
 
 
 @router.get("/shifts/open", response_class=HTMLResponse)
-async def open_shift_page(
+def open_shift_page(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
@@ -44,12 +44,12 @@ async def open_shift_page(
     
     return templates.TemplateResponse(
         "shifts/open.html",
-        {"request": request}
+        {"request": request, "user": user_data["user"], "user": user_data["user"]}
     )
 
 
 @router.post("/shifts/open", response_class=HTMLResponse)
-async def open_shift(
+def open_shift(
     request: Request,
     opening_float: float = Form(...),
     user_data: dict = Depends(require_auth),
@@ -78,7 +78,7 @@ async def open_shift(
 
 
 @router.get("/shifts/current", response_class=HTMLResponse)
-async def current_shift(
+def current_shift(
     request: Request,
     user_data: dict = Depends(require_auth),
     db: Session = Depends(get_db)
@@ -113,6 +113,7 @@ async def current_shift(
         "shifts/current.html",
         {
             "request": request,
+            "user": user_data["user"],
             "shift": shift,
             "cash_events": cash_events,
             "expected_cash": expected_cash
@@ -121,7 +122,7 @@ async def current_shift(
 
 
 @router.post("/shifts/{shift_id}/cash-event", response_class=HTMLResponse)
-async def add_cash_event(
+def add_cash_event(
     request: Request,
     shift_id: int,
     event_type: str = Form(...),
@@ -148,7 +149,7 @@ async def add_cash_event(
 
 
 @router.get("/shifts/{shift_id}/close", response_class=HTMLResponse)
-async def close_shift_page(
+def close_shift_page(
     request: Request,
     shift_id: int,
     user_data: dict = Depends(require_auth),
@@ -161,12 +162,12 @@ async def close_shift_page(
     
     return templates.TemplateResponse(
         "shifts/close.html",
-        {"request": request, "shift": shift}
+        {"request": request, "user": user_data["user"], "shift": shift}
     )
 
 
 @router.post("/shifts/{shift_id}/close", response_class=HTMLResponse)
-async def close_shift(
+def close_shift(
     request: Request,
     shift_id: int,
     counted_cash: float = Form(...),
@@ -191,7 +192,7 @@ async def close_shift(
 
 
 @router.get("/shifts/{shift_id}/reconciliation", response_class=HTMLResponse)
-async def reconciliation(
+def reconciliation(
     request: Request,
     shift_id: int,
     user_data: dict = Depends(require_auth),
@@ -209,6 +210,7 @@ async def reconciliation(
         "shifts/reconciliation.html",
         {
             "request": request,
+            "user": user_data["user"],
             "shift": shift,
             "sales": sales,
             "cash_events": cash_events
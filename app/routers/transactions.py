@@ -2,11 +2,17 @@ from fastapi import APIRouter, Depends, Request, Query, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.routers.auth import require_auth, require_role
 from app.models.sale import Sale, SaleLine
-from app.models.product import Product
+from app.models.inventory import ItemType
+from app.services.pos import claim_void
+from app.services.inventory import apply_stock_changes, sum_changes
+from app.services.receipt import receipt_cache
+from app.services.business_day import business_today
+from app.services.idempotency import (
+    get_idempotency_key, request_fingerprint, begin_request, complete_request, abandon_request
+)
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 
@@ -15,12 +21,12 @@ templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/transactions/history", response_class=HTMLResponse)
-async def transaction_history(
+def transaction_history(
     request: Request,
     start_date: str = Query(None),
     end_date: str = Query(None),
     user_data: dict = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Transaction history with date filtering"""
     from sqlalchemy.orm import joinedload
@@ -36,23 +42,24 @@ async def transaction_history(
     if start_date:
         try:
             start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(func.date(Sale.datetime) >= start)
+            query = query.filter(Sale.business_date >= start)
         except ValueError:
             pass
     
     if end_date:
         try:
             end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(func.date(Sale.datetime) <= end)
+            query = query.filter(Sale.business_date < end + timedelta(days=1))
         except ValueError:
             pass
     
     # If no dates specified, show last 30 days
     if not start_date and not end_date:
-        thirty_days_ago = date.today() - timedelta(days=30)
-        query = query.filter(func.date(Sale.datetime) >= thirty_days_ago)
+        today = business_today()
+        thirty_days_ago = today - timedelta(days=30)
+        query = query.filter(Sale.business_date >= thirty_days_ago)
         start_date = thirty_days_ago.strftime('%Y-%m-%d')
-        end_date = date.today().strftime('%Y-%m-%d')
+        end_date = today.strftime('%Y-%m-%d')
     
     # Get transactions ordered by date (newest first)
     transactions = query.order_by(Sale.datetime.desc()).all()
@@ -75,13 +82,33 @@ async def transaction_history(
 
 
 @router.post("/transactions/void/{sale_id}")
-async def void_transaction(
+def void_transaction(
     sale_id: int,
     request: Request,
     user_data: dict = Depends(require_role(["admin"])),
     db: Session = Depends(get_db)
 ):
     """Void a transaction (admin only)"""
+    # A retried void replays the first response instead of reversing stock twice
+    idempotency_key = get_idempotency_key(request)
+    if idempotency_key:
+        fingerprint = request_fingerprint(request, user_data["user"].id)
+        replay = begin_request(db, idempotency_key, fingerprint)
+        if replay:
+            return replay
+        try:
+            response = _void_sale(db, sale_id, user_data)
+        except Exception:
+            abandon_request(db, idempotency_key)
+            raise
+        complete_request(db, idempotency_key, response)
+        return response
+    
+    return _void_sale(db, sale_id, user_data)
+
+
+def _void_sale(db: Session, sale_id: int, user_data: dict) -> JSONResponse:
+    """Void a sale and put its stock back"""
     from app.models.sale import SaleStatus
     
     # Get the sale
@@ -94,18 +121,22 @@ async def void_transaction(
     if sale.status == SaleStatus.VOIDED:
         raise HTTPException(status_code=400, detail="Transaction already voided")
     
-    # Mark as voided using existing status field
+    # Mark as voided using existing status field; the conditional UPDATE stops a concurrent void
+    claim_void(db, sale.id)
     sale.status = SaleStatus.VOIDED
     sale.notes = (sale.notes or "") + f" [VOIDED by {user_data['user'].username} at {datetime.now().strftime('%Y-%m-%d %H:%M')}]"
     
-    # Reverse inventory changes
-    for line in sale.sale_lines:
-        product = db.query(Product).filter(Product.id == line.product_id).first()
-        if product:
-            # Add back the quantity that was sold
-            product.on_hand += line.qty
+    # Reverse inventory changes, adding back the quantity that was sold
+    apply_stock_changes(
+        db,
+        ItemType.PRODUCT,
+        sum_changes((line.product_id, line.qty) for line in sale.sale_lines),
+        f"Void sale {sale.sale_number}",
+        user_data["user"].id
+    )
     
     db.commit()
+    receipt_cache.invalidate(sale.id)
     
     return JSONResponse({"success": True, "message": "Transaction voided successfully"})
 
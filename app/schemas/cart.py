@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional, List, Literal
+
+
+class CartOperation(BaseModel):
+    op: Literal["add", "set_qty", "discount", "remove"]
+    product_id: Optional[int] = None
+    sku: Optional[str] = None  # Keyed or scanned instead of product_id, for "add"
+    qty: float = 1  # Added for "add" (negative takes away), the new quantity for "set_qty"
+    discount: float = 0
+
+
+class CartBatch(BaseModel):
+    operations: List[CartOperation]
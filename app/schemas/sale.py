@@ -42,6 +42,23 @@ class SaleCreate(BaseModel):
     notes: Optional[str] = None
 
 
+class OfflineSaleCreate(SaleCreate):
+    client_id: str
+    sold_at: Optional[datetime] = None
+
+
+class BulkSaleCreate(BaseModel):
+    sales: List[OfflineSaleCreate]
+
+
+class BulkSaleResult(BaseModel):
+    client_id: str
+    status: str  # created, duplicate or error
+    sale_id: Optional[int] = None
+    sale_number: Optional[str] = None
+    error: Optional[str] = None
+
+
 class SaleResponse(SaleBase):
     id: int
     sale_number: str
@@ -55,9 +72,14 @@ class SaleResponse(SaleBase):
         from_attributes = True
 
 
+class ReturnLineCreate(BaseModel):
+    line_id: int
+    qty_returned: Decimal
+
+
 class ReturnCreate(BaseModel):
     original_sale_id: int
-    return_lines: List[dict]  # {line_id, qty_returned}
+    return_lines: List[ReturnLineCreate]
     reason: Optional[str] = None
 
 
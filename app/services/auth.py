@@ -1,8 +1,19 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import bcrypt
 from app.models.user import User, Role
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.principal import principal_cache
+from app.config import settings
+
+# bcrypt is deliberately slow; these threads keep it off the event loop, and
+# their number caps how many cores a burst of logins can take from checkout
+password_pool = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -12,7 +23,24 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=settings.bcrypt_rounds)).decode()
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made with a cost factor other than settings.bcrypt_rounds"""
+    return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_pool, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_pool, get_password_hash, password)
 
 
 def authenticate_user(db: Session, username: str, password: str) -> User | None:
@@ -27,6 +55,24 @@ def authenticate_user(db: Session, username: str, password: str) -> User | None:
     return user
 
 
+async def authenticate_user_async(db: Session, username: str, password: str) -> User | None:
+    """Authenticate a user without blocking the event loop on bcrypt
+    
+    A hash made with an old cost factor is replaced on successful login.
+    """
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        return None
+    if not await verify_password_async(password, user.password_hash):
+        return None
+    if not user.is_active:
+        return None
+    if needs_rehash(user.password_hash):
+        user.password_hash = await get_password_hash_async(password)
+        db.commit()
+    return user
+
+
 def get_user(db: Session, user_id: int) -> User | None:
     """Get a user by ID"""
     return db.query(User).filter(User.id == user_id).first()
@@ -82,6 +128,7 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> User:
         setattr(db_user, key, value)
     
     db.commit()
+    principal_cache.invalidate(db.get_bind(), [user_id])
     db.refresh(db_user)
     return db_user
 
@@ -0,0 +1,41 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from app.config import settings
+
+
+def store_zone() -> ZoneInfo:
+    """The store's time zone"""
+    return ZoneInfo(settings.store_timezone)
+
+
+def business_date_for(moment: datetime = None) -> date:
+    """The trading day a moment belongs to, in store time
+    
+    Naive moments are taken as store wall-clock time, which is what tills
+    send; aware ones are converted. Anything before business_day_start_hour
+    counts towards the previous day, so a late shift stays on one date.
+    """
+    if moment is None:
+        local = datetime.now(store_zone())
+    elif moment.tzinfo is None:
+        local = moment
+    else:
+        local = moment.astimezone(store_zone())
+    return (local - timedelta(hours=settings.business_day_start_hour)).date()
+
+
+def business_date_for_utc(moment: datetime) -> date:
+    """The trading day of a naive UTC timestamp, as written by the database's now()"""
+    return business_date_for(moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment)
+
+
+def store_time_to_utc(moment: datetime) -> datetime:
+    """A till's moment in UTC, the basis of the database's now(); naive means store wall-clock time"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=store_zone())
+    return moment.astimezone(timezone.utc)
+
+
+def business_today() -> date:
+    """The trading day it is now"""
+    return business_date_for()
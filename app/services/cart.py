@@ -0,0 +1,249 @@
+from sqlalchemy import update, insert, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from decimal import Decimal
+import json
+import secrets
+import threading
+import time
+from app.models.cart import Cart
+from app.config import settings
+
+# Times a change is replayed on a newer copy of the cart before giving up
+SAVE_ATTEMPTS = 3
+
+
+class CartStore:
+    """Server-side carts keyed by cart id.
+    
+    Carts are held in an in-process LRU as ordered dicts of lines keyed by
+    product id, so a line mutation is a dict operation. Every mutation is
+    written through to the carts table, which is the source of truth: a
+    worker trusts its cached copy for cart_cache_ttl seconds, and each write
+    only succeeds if the row still has the version the change was made
+    against. Otherwise the change is replayed on the newer copy, so lines
+    another worker added are never overwritten.
+    """
+    
+    def __init__(self, capacity: int = None, cache_ttl: int = None):
+        self.capacity = capacity or settings.cart_cache_size
+        self.cache_ttl = cache_ttl if cache_ttl is not None else settings.cart_cache_ttl
+        self._carts = OrderedDict()  # cart id -> (lines, version, trusted until)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def new_cart_id() -> str:
+        """Generate a new opaque cart id"""
+        return secrets.token_urlsafe(24)
+    
+    def get(self, db: Session, cart_id: str) -> OrderedDict:
+        """Get the lines of a cart, keyed by product id"""
+        return self._load(db, cart_id)[0]
+    
+    def items(self, db: Session, cart_id: str) -> list:
+        """Get the lines of a cart as a list, in the order they were added"""
+        return list(self.get(db, cart_id).values())
+    
+    def add_item(self, db: Session, cart_id: str, product, qty: float = 1) -> dict:
+        """Add qty of a product, merging with an existing line"""
+        def add(lines):
+            line = lines.get(product.id)
+            if line:
+                line["qty"] += qty
+            else:
+                line = lines[product.id] = _new_line(product, qty)
+            return line, True
+        return self._update(db, cart_id, add)
+    
+    def set_qty(self, db: Session, cart_id: str, product_id: int, qty: float) -> dict | None:
+        """Set a line's quantity; zero or less removes the line"""
+        def set_line_qty(lines):
+            if product_id not in lines:
+                return None, False
+            if qty <= 0:
+                return lines.pop(product_id), True
+            lines[product_id]["qty"] = qty
+            return lines[product_id], True
+        return self._update(db, cart_id, set_line_qty)
+    
+    def set_discount(self, db: Session, cart_id: str, product_id: int, discount: float) -> dict | None:
+        """Set a line's discount"""
+        def set_line_discount(lines):
+            line = lines.get(product_id)
+            if line is None:
+                return None, False
+            line["line_discount"] = discount
+            return line, True
+        return self._update(db, cart_id, set_line_discount)
+    
+    def remove_item(self, db: Session, cart_id: str, product_id: int) -> dict | None:
+        """Remove a line"""
+        def remove(lines):
+            line = lines.pop(product_id, None)
+            return line, line is not None
+        return self._update(db, cart_id, remove)
+    
+    def apply(self, db: Session, cart_id: str, operations: list, snapshot) -> dict:
+        """Apply a batch of cart operations all-or-nothing, saving once
+        
+        Operations run in order against a copy of the cart, which replaces
+        the cart only if every operation succeeded; removing a line that is
+        already gone is not a failure. Returns product id ->
+        "added", "updated" or "removed" for the lines that ended up changed.
+        """
+        def apply_operations(lines):
+            before = {product_id: dict(line) for product_id, line in lines.items()}
+            for operation in operations:
+                _apply_operation(lines, operation, snapshot)
+            
+            changes = {}
+            for product_id, line in before.items():
+                if product_id not in lines:
+                    changes[product_id] = "removed"
+                elif lines[product_id] != line:
+                    changes[product_id] = "updated"
+            for product_id in lines:
+                if product_id not in before:
+                    changes[product_id] = "added"
+            return changes, bool(changes)
+        return self._update(db, cart_id, apply_operations)
+    
+    def clear(self, db: Session, cart_id: str):
+        """Forget a cart entirely (after checkout)"""
+        self._forget(cart_id)
+        db.execute(delete(Cart).where(Cart.id == cart_id))
+        db.commit()
+    
+    def purge_expired(self, db: Session) -> int:
+        """Delete carts untouched for cart_max_age seconds"""
+        cutoff = datetime.now() - timedelta(seconds=settings.cart_max_age)
+        expired = [row.id for row in db.query(Cart.id).filter(Cart.updated_at <= cutoff).all()]
+        for cart_id in expired:
+            self._forget(cart_id)
+        purged = db.execute(delete(Cart).where(Cart.updated_at <= cutoff)).rowcount
+        db.commit()
+        return purged
+    
+    def _load(self, db: Session, cart_id: str, fresh: bool = False) -> tuple:
+        """Lines and version of a cart, from the cache while it is trusted"""
+        now = time.time()
+        if not fresh:
+            with self._lock:
+                cached = self._carts.get(cart_id)
+                if cached is not None and now < cached[2]:
+                    self._carts.move_to_end(cart_id)
+                    return cached[0], cached[1]
+        
+        lines = OrderedDict()
+        row = db.query(Cart.items, Cart.version).filter(Cart.id == cart_id).first()
+        version = row.version if row else None  # None until the cart is first saved
+        if row:
+            for item in json.loads(row.items):
+                lines[item["product_id"]] = item
+        self._remember(cart_id, lines, version)
+        return lines, version
+    
+    def _update(self, db: Session, cart_id: str, change):
+        """Run change(lines) -> (result, changed) on a copy of the cart and save it if changed"""
+        for attempt in range(SAVE_ATTEMPTS):
+            cached, version = self._load(db, cart_id, fresh=attempt > 0)
+            lines = OrderedDict((product_id, dict(line)) for product_id, line in cached.items())
+            result, changed = change(lines)
+            if not changed or self._save(db, cart_id, lines, version):
+                return result
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The cart is being changed elsewhere, please try again"
+        )
+    
+    def _save(self, db: Session, cart_id: str, lines: OrderedDict, version: int | None) -> bool:
+        """Write a cart through to the carts table unless another worker saved it first"""
+        payload = json.dumps(list(lines.values()), default=_json_default)
+        values = {"items": payload, "version": (version or 0) + 1, "updated_at": datetime.now()}
+        try:
+            if version is None:
+                saved = db.execute(insert(Cart).values(id=cart_id, **values)).rowcount
+            else:
+                saved = db.execute(
+                    update(Cart).where(Cart.id == cart_id, Cart.version == version).values(**values)
+                ).rowcount
+        except IntegrityError:
+            # Another worker created the cart first
+            saved = 0
+        if not saved:
+            db.rollback()
+            return False
+        db.commit()
+        self._remember(cart_id, lines, values["version"])
+        return True
+    
+    def _remember(self, cart_id: str, lines: OrderedDict, version: int | None):
+        with self._lock:
+            self._carts[cart_id] = (lines, version, time.time() + self.cache_ttl)
+            self._carts.move_to_end(cart_id)
+            while len(self._carts) > self.capacity:
+                self._carts.popitem(last=False)
+    
+    def _forget(self, cart_id: str):
+        with self._lock:
+            self._carts.pop(cart_id, None)
+
+
+def _apply_operation(lines: OrderedDict, operation, snapshot):
+    """Apply one batch operation to a cart's lines"""
+    product_id = operation.product_id
+    if operation.op == "add":
+        product = snapshot.find_sku(operation.sku) if operation.sku else snapshot.get(product_id)
+        if not product or not product.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product {operation.sku or product_id} not found"
+            )
+        line = lines.get(product.id)
+        qty = (line["qty"] if line else 0) + operation.qty
+        if qty <= 0:
+            lines.pop(product.id, None)
+        elif line:
+            line["qty"] = qty
+        else:
+            lines[product.id] = _new_line(product, qty)
+        return
+    
+    if product_id not in lines:
+        if operation.op == "remove":
+            return  # Already gone, e.g. a double-tapped remove button
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Product {product_id} is not in the cart"
+        )
+    if operation.op == "remove" or (operation.op == "set_qty" and operation.qty <= 0):
+        del lines[product_id]
+    elif operation.op == "set_qty":
+        lines[product_id]["qty"] = operation.qty
+    else:
+        lines[product_id]["line_discount"] = operation.discount
+
+
+def _new_line(product, qty: float) -> dict:
+    """A cart line for a catalog product"""
+    return {
+        "product_id": product.id,
+        "product_name": product.name,
+        "product_sku": product.sku,
+        "qty": qty,
+        "unit_price": float(product.price),
+        "taxable": product.taxable,
+        "line_discount": 0
+    }
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+cart_store = CartStore()
@@ -0,0 +1,233 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Mapping
+from bisect import bisect_left
+import threading
+import time
+import weakref
+from app.models.product import Product, Category
+from app.models.settings import SystemSettings
+from app.config import settings
+
+# Product columns the snapshot depends on; on_hand changes on every sale and is not one of them
+CATALOG_FIELDS = ("sku", "name", "category_id", "price", "taxable", "custom_tax_rate", "is_active")
+
+
+@dataclass(frozen=True)
+class CatalogCategory:
+    id: int
+    name: str
+    sort_order: int
+
+
+@dataclass(frozen=True)
+class CatalogProduct:
+    id: int
+    sku: str
+    name: str
+    category_id: int
+    price: Decimal
+    taxable: bool
+    is_active: bool
+    tax_rate: Decimal  # Effective rate: custom rate, else the tax_rate setting, 0 if not taxable
+    price_with_tax: Decimal
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    default_tax_rate: Decimal
+    categories: tuple  # CatalogCategory, in display order
+    products: tuple  # Active CatalogProduct, ordered by name
+    by_id: Mapping[int, CatalogProduct]  # Every product, active or not
+    by_sku: Mapping[str, CatalogProduct]  # Every product, keyed by normalized SKU
+    skus: tuple  # Normalized SKUs in sorted order, for prefix lookups
+    
+    def get(self, product_id: int) -> CatalogProduct | None:
+        """Get a product by ID"""
+        return self.by_id.get(product_id)
+    
+    def find_sku(self, code: str) -> CatalogProduct | None:
+        """Get a product by scanned or typed SKU"""
+        return self.by_sku.get(normalize_sku(code))
+    
+    def match_sku_prefix(self, prefix: str, limit: int = 10) -> list:
+        """Active products whose SKU starts with prefix, in SKU order
+        
+        The SKUs are kept sorted, so every match sits in one contiguous run
+        found by a binary search; this does the job of a prefix trie without
+        a node per character.
+        """
+        prefix = normalize_sku(prefix)
+        matches = []
+        if not prefix:
+            return matches
+        for i in range(bisect_left(self.skus, prefix), len(self.skus)):
+            if not self.skus[i].startswith(prefix) or len(matches) >= limit:
+                break
+            product = self.by_sku[self.skus[i]]
+            if product.is_active:
+                matches.append(product)
+        return matches
+
+
+def normalize_sku(code: str) -> str:
+    """Normalize a SKU or barcode for lookup: trimmed and upper-case"""
+    return (code or "").strip().upper()
+
+
+def catalog_product(p, default_tax_rate: Decimal) -> CatalogProduct:
+    """Snapshot entry for a Product, or a row with its CATALOG_FIELDS and id"""
+    if p.taxable:
+        tax_rate = p.custom_tax_rate if p.custom_tax_rate else default_tax_rate
+    else:
+        tax_rate = Decimal('0')
+    return CatalogProduct(
+        id=p.id,
+        sku=p.sku,
+        name=p.name,
+        category_id=p.category_id,
+        price=p.price,
+        taxable=bool(p.taxable),
+        is_active=bool(p.is_active),
+        tax_rate=tax_rate,
+        price_with_tax=(p.price * (1 + tax_rate)).quantize(Decimal('0.01'))
+    )
+
+
+def build_snapshot(db: Session, version: int) -> CatalogSnapshot:
+    """Load products, categories and the tax rate setting into an immutable snapshot"""
+    from app.routers.settings import get_setting
+    
+    default_tax_rate = Decimal(get_setting(db, "tax_rate", "0.10"))
+    categories = tuple(
+        CatalogCategory(id=c.id, name=c.name, sort_order=c.sort_order)
+        for c in db.query(Category).order_by(Category.sort_order, Category.name).all()
+    )
+    
+    by_id = {
+        p.id: catalog_product(p, default_tax_rate)
+        for p in db.query(Product).order_by(Product.name).all()
+    }
+    by_sku = {normalize_sku(p.sku): p for p in by_id.values()}
+    
+    return CatalogSnapshot(
+        version=version,
+        default_tax_rate=default_tax_rate,
+        categories=categories,
+        products=tuple(p for p in by_id.values() if p.is_active),
+        by_id=MappingProxyType(by_id),
+        by_sku=MappingProxyType(by_sku),
+        skus=tuple(sorted(by_sku))
+    )
+
+
+class Catalog:
+    """Versioned catalog snapshots, rebuilt after the catalog changes.
+    
+    Snapshots are kept per engine and dropped by the session hooks below
+    once a transaction in this process commits a change to a product's
+    catalog fields, a category or the tax_rate setting. Changes made by
+    other workers, or by bulk UPDATEs the hooks never see, are picked up
+    once a snapshot is catalog_ttl seconds old; checkout does not wait for
+    that and uses get_verified_snapshot.
+    """
+    
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl if ttl is not None else settings.catalog_ttl
+        self._lock = threading.Lock()
+        self._snapshots = weakref.WeakKeyDictionary()  # engine -> (CatalogSnapshot, expires at)
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get_snapshot(self, db: Session) -> CatalogSnapshot:
+        """Get the current snapshot, building it if the catalog changed or it expired"""
+        bind = db.get_bind()
+        with self._lock:
+            snapshot, expires_at = self._snapshots.get(bind, (None, 0))
+            if snapshot is not None and snapshot.version == self.version and time.time() < expires_at:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            version = self.version
+        
+        snapshot = build_snapshot(db, version)
+        with self._lock:
+            if version == self.version:
+                self._snapshots[bind] = (snapshot, time.time() + self.ttl)
+        return snapshot
+    
+    def get_verified_snapshot(self, db: Session, product_ids) -> CatalogSnapshot:
+        """Get a snapshot checked against the database for these products and the tax rate
+        
+        One query per table instead of a rebuild: the snapshot is only rebuilt
+        when one of the products, or the tax rate, no longer matches it.
+        """
+        from app.routers.settings import get_setting
+        
+        product_ids = set(product_ids)
+        snapshot = self.get_snapshot(db)
+        default_tax_rate = Decimal(get_setting(db, "tax_rate", "0.10"))
+        rows = db.query(Product.id, *(getattr(Product, name) for name in CATALOG_FIELDS)).filter(
+            Product.id.in_(product_ids)
+        ).all()
+        current = {row.id: catalog_product(row, default_tax_rate) for row in rows}
+        if default_tax_rate == snapshot.default_tax_rate and all(
+            snapshot.get(product_id) == current.get(product_id) for product_id in product_ids
+        ):
+            return snapshot
+        self.invalidate()
+        return self.get_snapshot(db)
+    
+    def invalidate(self):
+        """Force the next get_snapshot to rebuild"""
+        with self._lock:
+            self.version += 1
+    
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            return {"version": self.version, "hits": self.hits, "misses": self.misses}
+
+
+catalog = Catalog()
+
+
+def _touches_catalog(obj, changed: bool) -> bool:
+    if isinstance(obj, Category):
+        return True
+    if isinstance(obj, SystemSettings):
+        return obj.setting_key == "tax_rate"
+    if isinstance(obj, Product):
+        if not changed:
+            return True
+        state = inspect(obj)
+        return any(state.attrs[name].history.has_changes() for name in CATALOG_FIELDS)
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def _note_catalog_writes(session, flush_context):
+    """Remember that this transaction wrote catalog rows"""
+    if (
+        any(_touches_catalog(obj, False) for obj in session.new)
+        or any(_touches_catalog(obj, False) for obj in session.deleted)
+        or any(_touches_catalog(obj, True) for obj in session.dirty)
+    ):
+        session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalog(session):
+    """Drop catalog snapshots once catalog writes are committed"""
+    if session.info.pop("catalog_changed", False):
+        catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_writes(session):
+    session.info.pop("catalog_changed", None)
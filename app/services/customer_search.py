@@ -0,0 +1,247 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+import heapq
+import re
+import threading
+import time
+import weakref
+from app.models.ar import Customer
+from app.config import settings
+
+# Customer columns the index covers; balance changes on every on-account sale and is not one of them
+SEARCH_FIELDS = ("name", "email", "phone")
+
+# Trigrams found in more than this share of customers (an email domain, say)
+# say almost nothing about a match and are skipped when rarer ones exist
+COMMON_TRIGRAM_SHARE = 0.2
+
+# A match must contain at least this share of the query's trigrams
+MIN_SIMILARITY = 0.4
+
+RESULT_CACHE_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class CustomerEntry:
+    id: int
+    name: str
+    phone: str
+    email: str
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of every word in text, padded so word starts weigh more"""
+    grams = set()
+    for word in re.findall(r"\w+", (text or "").lower()):
+        word = f"  {word} "
+        for i in range(len(word) - 2):
+            grams.add(word[i:i + 3])
+    return grams
+
+
+def entry_trigrams(entry: CustomerEntry) -> set:
+    """Trigrams of a customer's name, email and phone digits"""
+    phone_digits = re.sub(r"\D", "", entry.phone or "")
+    return trigrams(f"{entry.name} {entry.email or ''} {phone_digits}")
+
+
+def normalize_query(q: str) -> str:
+    """Lower-case a query and collapse whitespace, for use as a cache key"""
+    return " ".join((q or "").lower().split())
+
+
+class CustomerIndex:
+    """Trigram index over one database's customers.
+    
+    Every entry has a position; the postings map each trigram to the
+    positions containing it. Edited and deleted customers leave a dead
+    position behind and edits are appended at a new one, so a committed
+    change never rebuilds the whole index.
+    """
+    
+    def __init__(self):
+        self.entries = []  # CustomerEntry, or None for a dead position
+        self.sizes = []  # Number of trigrams per position
+        self.positions = {}  # customer id -> live position
+        self.postings = {}  # trigram -> list of positions
+        self.results = OrderedDict()  # normalized query -> matching CustomerEntry list
+    
+    def add(self, entry: CustomerEntry):
+        """Index a customer, replacing its previous entry"""
+        self.remove(entry.id)
+        position = len(self.entries)
+        grams = entry_trigrams(entry)
+        self.entries.append(entry)
+        self.sizes.append(len(grams))
+        self.positions[entry.id] = position
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(position)
+    
+    def remove(self, customer_id: int):
+        """Drop a customer from the index"""
+        position = self.positions.pop(customer_id, None)
+        if position is not None:
+            self.entries[position] = None
+    
+    def search(self, q: str, limit: int = 10) -> list:
+        """Customers best matching q, most similar first"""
+        key = normalize_query(q)
+        cached = self.results.get(key)
+        if cached is not None:
+            self.results.move_to_end(key)
+            return cached[:limit]
+    
+        query_grams = trigrams(key)
+        if not query_grams:
+            return []
+        lists = sorted((self.postings.get(gram, []) for gram in query_grams), key=len)
+        cutoff = max(100, len(self.positions) * COMMON_TRIGRAM_SHARE)
+        # Trigrams nobody has (typos) count against a match; common ones count for nothing
+        missing = sum(1 for positions in lists if not positions)
+        lists = [positions for positions in lists if 0 < len(positions) <= cutoff] or [
+            positions for positions in lists if positions
+        ][:1]
+    
+        shared = Counter()
+        for positions in lists:
+            shared.update(positions)
+    
+        # Rank by how much of the query a customer covers, then prefer the
+        # customer with the least text besides it
+        threshold = MIN_SIMILARITY * (len(lists) + missing)
+        scored = []
+        for position, count in shared.items():
+            if count >= threshold and self.entries[position] is not None:
+                scored.append((count, count / self.sizes[position], -position))
+        matches = [self.entries[-position] for _, _, position in heapq.nlargest(max(limit, 10), scored)]
+    
+        # Cached per whole query, not narrowed from a shorter prefix's entry:
+        # that entry only holds the prefix's top matches, and a longer query
+        # can rank customers first that the prefix left out
+        self.results[key] = matches
+        if len(self.results) > RESULT_CACHE_SIZE:
+            self.results.popitem(last=False)
+        return matches[:limit]
+
+
+def build_index(db: Session) -> CustomerIndex:
+    """Index every customer in the database"""
+    index = CustomerIndex()
+    for row in db.query(Customer.id, Customer.name, Customer.phone, Customer.email):
+        index.add(CustomerEntry(*row))
+    return index
+
+
+class CustomerSearch:
+    """Customer trigram indexes, kept per engine.
+    
+    Commits in this process update the index straight away. Customers
+    added or edited by other workers show up once the index is rebuilt,
+    customer_index_ttl seconds after it was built. A rebuild runs outside
+    the lock, and searches keep using the old index until it is done.
+    """
+    
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl if ttl is not None else settings.customer_index_ttl
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # One rebuild at a time
+        self._indexes = weakref.WeakKeyDictionary()  # engine -> (CustomerIndex, expires at)
+        self._pending = weakref.WeakKeyDictionary()  # engine -> changes committed during its rebuild
+    
+    def _index(self, db: Session) -> CustomerIndex:
+        bind = db.get_bind()
+        with self._lock:
+            index, expires_at = self._indexes.get(bind, (None, 0))
+        if index is not None and time.time() < expires_at:
+            return index
+        if not self._build_lock.acquire(blocking=index is None):
+            return index  # Already being rebuilt; the old index will do meanwhile
+        try:
+            with self._lock:
+                index, expires_at = self._indexes.get(bind, (None, 0))
+                if index is not None and time.time() < expires_at:
+                    return index
+                self._pending[bind] = {}
+            index = build_index(db)
+            with self._lock:
+                _apply_changes(index, self._pending.pop(bind, {}))
+                self._indexes[bind] = (index, time.time() + self.ttl)
+            return index
+        finally:
+            self._build_lock.release()
+    
+    def search(self, db: Session, q: str, limit: int = 10) -> list:
+        """Customers matching a name, phone or email, tolerating typos"""
+        index = self._index(db)
+        with self._lock:
+            return index.search(q, limit)
+    
+    def apply(self, bind, changes: dict):
+        """Apply committed changes: customer id -> CustomerEntry, or None if deleted"""
+        with self._lock:
+            pending = self._pending.get(bind)
+            if pending is not None:
+                pending.update(changes)
+            index, expires_at = self._indexes.get(bind, (None, 0))
+            if index is None:
+                return
+            _apply_changes(index, changes)
+            # Rebuild from the database once dead positions are the majority
+            if len(index.entries) > 2 * len(index.positions) + 1000:
+                self._indexes[bind] = (index, 0)
+    
+    def reset(self):
+        """Drop every index"""
+        with self._lock:
+            self._indexes = weakref.WeakKeyDictionary()
+            self._pending = weakref.WeakKeyDictionary()
+
+
+def _apply_changes(index: CustomerIndex, changes: dict):
+    for customer_id, entry in changes.items():
+        if entry is None:
+            index.remove(customer_id)
+        else:
+            index.add(entry)
+    index.results.clear()
+
+
+customer_search = CustomerSearch()
+
+
+def _customer_entry(customer: Customer) -> CustomerEntry:
+    return CustomerEntry(customer.id, customer.name, customer.phone, customer.email)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_customer_writes(session, flush_context):
+    """Remember customers this transaction added, edited or deleted"""
+    changes = {}
+    for obj in session.new:
+        if isinstance(obj, Customer):
+            changes[obj.id] = _customer_entry(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Customer):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in SEARCH_FIELDS):
+                changes[obj.id] = _customer_entry(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Customer):
+            changes[obj.id] = None
+    if changes:
+        session.info.setdefault("customers_changed", {}).update(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _index_customer_writes(session):
+    """Update the customer index once customer writes are committed"""
+    changes = session.info.pop("customers_changed", None)
+    if changes:
+        customer_search.apply(session.get_bind(), changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_customer_writes(session):
+    session.info.pop("customers_changed", None)
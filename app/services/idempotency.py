@@ -0,0 +1,141 @@
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, Request, Response, status
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import logging
+import secrets
+from app.models.idempotency import IdempotencyKey
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth replaying; cookies and the like are not
+REPLAYED_HEADERS = ("location", "content-type", "hx-redirect")
+
+
+def get_idempotency_key(request: Request) -> str | None:
+    """Read the idempotency key from the request header"""
+    key = request.headers.get(settings.idempotency_header)
+    if key:
+        return key[:128]
+    return None
+
+
+def request_fingerprint(request: Request, user_id: int, payload: str = None) -> str:
+    """Hash what makes a request the same request
+    
+    Handlers pass their parsed body (JSON, or their form fields) as payload.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.url.path} {user_id}\n".encode())
+    if payload is not None:
+        digest.update(payload.encode())
+    return digest.hexdigest()
+
+
+def utc_now() -> datetime:
+    """The current time in UTC, the basis of every stored expiry"""
+    return datetime.now(timezone.utc)
+
+
+def as_utc(moment: datetime) -> datetime:
+    """A stored expiry as an aware UTC datetime; SQLite hands it back naive"""
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def begin_request(db: Session, key: str, fingerprint: str) -> Response | None:
+    """Claim an idempotency key before doing the work
+    
+    Returns the stored response when the key was already completed, and
+    None when the caller now owns the key and should run the request. The
+    claim is a lease (idempotency_lease) held under a token kept in the
+    session, so a key held by a worker that died mid-request can be taken
+    over by a retry, and the dead worker can no longer complete it.
+    """
+    record = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+    if record and as_utc(record.expires_at) <= utc_now():
+        db.delete(record)
+        db.commit()
+        record = None
+    
+    if record is None:
+        token = secrets.token_hex(16)
+        try:
+            db.add(IdempotencyKey(
+                key=key,
+                fingerprint=fingerprint,
+                lease_token=token,
+                expires_at=utc_now() + timedelta(seconds=settings.idempotency_lease)
+            ))
+            db.commit()
+            db.info.setdefault("idempotency_leases", {})[key] = token
+            return None
+        except IntegrityError:
+            # A concurrent request claimed the key first
+            db.rollback()
+            record = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+    
+    if record.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency key was already used for a different request"
+        )
+    if record.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this idempotency key is still in progress"
+        )
+    return Response(
+        content=record.response_body,
+        status_code=record.status_code,
+        headers=json.loads(record.response_headers or "{}")
+    )
+
+
+def complete_request(db: Session, key: str, response: Response):
+    """Store the response to replay for a claimed key, for the full idempotency_ttl
+    
+    Only if this session still holds the lease; a request that outlived it
+    leaves the key to the retry that took it over.
+    """
+    token = db.info.get("idempotency_leases", {}).pop(key, None)
+    completed = db.query(IdempotencyKey).filter(
+        IdempotencyKey.key == key,
+        IdempotencyKey.lease_token == token,
+        IdempotencyKey.status_code.is_(None)
+    ).update({
+        IdempotencyKey.lease_token: None,
+        IdempotencyKey.expires_at: utc_now() + timedelta(seconds=settings.idempotency_ttl),
+        IdempotencyKey.status_code: response.status_code,
+        IdempotencyKey.response_body: response.body.decode(),
+        IdempotencyKey.response_headers: json.dumps({
+            name: value for name, value in response.headers.items() if name in REPLAYED_HEADERS
+        })
+    })
+    db.commit()
+    if not completed:
+        logger.warning("Idempotency key %s was taken over before its request completed", key)
+
+
+def abandon_request(db: Session, key: str):
+    """Release a claimed key after a failure so the client can retry"""
+    db.rollback()
+    token = db.info.get("idempotency_leases", {}).pop(key, None)
+    db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.key == key,
+        IdempotencyKey.lease_token == token,
+        IdempotencyKey.status_code.is_(None)
+    ))
+    db.commit()
+
+
+def purge_expired_keys(db: Session) -> int:
+    """Delete expired keys"""
+    purged = db.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at <= utc_now())
+    ).rowcount
+    db.commit()
+    return purged
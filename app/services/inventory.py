@@ -0,0 +1,84 @@
+from sqlalchemy import update, insert, case
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from dataclasses import dataclass, field
+from decimal import Decimal
+from app.models.product import Product
+from app.models.recipe import Ingredient
+from app.models.inventory import InventoryAdjustment, ItemType
+
+STOCK_MODELS = {
+    ItemType.PRODUCT: Product,
+    ItemType.INGREDIENT: Ingredient,
+}
+
+
+@dataclass
+class StockChangeResult:
+    applied: dict = field(default_factory=dict)  # item_id -> qty change written
+    rejected: list = field(default_factory=list)  # item ids that were missing or hit the guard
+
+
+def sum_changes(pairs) -> dict:
+    """Collapse (item_id, qty_change) pairs into one change per item"""
+    changes = {}
+    for item_id, qty_change in pairs:
+        changes[item_id] = changes.get(item_id, Decimal('0')) + qty_change
+    return changes
+
+
+def apply_stock_changes(
+    db: Session,
+    item_type: ItemType,
+    changes: dict,
+    reason: str,
+    user_id: int,
+    guard: bool = False
+) -> StockChangeResult:
+    """Apply on_hand changes for many items in one UPDATE statement
+    
+    The change is computed by the database (on_hand = on_hand + delta), so
+    concurrent sales of the same item never overwrite each other. With
+    guard=True an item is only updated if its on_hand stays non-negative;
+    on PostgreSQL the UPDATE row-locks each item and re-checks the guard
+    against the committed value, so no SELECT ... FOR UPDATE is needed.
+    Items that weren't updated are reported in rejected; it is up to the
+    caller to roll back if the operation must be all-or-nothing. An
+    InventoryAdjustment is recorded for every applied change.
+    """
+    model = STOCK_MODELS[item_type]
+    changes = {item_id: qty for item_id, qty in changes.items() if qty}
+    result = StockChangeResult()
+    if not changes:
+        return result
+    
+    delta = case(changes, value=model.id)
+    stmt = update(model).where(model.id.in_(list(changes))).values(on_hand=model.on_hand + delta)
+    if guard:
+        stmt = stmt.where(model.on_hand + delta >= 0)
+    updated = db.execute(
+        stmt.returning(model.id),
+        execution_options={"synchronize_session": False}
+    ).scalars().all()
+    
+    # Rows already loaded in this session now hold a stale on_hand
+    for item_id in updated:
+        loaded = db.identity_map.get(identity_key(model, item_id))
+        if loaded is not None:
+            db.expire(loaded, ["on_hand"])
+    
+    result.applied = {item_id: changes[item_id] for item_id in updated}
+    result.rejected = [item_id for item_id in changes if item_id not in result.applied]
+    
+    if result.applied:
+        db.execute(insert(InventoryAdjustment), [
+            {
+                "item_type": item_type,
+                "item_id": item_id,
+                "qty_change": qty_change,
+                "reason": reason,
+                "user_id": user_id
+            }
+            for item_id, qty_change in result.applied.items()
+        ])
+    return result
@@ -1,16 +1,25 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from decimal import Decimal
 from datetime import datetime
+import logging
 from app.models.sale import Sale, SaleLine, Return, ReturnLine, TenderType, SaleStatus
-from app.models.product import Product
 from app.models.shift import Shift, ShiftStatus
 from app.models.ar import Customer, AREntry, AREntryType
-from app.models.inventory import InventoryAdjustment, ItemType
+from app.models.inventory import ItemType
 from app.schemas.sale import SaleCreate
+from app.services.sequence import sequences
+from app.services.catalog import catalog
+from app.services.tax import compute_tax
+from app.services.inventory import apply_stock_changes, sum_changes
+from app.services.receipt import receipt_cache
+from app.services.business_day import business_date_for, store_time_to_utc
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 def calculate_tax(subtotal: Decimal, taxable_amount: Decimal, tax_rate: Decimal = None) -> Decimal:
     """Calculate tax amount"""
@@ -19,8 +28,23 @@ def calculate_tax(subtotal: Decimal, taxable_amount: Decimal, tax_rate: Decimal
     return (taxable_amount * tax_rate).quantize(Decimal('0.01'))
 
 
-def create_sale(db: Session, sale_data: SaleCreate, cashier_id: int, shift_id: int = None) -> Sale:
-    """Create a new sale"""
+def create_sale(
+    db: Session,
+    sale_data: SaleCreate,
+    cashier_id: int,
+    shift_id: int = None,
+    client_id: str = None,
+    sold_at: datetime = None,
+    sale_number: str = None,
+    commit: bool = True
+) -> Sale:
+    """Create a new sale
+    
+    client_id and sold_at carry the id and time a till assigned to a sale
+    recorded offline. With commit=False the sale is only flushed, so the
+    caller controls the transaction; such callers should pass a sale_number
+    allocated before their transaction started writing.
+    """
     # Shift is optional - can be None for direct sales
     # if not shift_id:
     #     shift = db.query(Shift).filter(
@@ -30,13 +54,28 @@ def create_sale(db: Session, sale_data: SaleCreate, cashier_id: int, shift_id: i
     #     if shift:
     #         shift_id = shift.id
     
-    # Calculate totals
-    subtotal = Decimal('0')
-    taxable_subtotal = Decimal('0')
+    # On-account sales need a customer; check before anything is written
+    customer = None
+    if sale_data.tender_type == TenderType.ON_ACCOUNT:
+        if not sale_data.customer_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Customer required for on-account sales"
+            )
+        # Locked until commit so concurrent invoices and payments can't lose a balance update
+        customer = db.query(Customer).filter(Customer.id == sale_data.customer_id).with_for_update().first()
+        if not customer:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Customer not found"
+            )
+    
+    # Prices, tax rates and active flags may have changed in another worker
+    snapshot = catalog.get_verified_snapshot(db, (line.product_id for line in sale_data.lines))
     
     sale_lines = []
     for line_data in sale_data.lines:
-        product = db.query(Product).filter(Product.id == line_data.product_id).first()
+        product = snapshot.get(line_data.product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -49,10 +88,6 @@ def create_sale(db: Session, sale_data: SaleCreate, cashier_id: int, shift_id: i
             )
         
         line_total = (line_data.qty * line_data.unit_price) - line_data.line_discount
-        subtotal += line_total
-        if product.taxable:
-            taxable_subtotal += line_total
-        
         sale_lines.append({
             "product_id": product.id,
             "qty": line_data.qty,
@@ -61,18 +96,17 @@ def create_sale(db: Session, sale_data: SaleCreate, cashier_id: int, shift_id: i
             "line_total": line_total
         })
     
-    # Apply sale-level discount
-    discount_amount = sale_data.sale_discount or Decimal('0')
-    subtotal_after_discount = subtotal - discount_amount
-    taxable_subtotal_after_discount = taxable_subtotal - discount_amount
-    
-    # Calculate tax
-    tax_amount = calculate_tax(subtotal_after_discount, taxable_subtotal_after_discount)
-    total = subtotal_after_discount + tax_amount
+    # Tax every line at its product's effective rate, after the sale-level discount
+    totals = compute_tax(
+        snapshot,
+        ((line["product_id"], line["line_total"]) for line in sale_lines),
+        sale_data.sale_discount
+    )
     
-    # Generate sale number
-    last_sale = db.query(Sale).order_by(Sale.id.desc()).first()
-    sale_number = f"SALE-{datetime.now().strftime('%Y%m%d')}-{last_sale.id + 1 if last_sale else 1:04d}"
+    # Generate sale number, dated like the sale's business day
+    business_date = business_date_for(sold_at)
+    if not sale_number:
+        sale_number = sequences.next_number(db, "SALE", day=business_date)
     
     # Create sale
     sale = Sale(
@@ -80,80 +114,136 @@ def create_sale(db: Session, sale_data: SaleCreate, cashier_id: int, shift_id: i
         cashier_id=cashier_id,
         shift_id=shift_id,
         customer_id=sale_data.customer_id,
-        subtotal=subtotal,
-        tax_amount=tax_amount,
-        discount_amount=discount_amount,
-        total=total,
+        subtotal=totals.subtotal,
+        tax_amount=totals.tax_amount,
+        discount_amount=totals.discount,
+        total=totals.total,
         tender_type=sale_data.tender_type,
         status=SaleStatus.COMPLETED,
-        notes=sale_data.notes
+        notes=sale_data.notes,
+        client_id=client_id,
+        business_date=business_date
     )
+    if sold_at:
+        # Stored like the server default, in UTC
+        sale.datetime = store_time_to_utc(sold_at)
     db.add(sale)
     db.flush()
     
-    # Create sale lines and update inventory
+    # Create sale lines in one bulk insert
     for line_data in sale_lines:
-        line = SaleLine(
-            sale_id=sale.id,
-            product_id=line_data["product_id"],
-            qty=line_data["qty"],
-            unit_price=line_data["unit_price"],
-            line_discount=line_data["line_discount"],
-            line_total=line_data["line_total"]
-        )
-        db.add(line)
-        
-        # Update product inventory
-        product = db.query(Product).filter(Product.id == line_data["product_id"]).first()
-        product.on_hand -= line_data["qty"]
-        
-        # Record inventory adjustment
-        adjustment = InventoryAdjustment(
-            item_type=ItemType.PRODUCT,
-            item_id=product.id,
-            qty_change=-line_data["qty"],
-            reason=f"Sale {sale.sale_number}",
-            user_id=cashier_id
-        )
-        db.add(adjustment)
+        line_data["sale_id"] = sale.id
+    db.execute(insert(SaleLine), sale_lines)
+    
+    # Decrement stock for all lines in one statement
+    apply_stock_changes(
+        db,
+        ItemType.PRODUCT,
+        sum_changes((line_data["product_id"], -line_data["qty"]) for line_data in sale_lines),
+        f"Sale {sale.sale_number}",
+        cashier_id
+    )
     
     # Handle on-account sales (create AR entry)
-    if sale_data.tender_type == TenderType.ON_ACCOUNT:
-        if not sale_data.customer_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Customer required for on-account sales"
-            )
-        customer = db.query(Customer).filter(Customer.id == sale_data.customer_id).first()
-        if not customer:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Customer not found"
-            )
-        
+    if customer:
         # Create AR entry
         ar_entry = AREntry(
             customer_id=customer.id,
             entry_type=AREntryType.INVOICE,
             sale_id=sale.id,
-            amount=total,
-            date=datetime.now().date(),
-            balance=total,
+            amount=totals.total,
+            date=sale.business_date,
+            balance=totals.total,
             notes=f"Invoice for sale {sale.sale_number}"
         )
         db.add(ar_entry)
         
         # Update customer balance
-        customer.balance += total
+        customer.balance += totals.total
+    
+    if not commit:
+        db.flush()
+        return sale
     
     db.commit()
     db.refresh(sale)
     return sale
 
 
-def get_sale(db: Session, sale_id: int) -> Sale:
-    """Get a sale by ID"""
-    sale = db.query(Sale).filter(Sale.id == sale_id).first()
+def ingest_sales(db: Session, sales: list, cashier_id: int, chunk_size: int = None) -> list[dict]:
+    """Create a backlog of offline sales in chunked transactions
+    
+    Each sale goes through create_sale inside its own savepoint, so one bad
+    sale is reported without losing the rest of its chunk. Sales whose
+    client_id was already ingested are reported as duplicates, which makes
+    replaying a backlog safe.
+    """
+    chunk_size = chunk_size or settings.bulk_sale_chunk_size
+    
+    client_ids = [sale_data.client_id for sale_data in sales]
+    existing = dict(
+        db.query(Sale.client_id, Sale.id).filter(Sale.client_id.in_(client_ids)).all()
+    )
+    
+    results = []
+    for start in range(0, len(sales), chunk_size):
+        chunk = sales[start:start + chunk_size]
+        # Reserve numbers while this session holds no write lock
+        sale_numbers = [
+            None if sale_data.client_id in existing
+            else sequences.next_number(db, "SALE", day=business_date_for(sale_data.sold_at))
+            for sale_data in chunk
+        ]
+        for sale_data, sale_number in zip(chunk, sale_numbers):
+            result = {"client_id": sale_data.client_id}
+            if sale_data.client_id in existing:
+                result.update(status="duplicate", sale_id=existing[sale_data.client_id])
+                results.append(result)
+                continue
+            try:
+                with db.begin_nested():
+                    sale = create_sale(
+                        db,
+                        sale_data,
+                        cashier_id,
+                        client_id=sale_data.client_id,
+                        sold_at=sale_data.sold_at,
+                        sale_number=sale_number,
+                        commit=False
+                    )
+            except HTTPException as e:
+                result.update(status="error", error=e.detail)
+            except IntegrityError:
+                # Either another request replaying the same client_id committed it
+                # first, or the sale number is taken; only the first is a duplicate
+                number_owner = db.query(Sale.client_id).filter(Sale.sale_number == sale_number).first()
+                sale_id = db.query(Sale.id).filter(Sale.client_id == sale_data.client_id).scalar()
+                if number_owner is not None and number_owner.client_id != sale_data.client_id:
+                    logger.error("Offline sale %s got sale number %s, already in use", sale_data.client_id, sale_number)
+                    result.update(status="error", error=f"Sale number {sale_number} is already in use")
+                elif sale_id is None:
+                    logger.exception("Offline sale %s failed", sale_data.client_id)
+                    result.update(status="error", error="Sale could not be saved")
+                else:
+                    existing[sale_data.client_id] = sale_id
+                    result.update(status="duplicate", sale_id=sale_id)
+            except Exception:
+                logger.exception("Offline sale %s failed", sale_data.client_id)
+                result.update(status="error", error="Sale could not be saved")
+            else:
+                existing[sale_data.client_id] = sale.id
+                result.update(status="created", sale_id=sale.id, sale_number=sale.sale_number)
+            results.append(result)
+        db.commit()
+    return results
+
+
+def get_sale(db: Session, sale_id: int, for_update: bool = False) -> Sale:
+    """Get a sale by ID, optionally locking its row until commit"""
+    query = db.query(Sale).filter(Sale.id == sale_id)
+    if for_update:
+        query = query.with_for_update()
+    sale = query.first()
     if not sale:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -162,6 +252,20 @@ def get_sale(db: Session, sale_id: int) -> Sale:
     return sale
 
 
+def claim_void(db: Session, sale_id: int):
+    """Mark a sale voided unless another request already did"""
+    claimed = db.query(Sale).filter(
+        Sale.id == sale_id,
+        Sale.status != SaleStatus.VOIDED
+    ).update({Sale.status: SaleStatus.VOIDED}, synchronize_session=False)
+    if not claimed:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Sale already voided"
+        )
+
+
 def void_sale(db: Session, sale_id: int, reason: str, user_id: int) -> Sale:
     """Void a sale (manager/admin only)"""
     sale = get_sale(db, sale_id)
@@ -171,23 +275,21 @@ def void_sale(db: Session, sale_id: int, reason: str, user_id: int) -> Sale:
             detail="Sale already voided"
         )
     
+    # Claim the void in the database so two concurrent voids can't both reverse stock
+    claim_void(db, sale.id)
+    
     # Reverse inventory
-    for line in sale.sale_lines:
-        product = db.query(Product).filter(Product.id == line.product_id).first()
-        product.on_hand += line.qty
-        
-        adjustment = InventoryAdjustment(
-            item_type=ItemType.PRODUCT,
-            item_id=product.id,
-            qty_change=line.qty,
-            reason=f"Void sale {sale.sale_number}: {reason}",
-            user_id=user_id
-        )
-        db.add(adjustment)
+    apply_stock_changes(
+        db,
+        ItemType.PRODUCT,
+        sum_changes((line.product_id, line.qty) for line in sale.sale_lines),
+        f"Void sale {sale.sale_number}: {reason}",
+        user_id
+    )
     
     # Reverse AR if on-account
     if sale.tender_type == TenderType.ON_ACCOUNT and sale.customer_id:
-        customer = db.query(Customer).filter(Customer.id == sale.customer_id).first()
+        customer = db.query(Customer).filter(Customer.id == sale.customer_id).with_for_update().first()
         if customer:
             customer.balance -= sale.total
             # Reverse AR entry
@@ -201,20 +303,23 @@ def void_sale(db: Session, sale_id: int, reason: str, user_id: int) -> Sale:
     sale.status = SaleStatus.VOIDED
     sale.notes = f"{sale.notes or ''}\nVOIDED: {reason}".strip()
     db.commit()
+    receipt_cache.invalidate(sale.id)
     db.refresh(sale)
     return sale
 
 
 def create_return(db: Session, return_data: dict, user_id: int) -> Return:
     """Create a return/refund"""
-    original_sale = get_sale(db, return_data["original_sale_id"])
+    # Concurrent returns against one sale are applied one at a time
+    original_sale = get_sale(db, return_data["original_sale_id"], for_update=True)
     
     total_refund = Decimal('0')
     return_lines = []
+    original_lines = {line.id: line for line in original_sale.sale_lines}
     
     for line_data in return_data["return_lines"]:
-        original_line = db.query(SaleLine).filter(SaleLine.id == line_data["line_id"]).first()
-        if not original_line or original_line.sale_id != original_sale.id:
+        original_line = original_lines.get(line_data["line_id"])
+        if not original_line:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid sale line"
@@ -231,22 +336,19 @@ def create_return(db: Session, return_data: dict, user_id: int) -> Return:
         
         return_lines.append({
             "original_line_id": original_line.id,
+            "product_id": original_line.product_id,
             "qty_returned": line_data["qty_returned"],
             "refund_amount": refund_amount
         })
-        
-        # Update inventory
-        product = db.query(Product).filter(Product.id == original_line.product_id).first()
-        product.on_hand += line_data["qty_returned"]
-        
-        adjustment = InventoryAdjustment(
-            item_type=ItemType.PRODUCT,
-            item_id=product.id,
-            qty_change=line_data["qty_returned"],
-            reason=f"Return for sale {original_sale.sale_number}",
-            user_id=user_id
-        )
-        db.add(adjustment)
+    
+    # Update inventory
+    apply_stock_changes(
+        db,
+        ItemType.PRODUCT,
+        sum_changes((line_data["product_id"], line_data["qty_returned"]) for line_data in return_lines),
+        f"Return for sale {original_sale.sale_number}",
+        user_id
+    )
     
     # Create return
     return_obj = Return(
@@ -272,6 +374,7 @@ def create_return(db: Session, return_data: dict, user_id: int) -> Return:
     original_sale.status = SaleStatus.RETURNED
     
     db.commit()
+    receipt_cache.invalidate(original_sale.id)
     db.refresh(return_obj)
     return return_obj
 
@@ -0,0 +1,146 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+from collections import OrderedDict
+from dataclasses import dataclass
+import json
+import threading
+import time
+import weakref
+from app.models.user import User, Role
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class PrincipalRole:
+    id: int
+    name: str
+    permissions: frozenset
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What a request needs to know about its user, detached from any session"""
+    id: int
+    username: str
+    is_active: bool
+    role: PrincipalRole
+    
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.role.permissions
+
+
+def parse_permissions(raw: str | None) -> frozenset:
+    """Permission names granted by a role's JSON permissions column"""
+    if not raw:
+        return frozenset()
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return frozenset()
+    if isinstance(value, dict):
+        return frozenset(name for name, granted in value.items() if granted)
+    if isinstance(value, list):
+        return frozenset(str(name) for name in value)
+    return frozenset()
+
+
+def principal_for(user: User) -> Principal:
+    role = PrincipalRole(user.role.id, user.role.name, parse_permissions(user.role.permissions))
+    return Principal(user.id, user.username, bool(user.is_active), role)
+
+
+class PrincipalCache:
+    """Principals by user id, kept per engine for principal_cache_ttl seconds.
+    
+    Committed changes to users and roles drop the affected entries (see the
+    session hooks below), so the TTL only bounds how long a change made by
+    another worker process takes to be seen here.
+    """
+    
+    def __init__(self, capacity: int = None, ttl: int = None):
+        self.capacity = capacity or settings.principal_cache_size
+        self.ttl = ttl if ttl is not None else settings.principal_cache_ttl
+        self._lock = threading.Lock()
+        self._principals = weakref.WeakKeyDictionary()  # engine -> OrderedDict(user id -> (principal, expires at))
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, db: Session, user_id: int) -> Principal | None:
+        """The principal for a user id, loading user and role in one query on a miss"""
+        bind = db.get_bind()
+        now = time.monotonic()
+        with self._lock:
+            cached = self._principals.get(bind, {}).get(user_id)
+            if cached is not None and cached[1] > now:
+                self._principals[bind].move_to_end(user_id)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+    
+        user = db.query(User).options(joinedload(User.role)).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        principal = principal_for(user)
+        with self._lock:
+            entries = self._principals.setdefault(bind, OrderedDict())
+            entries[user_id] = (principal, now + self.ttl)
+            entries.move_to_end(user_id)
+            while len(entries) > self.capacity:
+                entries.popitem(last=False)
+        return principal
+    
+    def invalidate(self, bind, user_ids=None):
+        """Drop cached principals for some users of an engine, or all of them"""
+        with self._lock:
+            entries = self._principals.get(bind)
+            if entries is None:
+                return
+            if user_ids is None:
+                entries.clear()
+                return
+            for user_id in user_ids:
+                entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._principals = weakref.WeakKeyDictionary()
+            self.hits = self.misses = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": sum(len(entries) for entries in self._principals.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_principal_writes(session, flush_context):
+    """Remember users and roles this transaction edited or deleted"""
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            session.info.setdefault("users_changed", set()).add(obj.id)
+        elif isinstance(obj, Role):
+            # Any user may hold the role; drop everyone rather than look them up
+            session.info["roles_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals(session):
+    """Drop principals for users and roles changed by the committed transaction"""
+    user_ids = session.info.pop("users_changed", None)
+    roles_changed = session.info.pop("roles_changed", False)
+    if roles_changed:
+        principal_cache.invalidate(session.get_bind())
+    elif user_ids:
+        principal_cache.invalidate(session.get_bind(), user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_writes(session):
+    session.info.pop("users_changed", None)
+    session.info.pop("roles_changed", None)
@@ -0,0 +1,36 @@
+from sqlalchemy import literal_column
+from sqlalchemy.orm import Session, Query
+import re
+from app.models.product import Product
+from app.models.product_search import products_fts
+
+
+def match_expression(search: str) -> str:
+    """Turn typed text into an FTS5 query: every word, as a prefix"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", search))
+
+
+def search_products(db: Session, query: Query, search: str) -> Query:
+    """Narrow a Product query to a search, best matches first
+    
+    Uses the FTS5 index on SQLite, and falls back to substring matching on
+    name and SKU elsewhere.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return query.filter(
+            Product.name.ilike(f"%{search}%") |
+            Product.sku.ilike(f"%{search}%")
+        ).order_by(Product.name)
+    
+    expression = match_expression(search)
+    if not expression:
+        return query.filter(False)
+    return query.join(products_fts, products_fts.c.rowid == Product.id).filter(
+        literal_column("products_fts").op("MATCH")(expression)
+    ).order_by(products_fts.c.rank)
+
+
+def search_product_ids(db: Session, search: str, limit: int = 50) -> list[int]:
+    """Ids of active products matching a search, best matches first"""
+    query = search_products(db, db.query(Product.id).filter(Product.is_active == True), search)
+    return [product_id for product_id, in query.limit(limit).all()]
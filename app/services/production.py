@@ -1,22 +1,30 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import insert
 from fastapi import HTTPException, status
 from decimal import Decimal
 from app.models.recipe import Recipe, RecipeLine, Batch, BatchConsumption, Ingredient
 from app.models.product import Product
-from app.models.inventory import InventoryAdjustment, ItemType
+from app.models.inventory import ItemType
+from app.services.inventory import apply_stock_changes, sum_changes
 
 
 def calculate_recipe_cost(db: Session, recipe_id: int) -> Decimal:
     """Calculate total cost of a recipe"""
-    recipe_lines = db.query(RecipeLine).filter(RecipeLine.recipe_id == recipe_id).all()
-    total_cost = Decimal('0')
-    
-    for line in recipe_lines:
-        ingredient = db.query(Ingredient).filter(Ingredient.id == line.ingredient_id).first()
-        if ingredient:
-            total_cost += line.qty * ingredient.cost_per_unit
-    
-    return total_cost
+    return recipe_costs(db, [recipe_id]).get(recipe_id, Decimal('0'))
+
+
+def recipe_costs(db: Session, recipe_ids: list) -> dict:
+    """Total cost of each recipe, from one query over their lines"""
+    lines = (
+        db.query(RecipeLine.recipe_id, RecipeLine.qty, Ingredient.cost_per_unit)
+        .join(Ingredient, Ingredient.id == RecipeLine.ingredient_id)
+        .filter(RecipeLine.recipe_id.in_(recipe_ids))
+        .all()
+    )
+    costs = {recipe_id: Decimal('0') for recipe_id in recipe_ids}
+    for recipe_id, qty, cost_per_unit in lines:
+        costs[recipe_id] += qty * cost_per_unit
+    return costs
 
 
 def create_batch(
@@ -49,58 +57,53 @@ def create_batch(
     db.add(batch)
     db.flush()
     
-    # Deduct ingredients
-    recipe_lines = db.query(RecipeLine).filter(RecipeLine.recipe_id == recipe_id).all()
-    for line in recipe_lines:
-        ingredient = db.query(Ingredient).filter(Ingredient.id == line.ingredient_id).first()
-        if not ingredient:
-            continue
-        
-        qty_used = line.qty * multiplier
-        
-        # Check if enough inventory
-        if ingredient.on_hand < qty_used:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient {ingredient.name}. Need {qty_used}, have {ingredient.on_hand}"
-            )
-        
-        # Deduct ingredient
-        ingredient.on_hand -= qty_used
-        
-        # Record consumption
-        consumption = BatchConsumption(
-            batch_id=batch.id,
-            ingredient_id=ingredient.id,
-            qty_used=qty_used
+    # Deduct ingredients in one guarded statement
+    recipe_lines = db.query(RecipeLine).options(
+        joinedload(RecipeLine.ingredient)
+    ).filter(RecipeLine.recipe_id == recipe_id).all()
+    needed = sum_changes(
+        (line.ingredient_id, line.qty * multiplier)
+        for line in recipe_lines if line.ingredient
+    )
+    result = apply_stock_changes(
+        db,
+        ItemType.INGREDIENT,
+        {ingredient_id: -qty_used for ingredient_id, qty_used in needed.items()},
+        f"Batch {batch.id} - {recipe.name}",
+        user_id,
+        guard=True
+    )
+    
+    # Check if enough inventory
+    if result.rejected:
+        db.rollback()
+        ingredients = {line.ingredient_id: line.ingredient for line in recipe_lines}
+        short = ", ".join(
+            f"{ingredients[i].name} (need {needed[i]}, have {ingredients[i].on_hand})"
+            for i in result.rejected
         )
-        db.add(consumption)
-        
-        # Record adjustment
-        adjustment = InventoryAdjustment(
-            item_type=ItemType.INGREDIENT,
-            item_id=ingredient.id,
-            qty_change=-qty_used,
-            reason=f"Batch {batch.id} - {recipe.name}",
-            user_id=user_id
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient {short}"
         )
-        db.add(adjustment)
+    
+    # Record consumption
+    db.execute(insert(BatchConsumption), [
+        {"batch_id": batch.id, "ingredient_id": ingredient_id, "qty_used": qty_used}
+        for ingredient_id, qty_used in needed.items()
+    ])
     
     # Add finished goods to inventory (assuming recipe name matches product name)
     # In a real system, you'd have a recipe->product mapping
     product = db.query(Product).filter(Product.name.ilike(f"%{recipe.name}%")).first()
     if product:
-        product.on_hand += qty_produced - wastage
-        
-        adjustment = InventoryAdjustment(
-            item_type=ItemType.PRODUCT,
-            item_id=product.id,
-            qty_change=qty_produced - wastage,
-            reason=f"Batch {batch.id} - {recipe.name}",
-            user_id=user_id
+        apply_stock_changes(
+            db,
+            ItemType.PRODUCT,
+            {product.id: qty_produced - wastage},
+            f"Batch {batch.id} - {recipe.name}",
+            user_id
         )
-        db.add(adjustment)
     
     db.commit()
     db.refresh(batch)
@@ -0,0 +1,128 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import logging
+import threading
+import time
+from app.database import Base
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """Queries one request (or one tracked block) sent to the database"""
+    queries: int = 0
+    rows: int = 0  # ORM objects loaded plus rows written
+    db_time: float = 0.0  # Seconds
+    statements: Counter = field(default_factory=Counter)
+    
+    def n_plus_one(self, threshold: int = None) -> dict:
+        """Statements run at least threshold times; usually a lazy load inside a loop"""
+        threshold = threshold or settings.n_plus_one_threshold
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+    
+    def headers(self) -> dict:
+        return {
+            "X-DB-Queries": str(self.queries),
+            "X-DB-Rows": str(self.rows),
+            "X-DB-Time-Ms": f"{self.db_time * 1000:.1f}",
+            "X-DB-N-Plus-One": str(len(self.n_plus_one())),
+        }
+
+
+# Set per request; copied into the threadpool along with the rest of the context
+_current = ContextVar("query_stats", default=None)
+_route = ContextVar("query_route", default=None)
+
+
+@contextmanager
+def track_queries():
+    """Count the queries run inside the block, in this context and threads it starts"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def route_context(route: str):
+    """Attribute the queries run inside the block to a route, such as GET /reports/wastage"""
+    token = _route.set(route)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def current_route():
+    """Route set by route_context, or None outside a request"""
+    return _route.get()
+
+
+class QueryLog:
+    """Stats of the most recent requests, for the debug page"""
+    
+    def __init__(self, size: int = None):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size or settings.query_stats_history)
+    
+    def record(self, method: str, path: str, status_code: int, stats: QueryStats):
+        repeated = stats.n_plus_one()
+        for statement, count in repeated.items():
+            logger.warning("Possible N+1 on %s %s: %d x %s", method, path, count, statement)
+        with self._lock:
+            self._entries.appendleft({
+                "method": method,
+                "path": path,
+                "status_code": status_code,
+                "queries": stats.queries,
+                "rows": stats.rows,
+                "db_time_ms": round(stats.db_time * 1000, 1),
+                "n_plus_one": repeated,
+            })
+    
+    def entries(self) -> list:
+        with self._lock:
+            return list(self._entries)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+query_log = QueryLog()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.pop("query_started", None)
+    if stats is None or started is None:
+        return
+    stats.queries += 1
+    stats.db_time += time.perf_counter() - started
+    stats.statements[statement] += 1
+    # Rows read are counted as they load; a SELECT's rowcount (-1 on SQLite,
+    # the rows returned on PostgreSQL) would count them twice
+    if context is not None and (context.isinsert or context.isupdate or context.isdelete) and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+@event.listens_for(Base, "load", propagate=True)
+def _count_loaded_row(target, context):
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += 1
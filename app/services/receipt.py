@@ -0,0 +1,80 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+import threading
+from app.models.sale import Sale, Return
+from app.config import settings
+
+
+class ReceiptCache:
+    """Rendered receipts keyed by sale id, sale version and viewer.
+    
+    A completed sale only changes when it is voided or returned, so its
+    version is its status plus its number of returns. Looking the version up
+    is a single primary-key query, which is all a reprint costs on a hit.
+    The viewer is part of the key because the page header shows who is
+    logged in.
+    """
+    
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or settings.receipt_cache_size
+        self._receipts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def version(db: Session, sale_id: int) -> str:
+        """Get the current version of a sale's receipt, or None if there is no such sale"""
+        row = db.query(Sale.status, func.count(Return.id)).outerjoin(
+            Return, Return.original_sale_id == Sale.id
+        ).filter(Sale.id == sale_id).group_by(Sale.id).first()
+        if not row:
+            return None
+        sale_status, returns = row
+        return f"{sale_status.value}-{returns}"
+    
+    @staticmethod
+    def etag(sale_id: int, version: str, user_id: int) -> str:
+        """Build the ETag for a receipt as seen by a user"""
+        return f'"receipt-{sale_id}-{version}-u{user_id}"'
+    
+    def get(self, sale_id: int, version: str, user_id: int) -> str:
+        """Get a rendered receipt, or None if it isn't cached"""
+        key = (sale_id, version, user_id)
+        with self._lock:
+            body = self._receipts.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._receipts.move_to_end(key)
+            self.hits += 1
+            return body
+    
+    def put(self, sale_id: int, version: str, user_id: int, body: str):
+        """Remember a rendered receipt"""
+        with self._lock:
+            self._receipts[(sale_id, version, user_id)] = body
+            self._receipts.move_to_end((sale_id, version, user_id))
+            while len(self._receipts) > self.capacity:
+                self._receipts.popitem(last=False)
+    
+    def invalidate(self, sale_id: int):
+        """Drop every cached rendering of a sale's receipt"""
+        with self._lock:
+            for key in [key for key in self._receipts if key[0] == sale_id]:
+                del self._receipts[key]
+    
+    def clear(self):
+        """Drop all cached receipts"""
+        with self._lock:
+            self._receipts.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> dict:
+        """Cache size and hit/miss counters"""
+        return {"size": len(self._receipts), "hits": self.hits, "misses": self.misses}
+
+
+receipt_cache = ReceiptCache()
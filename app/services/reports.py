@@ -0,0 +1,32 @@
+from sqlalchemy import Date, cast, func, literal_column, type_coerce
+from sqlalchemy.orm import Session
+from datetime import date
+from app.models.sale import Sale
+
+PERIODS = ("day", "week", "month")
+
+
+def date_bucket(db: Session, column, period: str):
+    """Truncate a date column to the first day of its day, week (Monday) or month"""
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}")
+    if db.get_bind().dialect.name == "sqlite":
+        modifiers = {"day": (), "week": ("weekday 0", "-6 days"), "month": ("start of month",)}[period]
+        # SQLite returns text; read it back as a date
+        return type_coerce(func.date(column, *modifiers), Date)
+    # Inlined rather than bound, so the SELECT and GROUP BY expressions match
+    return cast(func.date_trunc(literal_column(f"'{period}'"), column), Date)
+
+
+def sales_by_period(db: Session, start: date, end: date, period: str = "day") -> list:
+    """Sale count and total per period for business dates in [start, end)"""
+    bucket = date_bucket(db, Sale.business_date, period).label("period")
+    return db.query(
+        bucket,
+        func.count(Sale.id).label("transaction_count"),
+        func.coalesce(func.sum(Sale.total), 0).label("total_sales")
+    ).filter(
+        Sale.business_date >= start,
+        Sale.business_date < end,
+        Sale.status != "voided"
+    ).group_by(bucket).order_by(bucket).all()
@@ -0,0 +1,91 @@
+from sqlalchemy import select, update, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import date
+import threading
+import weakref
+from app.models.sequence import NumberSequence
+from app.services.business_day import business_today
+from app.config import settings
+
+
+class SequenceAllocator:
+    """Hands out document numbers from blocks reserved in the number_sequences table.
+    
+    Each worker reserves a block of values with a single atomic UPDATE on its own
+    connection and serves numbers from memory until the block runs out, so concurrent
+    registers never race on the same number and the sales table is never scanned.
+    Unused values in a block are lost when the worker stops, leaving gaps.
+    """
+    
+    def __init__(self, block_size: int = None):
+        self.block_size = block_size or settings.sequence_block_size
+        self._lock = threading.Lock()
+        # engine -> {sequence name: [next value, end of block]}
+        self._blocks = weakref.WeakKeyDictionary()
+    
+    def next_value(self, bind: Engine, name: str) -> int:
+        """Return the next value of a named sequence"""
+        with self._lock:
+            blocks = self._blocks.setdefault(bind, {})
+            block = blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                start = self._reserve_block(bind, name)
+                block = blocks[name] = [start, start + self.block_size]
+            value = block[0]
+            block[0] += 1
+            return value
+    
+    def next_number(
+        self,
+        db: Session,
+        prefix: str,
+        register_id: int = None,
+        day: date = None
+    ) -> str:
+        """Return the next document number, e.g. SALE-20240101-0001
+        
+        day defaults to the current business day, the date a sale rung up
+        now gets as its business_date.
+        """
+        name = f"{prefix}-{(day or business_today()).strftime('%Y%m%d')}"
+        if register_id is not None:
+            name = f"{name}-R{register_id}"
+        return f"{name}-{self.next_value(db.get_bind(), name):04d}"
+    
+    def _reserve_block(self, bind: Engine, name: str) -> int:
+        """Atomically claim the next block of a sequence and return its first value"""
+        start = self._claim(bind, name)
+        if start is not None:
+            return start
+        try:
+            with bind.begin() as conn:
+                conn.execute(insert(NumberSequence).values(name=name, next_value=1 + self.block_size))
+            return 1
+        except IntegrityError:
+            # Another worker created the sequence first; claim from it instead
+            return self._claim(bind, name)
+    
+    def _claim(self, bind: Engine, name: str) -> int | None:
+        """Advance an existing sequence by one block, or return None if it doesn't exist"""
+        with bind.begin() as conn:
+            claimed = conn.execute(
+                update(NumberSequence)
+                .where(NumberSequence.name == name)
+                .values(next_value=NumberSequence.next_value + self.block_size)
+            ).rowcount
+            if not claimed:
+                return None
+            end = conn.execute(
+                select(NumberSequence.next_value).where(NumberSequence.name == name)
+            ).scalar_one()
+            return end - self.block_size
+    
+    def reset(self):
+        """Drop all in-memory blocks (unused values are skipped)"""
+        with self._lock:
+            self._blocks.clear()
+
+
+sequences = SequenceAllocator()
@@ -0,0 +1,139 @@
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import secrets
+import threading
+import time
+from app.models.session import UserSession
+from app.config import settings
+
+
+class MemorySessionBackend:
+    """Login sessions held in this process only.
+    
+    Sessions live in an LRU bounded by session_cache_size and expire
+    session_max_age seconds after login. Logins are lost on restart and not
+    shared between workers; use DatabaseSessionBackend for that.
+    """
+    
+    def __init__(self, capacity: int = None, max_age: int = None):
+        self.capacity = capacity or settings.session_cache_size
+        self.max_age = max_age or settings.session_max_age
+        self._sessions = OrderedDict()  # session id -> (user id, expires at, trusted until)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def new_session_id() -> str:
+        """Generate a new opaque session id"""
+        return secrets.token_urlsafe(32)
+    
+    def create(self, db: Session, user_id: int) -> str:
+        """Start a session for a user and return its id"""
+        session_id = self.new_session_id()
+        self._remember(session_id, user_id, time.time() + self.max_age)
+        return session_id
+    
+    def get(self, db: Session, session_id: str) -> int | None:
+        """Get the user id of a live session"""
+        now = time.time()
+        with self._lock:
+            cached = self._sessions.get(session_id)
+            if cached is None:
+                return None
+            user_id, expires_at, _ = cached
+            if expires_at <= now:
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return user_id
+    
+    def delete(self, db: Session, session_id: str):
+        """End a session (logout)"""
+        self._forget(session_id)
+    
+    def purge_expired(self, db: Session) -> int:
+        """Drop expired sessions"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (_, expires_at, _) in self._sessions.items() if expires_at <= now]
+            for session_id in expired:
+                del self._sessions[session_id]
+        return len(expired)
+    
+    def _remember(self, session_id: str, user_id: int, expires_at: float, trusted_until: float = None):
+        with self._lock:
+            self._sessions[session_id] = (user_id, expires_at, trusted_until or expires_at)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.capacity:
+                self._sessions.popitem(last=False)
+    
+    def _forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class DatabaseSessionBackend(MemorySessionBackend):
+    """Login sessions in the user_sessions table, cached in an LRU.
+    
+    The table is the source of truth, so sessions survive restarts and any
+    worker can serve any request. A worker trusts its cached copy for
+    session_cache_ttl seconds before reading the row again, which bounds how
+    long a logout in another worker takes to be seen there.
+    """
+    
+    def __init__(self, capacity: int = None, max_age: int = None, cache_ttl: int = None):
+        super().__init__(capacity, max_age)
+        self.cache_ttl = cache_ttl if cache_ttl is not None else settings.session_cache_ttl
+    
+    def create(self, db: Session, user_id: int) -> str:
+        """Start a session for a user and return its id"""
+        session_id = self.new_session_id()
+        expires_at = datetime.now() + timedelta(seconds=self.max_age)
+        db.add(UserSession(id=session_id, user_id=user_id, expires_at=expires_at))
+        db.commit()
+        self._remember(session_id, user_id, expires_at.timestamp(), time.time() + self.cache_ttl)
+        return session_id
+    
+    def get(self, db: Session, session_id: str) -> int | None:
+        """Get the user id of a live session"""
+        now = time.time()
+        with self._lock:
+            cached = self._sessions.get(session_id)
+            if cached is not None:
+                user_id, expires_at, trusted_until = cached
+                if now < trusted_until and now < expires_at:
+                    self._sessions.move_to_end(session_id)
+                    return user_id
+    
+        row = db.get(UserSession, session_id)
+        if row is None or row.expires_at.timestamp() <= now:
+            self._forget(session_id)
+            return None
+        self._remember(session_id, row.user_id, row.expires_at.timestamp(), now + self.cache_ttl)
+        return row.user_id
+    
+    def delete(self, db: Session, session_id: str):
+        """End a session (logout)"""
+        self._forget(session_id)
+        db.execute(delete(UserSession).where(UserSession.id == session_id))
+        db.commit()
+    
+    def purge_expired(self, db: Session) -> int:
+        """Delete expired sessions from the table and the cache"""
+        super().purge_expired(db)
+        purged = db.execute(
+            delete(UserSession).where(UserSession.expires_at <= datetime.now())
+        ).rowcount
+        db.commit()
+        return purged
+
+
+def make_session_store():
+    """Build the session backend named by settings.session_backend"""
+    if settings.session_backend == "memory":
+        return MemorySessionBackend()
+    return DatabaseSessionBackend()
+
+
+session_store = make_session_store()
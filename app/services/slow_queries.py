@@ -0,0 +1,148 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import logging
+import re
+import threading
+import time
+from app.config import settings
+from app.services.query_stats import current_route
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+# PostgreSQL plans show conditions with the statement's values filled in
+PLAN_CONDITION = re.compile(r"^(\s*(?:->\s*)?[\w ]*(?:Cond|Filter): )(.*)$")
+PLAN_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w.$])-?\d+(?:\.\d+)?(?![\w.])")
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Types of a statement's parameters, without their values"""
+    if executemany:
+        return {"rows": len(parameters), "each": parameter_shape(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def explain(cursor, dialect_name: str, statement: str, parameters) -> list:
+    """Query plan of a SELECT, one line per step, run on the statement's own connection
+    
+    The EXPLAIN runs inside a savepoint: on PostgreSQL a failed statement
+    aborts the whole transaction, and the request that issued the slow
+    query still needs it.
+    """
+    prefix = EXPLAIN_PREFIXES.get(dialect_name)
+    if not prefix or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+    plan_cursor = cursor.connection.cursor()
+    try:
+        plan_cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            plan_cursor.execute(prefix + statement, parameters)
+            rows = plan_cursor.fetchall()
+        except Exception as exc:
+            plan_cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            return [f"EXPLAIN failed: {exc}"]
+        finally:
+            plan_cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    except Exception as exc:
+        logger.warning("Could not explain a slow query: %s", exc)
+        return [f"EXPLAIN failed: {exc}"]
+    finally:
+        plan_cursor.close()
+    if dialect_name != "sqlite":
+        return [mask_plan_values(row[0]) for row in rows]
+    
+    # SQLite rows are (id, parent, notused, detail); indent each step under its parent
+    depth, lines = {}, []
+    for step_id, parent, _, detail in rows:
+        depth[step_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[step_id] + detail)
+    return lines
+
+
+def mask_plan_values(line: str) -> str:
+    """A plan line with the values in its condition replaced by ?, like the logged parameters"""
+    match = PLAN_CONDITION.match(line)
+    if not match:
+        return line
+    return match.group(1) + PLAN_LITERAL.sub("?", match.group(2))
+
+
+def is_full_scan(plan: list) -> bool:
+    """Whether a plan reads a whole table rather than an index"""
+    for line in plan:
+        step = line.strip()
+        if step.startswith("SCAN ") and " USING " not in step:
+            return True
+        if "Seq Scan" in step:
+            return True
+    return False
+
+
+class SlowQueryLog:
+    """Statements slower than settings.slow_query_ms, newest first, optionally mirrored to a JSONL file"""
+    
+    def __init__(self, size: int = None):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size or settings.slow_query_history)
+    
+    def record(self, entry: dict):
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s", entry["duration_ms"], entry["route"] or "no route", entry["statement"]
+        )
+        with self._lock:
+            self._entries.appendleft(entry)
+            if settings.slow_query_log_path:
+                path = Path(settings.slow_query_log_path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open("a") as sink:
+                    sink.write(json.dumps(entry) + "\n")
+    
+    def entries(self) -> list:
+        with self._lock:
+            return list(self._entries)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if settings.slow_query_ms > 0:
+        conn.info["slow_query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _log_if_slow(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("slow_query_started", None)
+    if started is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.slow_query_ms:
+        return
+    # The plan is only worth its extra query once the statement has proved slow
+    plan = [] if executemany else explain(cursor, conn.dialect.name, statement, parameters)
+    slow_query_log.record({
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "route": current_route(),
+        "duration_ms": round(duration_ms, 1),
+        "statement": statement,
+        "parameters": parameter_shape(parameters, executemany),
+        "plan": plan,
+        "full_scan": is_full_scan(plan),
+    })
@@ -0,0 +1,62 @@
+from sqlalchemy.orm import Session
+import logging
+import threading
+from app.database import SessionLocal
+from app.services.session import session_store
+from app.services.idempotency import purge_expired_keys
+from app.services.cart import cart_store
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def sweep(db: Session) -> dict:
+    """Purge expired sessions, idempotency keys and carts"""
+    return {
+        "sessions": session_store.purge_expired(db),
+        "idempotency_keys": purge_expired_keys(db),
+        "carts": cart_store.purge_expired(db)
+    }
+
+
+class Sweeper:
+    """Background thread that runs sweep every interval seconds.
+    
+    Every worker runs one; the purges are plain deletes, so workers
+    sweeping at the same time is harmless.
+    """
+    
+    def __init__(self, interval: int = None, session_factory=SessionLocal):
+        self.interval = interval or settings.sweep_interval
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start sweeping in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sweeper", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sweeping and wait for the thread to finish"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            db = self.session_factory()
+            try:
+                sweep(db)
+            except Exception:
+                logger.exception("Sweep failed")
+                db.rollback()
+            finally:
+                db.close()
+
+
+sweeper = Sweeper()
@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable
+from app.services.catalog import CatalogSnapshot
+
+CENT = Decimal('0.01')
+
+
+@dataclass(frozen=True)
+class TaxBreakdown:
+    subtotal: Decimal  # Sum of line totals, before the sale discount
+    discount: Decimal
+    taxable_subtotal: Decimal  # Taxable part of the discounted subtotal
+    tax_amount: Decimal
+    total: Decimal
+    buckets: dict  # Effective rate -> (discounted base, tax), taxable rates only
+    
+    @property
+    def tax_rate(self) -> Decimal | None:
+        """The one rate applied to this cart, or None if it mixes rates"""
+        if len(self.buckets) == 1:
+            return next(iter(self.buckets))
+        return None
+
+
+def rate_for(snapshot: CatalogSnapshot, product_id: int, taxable: bool = True) -> Decimal:
+    """Effective tax rate of a product from the snapshot's precomputed rates
+    
+    Products missing from the snapshot (deleted since they were carted) fall
+    back to the default rate if they were taxable.
+    """
+    product = snapshot.get(product_id)
+    if product:
+        return product.tax_rate
+    return snapshot.default_tax_rate if taxable else Decimal('0')
+
+
+def compute_tax(
+    snapshot: CatalogSnapshot,
+    lines: Iterable[tuple],
+    sale_discount: Decimal = None
+) -> TaxBreakdown:
+    """Tax a whole cart in one pass, grouped by effective rate
+    
+    lines are (product_id, line_total) or (product_id, line_total, taxable)
+    tuples. The sale discount is spread over the rate buckets in proportion
+    to their share of the subtotal, and tax is rounded once per bucket.
+    """
+    subtotal = Decimal('0')
+    bases = {}
+    for line in lines:
+        product_id, line_total = line[0], Decimal(str(line[1]))
+        taxable = line[2] if len(line) > 2 else True
+        rate = rate_for(snapshot, product_id, taxable)
+        subtotal += line_total
+        bases[rate] = bases.get(rate, Decimal('0')) + line_total
+    
+    discount = Decimal(str(sale_discount or 0))
+    buckets = {}
+    taxable_subtotal = Decimal('0')
+    tax_amount = Decimal('0')
+    for rate, base in sorted(bases.items()):
+        if not rate:
+            continue
+        if discount and subtotal:
+            base -= (discount * base / subtotal).quantize(CENT)
+        tax = (base * rate).quantize(CENT)
+        buckets[rate] = (base, tax)
+        taxable_subtotal += base
+        tax_amount += tax
+    
+    return TaxBreakdown(
+        subtotal=subtotal,
+        discount=discount,
+        taxable_subtotal=taxable_subtotal,
+        tax_amount=tax_amount,
+        total=subtotal - discount + tax_amount,
+        buckets=buckets
+    )
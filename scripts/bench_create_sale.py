@@ -0,0 +1,84 @@
+"""
+Benchmark create_sale latency against the number of cart lines
+Runs against a throwaway in-memory database, never bakery.db
+"""
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import *
+from app.models.sale import TenderType
+from app.schemas.sale import SaleCreate, SaleLineCreate
+from app.services.pos import create_sale
+
+LINE_COUNTS = [1, 5, 10, 30, 60]
+RUNS = 50
+
+
+def setup_database(product_count: int):
+    """Create a database with a cashier and product_count products"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    
+    role = Role(name="cashier", permissions='{"sales": true}')
+    db.add(role)
+    db.flush()
+    cashier = User(username="bench", email="bench@bakery.com", password_hash="x", role_id=role.id)
+    category = Category(name="Bench")
+    db.add_all([cashier, category])
+    db.flush()
+    db.add_all([
+        Product(
+            sku=f"BENCH-{i:05d}",
+            name=f"Bench product {i}",
+            category_id=category.id,
+            price=Decimal('2.50'),
+            taxable=i % 2 == 0,
+            on_hand=Decimal('1000000')
+        )
+        for i in range(product_count)
+    ])
+    db.commit()
+    return db, cashier.id
+
+
+def run_benchmark():
+    """Time create_sale for increasing cart sizes"""
+    db, cashier_id = setup_database(max(LINE_COUNTS))
+    product_ids = [p.id for p in db.query(Product).order_by(Product.id).all()]
+    
+    print(f"{'lines':>6} {'mean ms':>10} {'p95 ms':>10} {'ms/line':>10}")
+    for line_count in LINE_COUNTS:
+        sale_data = SaleCreate(
+            lines=[
+                SaleLineCreate(product_id=pid, qty=Decimal('1'), unit_price=Decimal('2.50'))
+                for pid in product_ids[:line_count]
+            ],
+            tender_type=TenderType.CASH
+        )
+        timings = []
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            create_sale(db, sale_data, cashier_id)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        mean = sum(timings) / len(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{line_count:>6} {mean:>10.2f} {p95:>10.2f} {mean / line_count:>10.3f}")
+    
+    db.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,91 @@
+"""
+Benchmark customer search: trigram index against LIKE scans
+Runs against a throwaway in-memory database, never bakery.db
+"""
+import sys
+import time
+import random
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import *
+from app.services.customer_search import CustomerSearch
+
+CUSTOMER_COUNT = 100000
+RUNS = 50
+FIRST_NAMES = ["james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda", "david",
+               "susan", "maria", "ahmed", "saeed", "fatima", "chen", "olga", "ivan", "priya", "kofi"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "garcia", "miller", "davis", "martinez", "wilson",
+              "taylor", "thomas", "moore", "badree", "khan", "singh", "nguyen", "ramdial", "mohammed"]
+BUSINESSES = ["bakery", "cafe", "deli", "hotel", "market", "bistro", "catering", "grocers", "kitchen"]
+SEARCHES = ["smith", "jon smth", "badree baker", "5550142", "jennifer@", "sunrise"]
+
+
+def setup_database(customer_count: int):
+    """Create a database with customer_count customers, a third of them businesses"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    
+    random.seed(1)
+    rows = []
+    for i in range(customer_count):
+        first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+        if i % 3:
+            name = f"{first.title()} {last.title()}"
+        else:
+            name = f"{last.title()} {random.choice(BUSINESSES).title()} {i}"
+        rows.append({
+            "name": name,
+            "email": f"{first}{i}@example.com",
+            "phone": f"868-{random.randint(200, 999)}-{random.randint(0, 9999):04d}"
+        })
+    db.execute(insert(Customer), rows)
+    db.commit()
+    return db
+
+
+def mean_ms(search_function, search: str) -> float:
+    """Mean milliseconds per search"""
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        search_function(search)
+    return (time.perf_counter() - start) * 1000 / RUNS
+
+
+def run_benchmark():
+    """Time each search by LIKE, by a cold index and from the result cache"""
+    db = setup_database(CUSTOMER_COUNT)
+    index = CustomerSearch()
+    
+    start = time.perf_counter()
+    index.search(db, "warm up")
+    print(f"index build for {CUSTOMER_COUNT} customers: {(time.perf_counter() - start) * 1000:.0f} ms")
+    
+    def like_search(search):
+        return db.query(Customer).filter(Customer.name.ilike(f"%{search}%")).limit(10).all()
+    
+    def cold_search(search):
+        index._index(db).results.clear()
+        return index.search(db, search)
+    
+    print(f"{'search':>14} {'LIKE ms':>10} {'index ms':>10} {'cached ms':>10}")
+    for search in SEARCHES:
+        print(
+            f"{search:>14} {mean_ms(like_search, search):>10.2f} "
+            f"{mean_ms(cold_search, search):>10.2f} {mean_ms(lambda s: index.search(db, s), search):>10.3f}"
+        )
+    
+    db.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
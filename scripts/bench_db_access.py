@@ -0,0 +1,135 @@
+"""
+Benchmark checkout latency while a 90-day top products report runs
+Runs against a throwaway SQLite file, never bakery.db
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import statistics
+import tempfile
+from pathlib import Path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+SALE_COUNT = 60000
+REPORT_RUNS = 10
+TICK = 0.01  # Seconds between checkout requests
+
+
+def setup_database():
+    """Create a cashier, a catalog and SALE_COUNT sales spread over 90 days"""
+    from decimal import Decimal
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from app.database import Base, SessionLocal, engine
+    from app.models import Role, User, Category, Product, Sale, SaleLine
+    from app.models.sale import TenderType
+    from app.services.session import session_store
+    
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    role = Role(name="cashier", permissions='{"sales": true}')
+    category = Category(name="Bench")
+    db.add_all([role, category])
+    db.flush()
+    cashier = User(username="bench", email="bench@bakery.com", password_hash="x", role_id=role.id)
+    db.add(cashier)
+    db.flush()
+    db.add_all([
+        Product(sku=f"BENCH-{i:04d}", name=f"Bench product {i}", category_id=category.id,
+                price=Decimal('2.50'), taxable=True, on_hand=Decimal('1000000'))
+        for i in range(200)
+    ])
+    db.flush()
+    
+    random.seed(1)
+    now = datetime.now()
+    sold_at = sorted(now - timedelta(minutes=random.randrange(90 * 24 * 60)) for _ in range(SALE_COUNT))
+    db.execute(insert(Sale), [
+        {"sale_number": f"S-{i:06d}", "datetime": sold, "business_date": sold.date(),
+         "cashier_id": cashier.id, "subtotal": Decimal('5.00'), "tax_amount": Decimal('0.50'),
+         "total": Decimal('5.50'), "tender_type": TenderType.CASH}
+        for i, sold in enumerate(sold_at)
+    ])
+    db.execute(insert(SaleLine), [
+        {"sale_id": i + 1, "product_id": random.randint(1, 200), "qty": Decimal('2'),
+         "unit_price": Decimal('2.50'), "line_total": Decimal('5.00')}
+        for i in range(SALE_COUNT)
+    ])
+    db.commit()
+    session_id = session_store.create(db, cashier.id)
+    db.close()
+    return session_id
+
+
+async def get(app, path: str, query: str, session_id: str) -> float:
+    """Send one GET through the ASGI app and return its latency in ms"""
+    from app.config import settings
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        "headers": [(b"cookie", f"{settings.session_cookie_name}={session_id}".encode())],
+    }
+    
+    received = []
+    
+    async def receive():
+        if received:
+            # The client stays connected; answering again would spin the disconnect listener
+            await asyncio.Event().wait()
+        received.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    statuses = []
+    
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+    
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    assert statuses == [200], (path, statuses)
+    return (time.perf_counter() - started) * 1000
+
+
+async def measure(app, session_id: str):
+    """Run 90-day reports back to back while a register keeps looking up SKUs"""
+    done = asyncio.Event()
+    
+    async def reports():
+        timings = [await get(app, "/reports/top-products", "days=90", session_id) for _ in range(REPORT_RUNS)]
+        done.set()
+        return timings
+    
+    async def checkout():
+        latencies = []
+        while not done.is_set():
+            latencies.append(await get(app, "/pos/sku-lookup", "q=BENCH-01", session_id))
+            await asyncio.sleep(TICK)
+        return latencies
+    
+    await get(app, "/pos/sku-lookup", "q=BENCH-01", session_id)
+    return await asyncio.gather(reports(), checkout())
+
+
+def main():
+    os.chdir(ROOT)
+    session_id = setup_database()
+    from app.main import app
+    report_ms, checkout_ms = asyncio.run(measure(app, session_id))
+    checkout_ms.sort()
+    p99 = checkout_ms[min(len(checkout_ms) - 1, int(len(checkout_ms) * 0.99))]
+    print(f"{SALE_COUNT} sales over 90 days, {REPORT_RUNS} top products reports\n")
+    print(f"{'report ms':>10} {'checkouts':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    print(f"{statistics.mean(report_ms):>10.0f} {len(checkout_ms):>10} "
+          f"{statistics.median(checkout_ms):>10.1f} {p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        # Set before app.config is imported, so settings pick it up
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+        main()
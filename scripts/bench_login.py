@@ -0,0 +1,80 @@
+"""
+Benchmark checkout latency during a burst of logins
+Runs against a throwaway in-memory database, never bakery.db
+"""
+import sys
+import time
+import asyncio
+import statistics
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import *
+from app.services.auth import authenticate_user, authenticate_user_async, get_password_hash
+
+CASHIER_COUNT = 8
+TICK = 0.005  # Seconds between simulated checkout requests
+
+
+def setup_database():
+    """Create a database with CASHIER_COUNT cashiers sharing a password"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    role = Role(name="cashier", permissions='{"sales": true}')
+    db.add(role)
+    db.flush()
+    password_hash = get_password_hash("demo123")
+    for i in range(CASHIER_COUNT):
+        db.add(User(username=f"cashier{i}", email=f"cashier{i}@bakery.com",
+                    password_hash=password_hash, role_id=role.id, is_active=True))
+    db.commit()
+    return db
+
+
+async def checkout_latency(stop: asyncio.Event) -> list:
+    """Time a stand-in checkout request every TICK seconds until stopped"""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        latencies.append((time.perf_counter() - started - TICK) * 1000)
+    return latencies
+
+
+async def login_burst(db, login) -> tuple:
+    """Log every cashier in at once while checkout keeps running"""
+    stop = asyncio.Event()
+    checkout = asyncio.create_task(checkout_latency(stop))
+    await asyncio.sleep(TICK * 4)
+    started = time.perf_counter()
+    users = await asyncio.gather(*(login(db, f"cashier{i}", "demo123") for i in range(CASHIER_COUNT)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    latencies = await checkout
+    assert all(users)
+    return elapsed, latencies
+
+
+async def blocking_login(db, username, password):
+    return authenticate_user(db, username, password)
+
+
+def report(label: str, elapsed: float, latencies: list):
+    print(f"{label:<22} {CASHIER_COUNT / elapsed:>7.1f} logins/s   checkout lag "
+          f"p50 {statistics.median(latencies):>7.2f} ms   max {max(latencies):>7.2f} ms")
+
+
+if __name__ == "__main__":
+    db = setup_database()
+    print(f"Login burst of {CASHIER_COUNT} cashiers, checkout polled every {TICK * 1000:.0f} ms\n")
+    report("bcrypt on event loop", *asyncio.run(login_burst(db, blocking_login)))
+    report("bcrypt on thread pool", *asyncio.run(login_burst(db, authenticate_user_async)))
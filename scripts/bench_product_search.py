@@ -0,0 +1,87 @@
+"""
+Benchmark product search: FTS5 index against LIKE scans
+Runs against a throwaway in-memory database, never bakery.db
+"""
+import sys
+import time
+import random
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from decimal import Decimal
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import *
+from app.services.product_search import search_products
+
+PRODUCT_COUNT = 50000
+RUNS = 200
+WORDS = ["sourdough", "rye", "bagel", "croissant", "baguette", "brioche", "muffin", "scone",
+         "danish", "focaccia", "ciabatta", "pretzel", "cinnamon", "walnut", "raisin", "olive"]
+SEARCHES = ["s", "sou", "sourdough", "cin rai", "BENCH-0421", "bri"]
+
+
+def setup_database(product_count: int):
+    """Create a database with product_count products across a few categories"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    
+    categories = [Category(name=name) for name in ["Bread", "Pastry", "Cakes", "Savory"]]
+    db.add_all(categories)
+    db.flush()
+    random.seed(1)
+    db.execute(insert(Product), [
+        {
+            "sku": f"BENCH-{i:05d}",
+            "name": f"{random.choice(WORDS).title()} {random.choice(WORDS)} {i}",
+            "category_id": categories[i % len(categories)].id,
+            "price": Decimal('2.50')
+        }
+        for i in range(product_count)
+    ])
+    db.commit()
+    return db
+
+
+def like_search(db, search: str):
+    """The substring search list_products used before the index"""
+    return db.query(Product.id).filter(
+        Product.is_active == True,
+        Product.name.ilike(f"%{search}%") | Product.sku.ilike(f"%{search}%")
+    ).order_by(Product.name).limit(50).all()
+
+
+def fts_search(db, search: str):
+    """Ranked search through the FTS5 index"""
+    return search_products(db, db.query(Product.id).filter(Product.is_active == True), search).limit(50).all()
+
+
+def mean_ms(search_function, db, search: str) -> float:
+    """Mean milliseconds per search"""
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        search_function(db, search)
+    return (time.perf_counter() - start) * 1000 / RUNS
+
+
+def run_benchmark():
+    """Time each search both ways"""
+    db = setup_database(PRODUCT_COUNT)
+    
+    print(f"{PRODUCT_COUNT} products, first 50 results")
+    print(f"{'search':>12} {'LIKE ms':>10} {'FTS5 ms':>10}")
+    for search in SEARCHES:
+        print(f"{search:>12} {mean_ms(like_search, db, search):>10.2f} {mean_ms(fts_search, db, search):>10.2f}")
+    
+    db.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
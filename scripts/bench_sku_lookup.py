@@ -0,0 +1,85 @@
+"""
+Benchmark SKU scans and prefix lookups against the catalog snapshot
+Runs against a throwaway in-memory database, never bakery.db
+"""
+import sys
+import time
+import random
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from decimal import Decimal
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import *
+from app.services.catalog import Catalog
+import app.routers.settings  # Imported by build_snapshot; load it outside the timing
+
+PRODUCT_COUNT = 20000
+RUNS = 10000
+
+
+def setup_database(product_count: int):
+    """Create a database with product_count products"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    
+    category = Category(name="Bench")
+    db.add(category)
+    db.flush()
+    db.execute(insert(Product), [
+        {
+            "sku": f"{i % 97:02d}{i:06d}",
+            "name": f"Bench product {i}",
+            "category_id": category.id,
+            "price": Decimal('2.50'),
+            "on_hand": Decimal('100')
+        }
+        for i in range(product_count)
+    ])
+    db.commit()
+    return db
+
+
+def time_lookups(label: str, lookup, codes: list):
+    """Print mean and p99 microseconds per lookup"""
+    timings = []
+    for code in codes:
+        start = time.perf_counter()
+        lookup(code)
+        timings.append((time.perf_counter() - start) * 1000000)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{label:>18} {mean:>10.2f} {p99:>10.2f}")
+
+
+def run_benchmark():
+    """Time snapshot build, exact scans and prefix matches"""
+    db = setup_database(PRODUCT_COUNT)
+    
+    start = time.perf_counter()
+    snapshot = Catalog().get_snapshot(db)
+    print(f"snapshot build for {PRODUCT_COUNT} products: {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    skus = list(snapshot.by_sku)
+    random.seed(1)
+    codes = [random.choice(skus) for _ in range(RUNS)]
+    
+    print(f"{'lookup':>18} {'mean us':>10} {'p99 us':>10}")
+    time_lookups("exact scan", snapshot.find_sku, codes)
+    time_lookups("6-char prefix", snapshot.match_sku_prefix, [code[:6] for code in codes])
+    time_lookups("2-char prefix", snapshot.match_sku_prefix, [code[:2] for code in codes])
+    
+    db.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
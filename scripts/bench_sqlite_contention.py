@@ -0,0 +1,142 @@
+"""
+Benchmark registers checking out while reports run, per SQLite profile
+Runs against a throwaway SQLite file, never bakery.db
+"""
+import sys
+import time
+import random
+import tempfile
+import threading
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from decimal import Decimal
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, make_engine
+from app.models import *
+from app.models.sale import TenderType
+from app.schemas.sale import SaleCreate, SaleLineCreate
+from app.services.pos import create_sale
+
+REGISTERS = 8
+REPORT_READERS = 2
+SALE_COUNT = 30000
+DURATION = 5  # Seconds per profile
+
+
+def default_engine(url: str):
+    """The engine as it was created before the SQLite profile existed"""
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def setup_database(engine):
+    """Create a cashier, a catalog and SALE_COUNT sales over the last 90 days"""
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    role = Role(name="cashier", permissions='{"sales": true}')
+    category = Category(name="Bench")
+    db.add_all([role, category])
+    db.flush()
+    cashier = User(username="bench", email="bench@bakery.com", password_hash="x", role_id=role.id)
+    db.add(cashier)
+    db.add_all([
+        Product(sku=f"BENCH-{i:04d}", name=f"Bench product {i}", category_id=category.id,
+                price=Decimal('2.50'), taxable=True, on_hand=Decimal('1000000'))
+        for i in range(200)
+    ])
+    db.flush()
+    
+    random.seed(1)
+    now = datetime.now()
+    sold_at = sorted(now - timedelta(minutes=random.randrange(90 * 24 * 60)) for _ in range(SALE_COUNT))
+    db.execute(insert(Sale), [
+        {"sale_number": f"S-{i:06d}", "datetime": sold, "business_date": sold.date(),
+         "cashier_id": cashier.id, "subtotal": Decimal('5.00'), "tax_amount": Decimal('0.50'),
+         "total": Decimal('5.50'), "tender_type": TenderType.CASH}
+        for i, sold in enumerate(sold_at)
+    ])
+    db.execute(insert(SaleLine), [
+        {"sale_id": i + 1, "product_id": random.randint(1, 200), "qty": Decimal('2'),
+         "unit_price": Decimal('2.50'), "line_total": Decimal('5.00')}
+        for i in range(SALE_COUNT)
+    ])
+    db.commit()
+    cashier_id = cashier.id
+    db.close()
+    return cashier_id
+
+
+def register(Session, cashier_id: int, stop: threading.Event, timings: list, errors: list):
+    """Ring up three-line sales until stopped"""
+    rng = random.Random()
+    while not stop.is_set():
+        sale_data = SaleCreate(
+            lines=[
+                SaleLineCreate(product_id=rng.randint(1, 200), qty=Decimal('1'), unit_price=Decimal('2.50'))
+                for _ in range(3)
+            ],
+            tender_type=TenderType.CASH
+        )
+        db = Session()
+        started = time.perf_counter()
+        try:
+            create_sale(db, sale_data, cashier_id)
+            timings.append((time.perf_counter() - started) * 1000)
+        except OperationalError:
+            db.rollback()
+            errors.append(1)
+        finally:
+            db.close()
+
+
+def report_reader(Session, stop: threading.Event, runs: list):
+    """Run the 90-day top products query until stopped"""
+    start_date = datetime.now() - timedelta(days=90)
+    while not stop.is_set():
+        db = Session()
+        db.query(
+            SaleLine.product_id, func.sum(SaleLine.qty), func.sum(SaleLine.line_total)
+        ).join(Sale, Sale.id == SaleLine.sale_id).filter(
+            Sale.datetime >= start_date, Sale.status != "voided"
+        ).group_by(SaleLine.product_id).all()
+        db.close()
+        runs.append(1)
+
+
+def run_profile(label: str, make):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make(f"sqlite:///{tmp}/bench.db")
+        cashier_id = setup_database(engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        stop = threading.Event()
+        timings, errors, reports = [], [], []
+        threads = [
+            threading.Thread(target=register, args=(Session, cashier_id, stop, timings, errors))
+            for _ in range(REGISTERS)
+        ] + [
+            threading.Thread(target=report_reader, args=(Session, stop, reports))
+            for _ in range(REPORT_READERS)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(DURATION)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+    
+    timings.sort()
+    p50 = timings[len(timings) // 2] if timings else 0
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] if timings else 0
+    print(f"{label:<10} {len(timings) / DURATION:>10.1f} {p50:>10.1f} {p99:>10.1f} "
+          f"{len(errors):>8} {len(reports):>8}")
+
+
+if __name__ == "__main__":
+    print(f"{REGISTERS} registers and {REPORT_READERS} report readers for {DURATION}s, {SALE_COUNT} sales\n")
+    print(f"{'profile':<10} {'sales/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'locked':>8} {'reports':>8}")
+    run_profile("default", default_engine)
+    run_profile("tuned", make_engine)
@@ -0,0 +1,88 @@
+from decimal import Decimal
+from datetime import datetime
+from app.models.sale import Sale, TenderType
+from app.schemas.sale import OfflineSaleCreate, SaleLineCreate
+from app.services import pos as pos_service
+from app.services.pos import create_sale, ingest_sales
+from app.services.sequence import sequences
+
+
+def _offline_sale(client_id, product_id, qty='1', tender_type=TenderType.CASH):
+    return OfflineSaleCreate(
+        client_id=client_id,
+        sold_at=datetime(2024, 3, 1, 9, 30),
+        lines=[SaleLineCreate(product_id=product_id, qty=Decimal(qty), unit_price=Decimal('1.50'))],
+        tender_type=tender_type
+    )
+
+
+def test_ingest_reports_each_sale(db, cashier, products):
+    """Test created, error and duplicate results across chunks"""
+    bagel = products[2]
+    sales = [_offline_sale(f"till1-{i}", bagel.id) for i in range(5)]
+    sales.insert(2, _offline_sale("till1-bad", 9999))
+    sales.append(_offline_sale("till1-acct", bagel.id, tender_type=TenderType.ON_ACCOUNT))
+    
+    results = ingest_sales(db, sales, cashier.id, chunk_size=3)
+    assert [r["status"] for r in results] == ["created"] * 2 + ["error"] + ["created"] * 3 + ["error"]
+    assert db.query(Sale).count() == 5
+    assert results[0]["sale_number"].startswith("SALE-20240301-")
+    
+    db.refresh(bagel)
+    assert bagel.on_hand == Decimal('45')
+
+
+def test_replay_is_idempotent(db, cashier, products):
+    """Test replaying a backlog creates nothing new"""
+    sales = [_offline_sale(f"till2-{i}", products[0].id) for i in range(3)]
+    first = ingest_sales(db, sales, cashier.id)
+    second = ingest_sales(db, sales, cashier.id)
+    
+    assert {r["status"] for r in second} == {"duplicate"}
+    assert [r["sale_id"] for r in second] == [r["sale_id"] for r in first]
+    assert db.query(Sale).count() == 3
+
+
+def test_concurrent_replay_is_reported_as_duplicate(db, cashier, products, monkeypatch):
+    """Test a sale another request saved after the duplicate check doesn't sink the batch"""
+    sales = [_offline_sale(f"till3-{i}", products[0].id) for i in range(3)]
+    next_number = sequences.next_number
+    raced = []
+    
+    def next_number_after_race(db_, *args, **kwargs):
+        if not raced:
+            # The other request's copy of till3-1 lands between the check and the insert
+            raced.append(create_sale(db, sales[1], cashier.id, client_id="till3-1", sale_number="OTHER-1", commit=False))
+        return next_number(db_, *args, **kwargs)
+    
+    monkeypatch.setattr(sequences, "next_number", next_number_after_race)
+    results = ingest_sales(db, sales, cashier.id)
+    assert [r["status"] for r in results] == ["created", "duplicate", "created"]
+    assert results[1]["sale_id"] == raced[0].id
+    assert db.query(Sale).count() == 3
+
+
+def test_unexpected_errors_are_reported_per_sale(db, cashier, products, monkeypatch):
+    """Test an exception in one sale is reported and the rest are still saved"""
+    real_create_sale = pos_service.create_sale
+    
+    def flaky_create_sale(db_, sale_data, *args, **kwargs):
+        if sale_data.client_id == "till4-1":
+            raise RuntimeError("printer on fire")
+        return real_create_sale(db_, sale_data, *args, **kwargs)
+    
+    monkeypatch.setattr(pos_service, "create_sale", flaky_create_sale)
+    results = ingest_sales(db, [_offline_sale(f"till4-{i}", products[0].id) for i in range(3)], cashier.id)
+    assert [r["status"] for r in results] == ["created", "error", "created"]
+    assert "printer" not in results[1]["error"]
+    assert db.query(Sale).count() == 2
+
+
+def test_taken_sale_number_is_an_error_not_a_duplicate(db, cashier, products, monkeypatch):
+    """Test a sale whose number is already used is reported as an error"""
+    taken = create_sale(db, _offline_sale("till5-0", products[0].id), cashier.id, client_id="till5-0")
+    monkeypatch.setattr(sequences, "next_number", lambda *args, **kwargs: taken.sale_number)
+    [result] = ingest_sales(db, [_offline_sale("till5-1", products[0].id)], cashier.id)
+    assert result["status"] == "error"
+    assert taken.sale_number in result["error"]
+    assert db.query(Sale).count() == 1
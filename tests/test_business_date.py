@@ -0,0 +1,57 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from starlette.requests import Request
+from app.config import settings
+from app.models.sale import TenderType
+from app.routers import transactions
+from app.schemas.sale import SaleCreate, SaleLineCreate
+from app.services.business_day import business_date_for, business_date_for_utc
+from app.services.pos import create_sale
+
+
+def test_business_date_uses_store_time_and_day_start(monkeypatch):
+    """Test late-night sales stay on the day they were rung up in store time"""
+    monkeypatch.setattr(settings, "store_timezone", "America/Port_of_Spain")
+    monkeypatch.setattr(settings, "business_day_start_hour", 4)
+    assert business_date_for(datetime(2026, 3, 1, 2, 30, tzinfo=timezone.utc)) == date(2026, 2, 28)
+    assert business_date_for(datetime(2026, 3, 1, 3, 59)) == date(2026, 2, 28)
+    assert business_date_for(datetime(2026, 3, 1, 4, 0)) == date(2026, 3, 1)
+
+
+def test_history_filters_on_the_stored_business_date(db, cashier, products):
+    """Test a sale is stamped at sale time and found by its business date range"""
+    sale = create_sale(db, SaleCreate(
+        lines=[SaleLineCreate(product_id=products[0].id, qty=Decimal('1'), unit_price=Decimal('6.00'))],
+        tender_type=TenderType.CASH
+    ), cashier.id, sold_at=datetime(2026, 3, 1, 9, 0))
+    assert sale.business_date == date(2026, 3, 1)
+    
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    found = lambda start, end: transactions.transaction_history(
+        request, start, end, {"user": cashier}, db
+    ).context["transactions"]
+    assert found("2026-03-01", "2026-03-01") == [sale]
+    assert found("2026-03-02", "2026-03-31") == []
+
+
+def test_sale_number_is_dated_like_the_business_date(db, cashier, products, monkeypatch):
+    """Test a sale rung up before the day starts is numbered for the previous day"""
+    monkeypatch.setattr(settings, "business_day_start_hour", 4)
+    sale = create_sale(db, SaleCreate(
+        lines=[SaleLineCreate(product_id=products[0].id, qty=Decimal('1'), unit_price=Decimal('6.00'))],
+        tender_type=TenderType.CASH
+    ), cashier.id, sold_at=datetime(2026, 3, 2, 1, 30))
+    assert sale.business_date == date(2026, 3, 1)
+    assert sale.sale_number.startswith("SALE-20260301-")
+
+
+def test_offline_sale_time_is_stored_in_utc(db, cashier, products, monkeypatch):
+    """Test a till's wall-clock time is stored on the same UTC basis as the server default"""
+    monkeypatch.setattr(settings, "store_timezone", "America/Port_of_Spain")
+    sale = create_sale(db, SaleCreate(
+        lines=[SaleLineCreate(product_id=products[0].id, qty=Decimal('1'), unit_price=Decimal('6.00'))],
+        tender_type=TenderType.CASH
+    ), cashier.id, sold_at=datetime(2026, 3, 1, 21, 30))
+    assert sale.business_date == date(2026, 3, 1)
+    assert sale.datetime.replace(tzinfo=None) == datetime(2026, 3, 2, 1, 30)
+    assert business_date_for_utc(sale.datetime) == date(2026, 3, 1)
@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.routers import pos as pos_router
+from app.routers.pos import render_cart_partial, render_cart_update, render_cart_changes, render_cart_line
+from app.services.cart import CartStore
+
+
+def test_update_sends_only_changed_line(db, products):
+    """Test a quantity change re-sends one line plus the totals"""
+    store = CartStore()
+    for product in products:
+        store.add_item(db, "c1", product)
+    store.set_qty(db, "c1", products[2].id, 4)
+    
+    html = render_cart_update(store.items(db, "c1"), db, products[2].id, "updated").body.decode()
+    assert html.count('class="cart-item-modern"') == 1
+    assert f'id="cart-line-{products[2].id}" hx-swap-oob="true"' in html
+    assert 'id="cart-totals" hx-swap-oob="true"' in html
+    assert "$18.20" in html  # 6.00 + 5.00 + 4 x 1.50 = 17.00 plus 10% on the 12.00 taxable
+
+
+def test_first_and_last_line_swap_the_whole_list(db, products):
+    """Test the empty placeholder is replaced and restored"""
+    store = CartStore()
+    store.add_item(db, "c1", products[0])
+    html = render_cart_update(store.items(db, "c1"), db, products[0].id, "added").body.decode()
+    assert 'id="cart-items" hx-swap-oob="true"' in html
+    
+    store.remove_item(db, "c1", products[0].id)
+    html = render_cart_update(store.items(db, "c1"), db, products[0].id, "removed").body.decode()
+    assert "Your cart is empty" in html
+    assert "0 items" in html
+
+
+def test_full_render_lists_every_line(db, products):
+    """Test the full partial renders all lines without out-of-band wrappers"""
+    store = CartStore()
+    for product in products:
+        store.add_item(db, "c1", product, 2)
+    
+    html = render_cart_partial(store.items(db, "c1"), db).body.decode()
+    assert html.count('class="cart-item-modern"') == 3
+    assert '<div id="cart-items" style=' in html
+    assert "6 items" in html
+
+
+def test_batch_renders_every_changed_line_once(db, products):
+    """Test a batch sends each changed line plus one set of totals"""
+    store = CartStore()
+    for product in products:
+        store.add_item(db, "c1", product)
+    
+    html = render_cart_changes(store.items(db, "c1"), db, {
+        products[0].id: "removed", products[1].id: "updated"
+    }).body.decode()
+    assert f'id="cart-line-{products[0].id}" hx-swap-oob="delete"' in html
+    assert html.count('class="cart-item-modern"') == 1
+    assert html.count('id="cart-totals"') == 1
+
+
+def test_line_cache_is_safe_across_threads(monkeypatch):
+    """Test rendering from many threads while the cache evicts never fails"""
+    monkeypatch.setattr(pos_router, "LINE_CACHE_SIZE", 8)
+    
+    def render(worker):
+        for n in range(300):
+            item = {"product_id": n % 20, "product_name": "Roll", "product_sku": f"R-{n % 20}",
+                    "qty": worker, "unit_price": 1.5, "line_discount": 0}
+            render_cart_line(item)
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(render, range(1, 9)))
+    assert len(pos_router._line_cache) <= 8
@@ -0,0 +1,129 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import update
+from starlette.requests import Request
+from app.routers.pos import batch_cart
+from app.models.cart import Cart
+from app.schemas.cart import CartOperation
+from app.services.cart import CartStore, cart_store
+from app.services.catalog import catalog
+from app.services.sweeper import sweep
+
+
+def test_cart_line_mutations(db, products):
+    """Test add merges lines and set/remove mutate by product id"""
+    store = CartStore(capacity=10)
+    sourdough, rye, bagel = products
+    
+    store.add_item(db, "c1", sourdough)
+    store.add_item(db, "c1", bagel, 2)
+    store.add_item(db, "c1", sourdough)
+    assert [(i["product_id"], i["qty"]) for i in store.items(db, "c1")] == [(sourdough.id, 2), (bagel.id, 2)]
+    
+    store.set_qty(db, "c1", bagel.id, 6)
+    store.set_discount(db, "c1", sourdough.id, 1.5)
+    store.remove_item(db, "c1", rye.id)  # not in cart, no-op
+    items = store.items(db, "c1")
+    assert items[1]["qty"] == 6
+    assert items[0]["line_discount"] == 1.5
+    
+    store.set_qty(db, "c1", sourdough.id, 0)
+    assert [i["product_id"] for i in store.items(db, "c1")] == [bagel.id]
+
+
+def test_cart_survives_restart_and_eviction(db, products):
+    """Test carts reload from the carts table"""
+    store = CartStore(capacity=1)
+    store.add_item(db, "c1", products[0], 3)
+    store.add_item(db, "c2", products[1])  # evicts c1 from memory
+    
+    assert store.items(db, "c1")[0]["qty"] == 3
+    assert CartStore().items(db, "c2")[0]["product_id"] == products[1].id
+    
+    store.clear(db, "c1")
+    assert CartStore().items(db, "c1") == []
+
+
+def test_batch_operations_apply_all_or_nothing(db, products):
+    """Test a batch reports net changes and a bad operation leaves the cart alone"""
+    store = CartStore(capacity=10)
+    sourdough, rye, bagel = products
+    store.add_item(db, "c1", sourdough)
+    snapshot = catalog.get_snapshot(db)
+    
+    changes = store.apply(db, "c1", [
+        CartOperation(op="add", sku="br-003", qty=6),
+        CartOperation(op="add", product_id=rye.id, qty=2),
+        CartOperation(op="discount", product_id=sourdough.id, discount=0.5),
+        CartOperation(op="add", product_id=rye.id, qty=-2)
+    ], snapshot)
+    assert changes == {sourdough.id: "updated", bagel.id: "added"}
+    assert [(i["product_id"], i["qty"]) for i in store.items(db, "c1")] == [(sourdough.id, 1), (bagel.id, 6)]
+    
+    with pytest.raises(HTTPException):
+        store.apply(db, "c1", [
+            CartOperation(op="remove", product_id=bagel.id),
+            CartOperation(op="set_qty", product_id=rye.id, qty=3)
+        ], snapshot)
+    assert len(CartStore().items(db, "c1")) == 2
+
+
+def test_workers_never_overwrite_each_others_lines(db, products):
+    """Test a worker with an old cached cart replays its change on the saved cart"""
+    sourdough, rye, bagel = products
+    worker_a, worker_b = CartStore(cache_ttl=60), CartStore(cache_ttl=60)
+    worker_a.add_item(db, "c1", sourdough)
+    assert len(worker_b.items(db, "c1")) == 1
+    
+    worker_a.add_item(db, "c1", rye)
+    worker_b.add_item(db, "c1", bagel)  # Its cached copy doesn't have rye yet
+    assert [i["product_id"] for i in CartStore().items(db, "c1")] == [sourdough.id, rye.id, bagel.id]
+    
+    # Both see "no cart yet"; the second insert loses and is replayed as an update
+    worker_a.items(db, "c2"), worker_b.items(db, "c2")
+    worker_a.add_item(db, "c2", rye)
+    worker_b.add_item(db, "c2", bagel)
+    assert len(CartStore().items(db, "c2")) == 2
+
+
+def test_sweeper_purges_abandoned_carts(db, products):
+    """Test carts untouched for cart_max_age are deleted and forgotten"""
+    store = CartStore()
+    store.add_item(db, "old", products[0])
+    store.add_item(db, "new", products[1])
+    db.execute(update(Cart).where(Cart.id == "old").values(updated_at=datetime.now() - timedelta(days=2)))
+    db.commit()
+    
+    assert sweep(db)["carts"] == 1
+    assert cart_store.purge_expired(db) == 0
+    assert CartStore().items(db, "old") == []
+    assert len(CartStore().items(db, "new")) == 1
+
+
+def test_removing_a_missing_line_keeps_the_batch(db, products):
+    """Test a double-tapped remove doesn't throw away the rest of the batch"""
+    store = CartStore(capacity=10)
+    sourdough, rye, bagel = products
+    store.add_item(db, "c1", sourdough)
+    
+    changes = store.apply(db, "c1", [
+        CartOperation(op="remove", product_id=sourdough.id),
+        CartOperation(op="remove", product_id=sourdough.id),
+        CartOperation(op="add", product_id=bagel.id, qty=2)
+    ], catalog.get_snapshot(db))
+    assert changes == {sourdough.id: "removed", bagel.id: "added"}
+
+
+@pytest.mark.parametrize("operations", [
+    "[{not json",
+    '[{"op": "explode"}]',
+    '[{"qty": 1}]',
+    '{"op": "add"}',
+])
+def test_malformed_batch_is_rejected(db, cashier, operations):
+    """Test a bad batch is a 422, not a server error"""
+    request = Request({"type": "http", "method": "POST", "path": "/pos/cart/batch", "headers": []})
+    with pytest.raises(HTTPException) as exc:
+        batch_cart(request, operations, {"user": cashier}, db)
+    assert exc.value.status_code == 422
@@ -0,0 +1,93 @@
+import json
+import time
+from decimal import Decimal
+from starlette.requests import Request
+from sqlalchemy import update
+from app.models.product import Product
+from app.models.settings import SystemSettings
+from app.routers.pos import scan_to_cart, sku_lookup
+from app.services.catalog import Catalog, catalog
+
+
+def test_snapshot_effective_tax_rates(db, products):
+    """Test custom, default and non-taxable effective rates"""
+    sourdough, rye, bagel = products
+    sourdough.custom_tax_rate = Decimal('0.15')
+    db.add(SystemSettings(setting_key="tax_rate", setting_value="0.10"))
+    db.commit()
+    
+    snapshot = Catalog().get_snapshot(db)
+    assert snapshot.get(sourdough.id).tax_rate == Decimal('0.15')
+    assert snapshot.get(sourdough.id).price_with_tax == Decimal('6.90')
+    assert snapshot.get(rye.id).tax_rate == Decimal('0')
+    assert snapshot.get(bagel.id).price_with_tax == Decimal('1.65')
+    assert [p.name for p in snapshot.products] == ["Bagel", "Rye", "Sourdough"]
+
+
+def test_snapshot_rebuilt_only_on_catalog_changes(db, products):
+    """Test stock movements hit the cache and price changes rebuild it"""
+    first = catalog.get_snapshot(db)
+    
+    products[0].on_hand -= 1
+    db.commit()
+    assert catalog.get_snapshot(db) is first
+    
+    products[0].price = Decimal('7.00')
+    db.commit()
+    second = catalog.get_snapshot(db)
+    assert second.version > first.version
+    assert second.get(products[0].id).price == Decimal('7.00')
+    
+    products[1].is_active = False
+    db.rollback()
+    assert catalog.get_snapshot(db) is second
+
+
+def test_sku_lookup_and_prefix_match(db, products):
+    """Test exact scans are case-insensitive and prefixes list active products in order"""
+    products[1].is_active = False
+    db.commit()
+    
+    snapshot = Catalog().get_snapshot(db)
+    assert snapshot.find_sku(" br-003 ").name == "Bagel"
+    assert [p.sku for p in snapshot.match_sku_prefix("br-00")] == ["BR-001", "BR-003"]
+    assert snapshot.match_sku_prefix("BR-00", limit=1)[0].sku == "BR-001"
+    assert snapshot.match_sku_prefix("XX") == []
+
+
+def test_changes_from_other_workers_are_picked_up(db, products):
+    """Test bulk updates the hooks never see expire with the TTL and are caught at checkout"""
+    worker = Catalog(ttl=60)
+    first = worker.get_snapshot(db)
+    db.execute(update(Product).where(Product.id == products[2].id).values(is_active=False))
+    db.commit()
+    
+    assert worker.get_snapshot(db) is first
+    assert worker.get_verified_snapshot(db, [products[0].id]) is first
+    checked = worker.get_verified_snapshot(db, [products[0].id, products[2].id])
+    assert not checked.get(products[2].id).is_active
+    assert worker.get_snapshot(db) is checked
+    
+    worker = Catalog(ttl=0.05)
+    worker.get_snapshot(db)
+    db.execute(update(Product).where(Product.id == products[0].id).values(price=Decimal('8.00')))
+    db.commit()
+    time.sleep(0.06)
+    assert worker.get_snapshot(db).get(products[0].id).price == Decimal('8.00')
+
+
+def test_inactive_exact_sku_is_not_found(db, products):
+    """Test scanning a discontinued SKU never adds the product it prefixes"""
+    db.add_all([
+        Product(sku="123", name="Old Roll", category_id=products[0].category_id, price=Decimal('1.00'), is_active=False),
+        Product(sku="1234", name="New Roll", category_id=products[0].category_id, price=Decimal('1.20'))
+    ])
+    db.commit()
+    user_data = {"user": None}
+    
+    assert json.loads(sku_lookup("123", 10, user_data, db).body) == []
+    assert [p["sku"] for p in json.loads(sku_lookup("12", 10, user_data, db).body)] == ["1234"]
+    
+    request = Request({"type": "http", "method": "POST", "path": "/pos/scan", "headers": []})
+    response = scan_to_cart(request, "123", 1, user_data, db)
+    assert b"No product with SKU 123" in response.body
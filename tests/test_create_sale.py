@@ -0,0 +1,53 @@
+import pytest
+from decimal import Decimal
+from fastapi import HTTPException
+from app.models.sale import SaleLine, TenderType
+from app.models.inventory import InventoryAdjustment
+from app.schemas.sale import SaleCreate, SaleLineCreate
+from app.services.pos import create_sale
+
+
+def _sale(*lines):
+    return SaleCreate(
+        lines=[
+            SaleLineCreate(product_id=pid, qty=Decimal(qty), unit_price=Decimal(price))
+            for pid, qty, price in lines
+        ],
+        tender_type=TenderType.CASH
+    )
+
+
+def test_create_sale_writes_lines_and_adjustments(db, cashier, products):
+    """Test lines, adjustments and stock are written for every cart line"""
+    sourdough, rye, bagel = products
+    sale = create_sale(db, _sale(
+        (sourdough.id, '2', '6.00'),
+        (rye.id, '1', '5.00'),
+        (bagel.id, '6', '1.50'),
+    ), cashier.id)
+    
+    assert len(sale.sale_lines) == 3
+    assert sale.subtotal == Decimal('26.00')
+    assert db.query(InventoryAdjustment).count() == 3
+    
+    db.refresh(sourdough)
+    db.refresh(bagel)
+    assert sourdough.on_hand == Decimal('18')
+    assert bagel.on_hand == Decimal('44')
+
+
+def test_create_sale_repeated_product_decrements_once_per_line(db, cashier, products):
+    """Test the same product on two lines is decremented for both"""
+    bagel = products[2]
+    create_sale(db, _sale((bagel.id, '2', '1.50'), (bagel.id, '3', '1.50')), cashier.id)
+    
+    db.refresh(bagel)
+    assert bagel.on_hand == Decimal('45')
+    assert db.query(SaleLine).count() == 2
+
+
+def test_create_sale_unknown_product(db, cashier, products):
+    """Test unknown products are rejected"""
+    with pytest.raises(HTTPException) as exc:
+        create_sale(db, _sale((products[0].id, '1', '6.00'), (9999, '1', '1.00')), cashier.id)
+    assert exc.value.status_code == 404
@@ -0,0 +1,73 @@
+import time
+from sqlalchemy import insert
+from starlette.requests import Request
+from app.main import app
+from app.models.ar import Customer
+from app.routers.ar import list_customers
+from app.services.customer_search import CustomerSearch, customer_search
+
+
+def test_typo_tolerant_search_over_name_phone_and_email(db):
+    """Test misspelt names, phone digits and email prefixes all find the customer"""
+    customer_search.reset()
+    db.add_all([
+        Customer(name="Badree Wholesale Bakery", phone="(868) 555-0142", email="orders@badree.tt"),
+        Customer(name="Sunrise Cafe", phone="868-555-0199", email="hello@sunrise.tt"),
+        Customer(name="Maria Gonzalez", phone="555 0100", email="maria@example.com")
+    ])
+    db.commit()
+    
+    assert customer_search.search(db, "badre wholsale")[0].name == "Badree Wholesale Bakery"
+    assert customer_search.search(db, "5550199")[0].name == "Sunrise Cafe"
+    assert customer_search.search(db, "maria@")[0].name == "Maria Gonzalez"
+    assert customer_search.search(db, "zzzz") == []
+
+
+def test_index_follows_committed_changes(db):
+    """Test new, renamed and deleted customers show up after commit only"""
+    customer_search.reset()
+    cafe = Customer(name="Sunrise Cafe")
+    db.add(cafe)
+    db.commit()
+    assert customer_search.search(db, "sunrise")[0].id == cafe.id
+    
+    cafe.name = "Sunset Bistro"
+    db.add(Customer(name="Sunrise Deli"))
+    db.commit()
+    assert customer_search.search(db, "sunset")[0].name == "Sunset Bistro"
+    assert [c.name for c in customer_search.search(db, "sunrise cafe")] == ["Sunrise Deli"]
+    
+    db.delete(cafe)
+    db.flush()
+    db.rollback()
+    assert customer_search.search(db, "sunset")[0].id == cafe.id
+    db.delete(cafe)
+    db.commit()
+    assert customer_search.search(db, "sunset bistro") == []
+
+
+def test_other_workers_customers_appear_after_the_ttl(db):
+    """Test customers the hooks never saw are found once the index expires"""
+    search = CustomerSearch(ttl=0.05)
+    db.add(Customer(name="Sunrise Cafe"))
+    db.commit()
+    assert [c.name for c in search.search(db, "sunrise")] == ["Sunrise Cafe"]
+    
+    db.execute(insert(Customer).values(name="Sunrise Deli", balance=0, credit_limit=0))
+    db.commit()
+    assert "Sunrise Deli" not in [c.name for c in search.search(db, "sunrise deli")]
+    time.sleep(0.06)
+    assert search.search(db, "sunrise deli")[0].name == "Sunrise Deli"
+
+
+def test_ar_customer_list_searches_through_the_index(db, cashier):
+    """Test the mounted /ar/customers page lists the index's matches"""
+    customer_search.reset()
+    db.add_all([Customer(name="Sunrise Cafe"), Customer(name="Maria Gonzalez")])
+    db.commit()
+    assert "/ar/customers" in [route.path for route in app.routes]
+    
+    request = Request({"type": "http", "method": "GET", "path": "/ar/customers", "headers": []})
+    response = list_customers(request, "sunrse", {"user": cashier}, db)
+    assert [c.name for c in response.context["customers"]] == ["Sunrise Cafe"]
+    assert b"Sunrise Cafe" in response.body and b"Maria" not in response.body
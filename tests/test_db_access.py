@@ -0,0 +1,25 @@
+import inspect
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from app.main import app
+from app.services.idempotency import request_fingerprint
+
+
+def test_database_handlers_run_on_the_threadpool():
+    """Test every handler taking a session is plain def, so FastAPI runs it off the event loop"""
+    on_loop = [
+        route.path for route in app.routes
+        if isinstance(route, APIRoute)
+        and "db" in inspect.signature(route.endpoint).parameters
+        and inspect.iscoroutinefunction(route.endpoint)
+    ]
+    # Login awaits the bcrypt pool; its own queries are one indexed lookup
+    assert on_loop == ["/login"]
+
+
+def test_fingerprint_covers_the_payload():
+    """Test requests differing only in their parsed body get different fingerprints"""
+    request = Request({"type": "http", "method": "POST", "path": "/pos/complete-sale", "headers": []})
+    assert request_fingerprint(request, 1, '{"a": 1}') == request_fingerprint(request, 1, '{"a": 1}')
+    assert request_fingerprint(request, 1, '{"a": 1}') != request_fingerprint(request, 1, '{"a": 2}')
+    assert request_fingerprint(request, 1) != request_fingerprint(request, 2)
@@ -0,0 +1,96 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from fastapi import HTTPException
+from fastapi.responses import RedirectResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.idempotency import IdempotencyKey
+from app.schemas.sale import ReturnCreate
+from app.services.idempotency import (
+    begin_request, complete_request, abandon_request, purge_expired_keys, utc_now, as_utc
+)
+
+
+def test_completed_request_is_replayed(db):
+    """Test a retry returns the stored response"""
+    assert begin_request(db, "k1", "fp") is None
+    complete_request(db, "k1", RedirectResponse(url="/pos/receipt/7", status_code=302))
+    
+    replay = begin_request(db, "k1", "fp")
+    assert replay.status_code == 302
+    assert replay.headers["location"] == "/pos/receipt/7"
+
+
+def test_in_progress_and_mismatched_requests_are_rejected(db):
+    """Test concurrent retries and key reuse are refused"""
+    begin_request(db, "k2", "fp")
+    with pytest.raises(HTTPException) as exc:
+        begin_request(db, "k2", "fp")
+    assert exc.value.status_code == 409
+    with pytest.raises(HTTPException) as exc:
+        begin_request(db, "k2", "other")
+    assert exc.value.status_code == 422
+
+
+def test_abandoned_and_expired_keys_can_be_reused(db):
+    """Test failures release the key and expired keys are dropped"""
+    begin_request(db, "k3", "fp")
+    abandon_request(db, "k3")
+    assert begin_request(db, "k3", "fp") is None
+    
+    db.query(IdempotencyKey).update({IdempotencyKey.expires_at: utc_now() - timedelta(seconds=1)})
+    db.commit()
+    assert purge_expired_keys(db) == 1
+
+
+def test_claim_is_a_short_lease_until_completed(db):
+    """Test a key left in progress by a dead worker frees up after the lease"""
+    begin_request(db, "k4", "fp")
+    record = db.query(IdempotencyKey).filter(IdempotencyKey.key == "k4").one()
+    assert as_utc(record.expires_at) <= utc_now() + timedelta(seconds=settings.idempotency_lease)
+    
+    record.expires_at = utc_now() - timedelta(seconds=1)
+    db.commit()
+    assert begin_request(db, "k4", "fp") is None
+    
+    complete_request(db, "k4", RedirectResponse(url="/pos/receipt/8", status_code=302))
+    record = db.query(IdempotencyKey).filter(IdempotencyKey.key == "k4").one()
+    assert as_utc(record.expires_at) > utc_now() + timedelta(seconds=settings.idempotency_ttl - 60)
+
+
+def test_request_that_outlived_its_lease_cannot_complete(db):
+    """Test a slow request whose key a retry took over leaves the retry's claim alone"""
+    retry = Session(bind=db.get_bind())
+    begin_request(db, "k5", "fp")
+    db.query(IdempotencyKey).update({IdempotencyKey.expires_at: utc_now() - timedelta(seconds=1)})
+    db.commit()
+    assert begin_request(retry, "k5", "fp") is None
+    
+    complete_request(db, "k5", RedirectResponse(url="/pos/receipt/9", status_code=302))
+    abandon_request(db, "k5")
+    with pytest.raises(HTTPException) as exc:
+        begin_request(db, "k5", "fp")
+    assert exc.value.status_code == 409
+    
+    complete_request(retry, "k5", RedirectResponse(url="/pos/receipt/10", status_code=302))
+    db.rollback()  # As the next request's fresh session would
+    assert begin_request(db, "k5", "fp").headers["location"] == "/pos/receipt/10"
+    retry.close()
+
+
+def test_expiry_is_compared_in_utc():
+    """Test stored expiries are read as UTC, whether the driver returns them naive or with an offset"""
+    moment = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    assert as_utc(moment.replace(tzinfo=None)) == moment
+    assert as_utc(moment.astimezone(timezone(timedelta(hours=-4)))) == moment
+    assert as_utc(moment.astimezone(timezone(timedelta(hours=-4)))).utcoffset() == timedelta(0)
+
+
+def test_malformed_return_lines_are_rejected():
+    """Test return lines are validated instead of failing inside the handler"""
+    with pytest.raises(ValidationError):
+        ReturnCreate(original_sale_id=1, return_lines=[{"qty_returned": "1"}])
+    line = ReturnCreate(original_sale_id=1, return_lines=[{"line_id": 3, "qty_returned": "1.5"}]).return_lines[0]
+    assert line.qty_returned == Decimal("1.5")
@@ -0,0 +1,19 @@
+import asyncio
+from app.config import settings
+from app.services.auth import authenticate_user_async, get_password_hash, needs_rehash
+
+
+def test_login_verifies_off_the_loop_and_upgrades_old_hashes(db, cashier, monkeypatch):
+    """Test async login accepts the password and rehashes at the configured cost"""
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    cashier.password_hash = get_password_hash("demo123")
+    db.commit()
+    
+    assert asyncio.run(authenticate_user_async(db, "cashier", "wrong")) is None
+    assert asyncio.run(authenticate_user_async(db, "cashier", "demo123")) == cashier
+    assert not needs_rehash(cashier.password_hash)
+    
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+    assert needs_rehash(cashier.password_hash)
+    asyncio.run(authenticate_user_async(db, "cashier", "demo123"))
+    assert cashier.password_hash.startswith("$2b$05$")
@@ -0,0 +1,48 @@
+from sqlalchemy import event
+from starlette.requests import Request
+from app.config import settings
+from app.models.user import Role
+from app.routers.auth import get_current_user
+from app.schemas.user import UserUpdate
+from app.services.auth import update_user
+from app.services.principal import principal_cache
+from app.services.session import session_store
+
+
+def _request(session_id):
+    cookie = f"{settings.session_cookie_name}={session_id}".encode()
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"cookie", cookie)]})
+
+
+def _count_queries(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_repeat_requests_skip_the_database(db, cashier):
+    """Test a warm session and principal resolve with no queries"""
+    principal_cache.clear()
+    session_id = session_store.create(db, cashier.id)
+    first = get_current_user(_request(session_id), db)
+    assert first["user"].role.name == "cashier"
+    assert first["user"].has_permission("sales")
+    
+    statements = _count_queries(db)
+    again = get_current_user(_request(session_id), db)
+    assert again["user"] is first["user"]
+    assert statements == []
+
+
+def test_user_and_role_changes_invalidate(db, cashier):
+    """Test deactivating a user or renaming their role is seen immediately"""
+    principal_cache.clear()
+    session_id = session_store.create(db, cashier.id)
+    assert get_current_user(_request(session_id), db) is not None
+    
+    db.query(Role).first().name = "clerk"
+    db.commit()
+    assert get_current_user(_request(session_id), db)["user"].role.name == "clerk"
+    
+    update_user(db, cashier.id, UserUpdate(is_active=False))
+    assert get_current_user(_request(session_id), db) is None
@@ -0,0 +1,51 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import insert
+from app.models.product import Product, Category
+from app.services.product_search import search_product_ids, match_expression
+
+
+@pytest.mark.sqlite_only
+def test_ranked_prefix_search_over_name_sku_and_category(db, products):
+    """Test prefixes match names, SKUs and category names, name matches first"""
+    sourdough, rye, bagel = products
+    pastry = Category(name="Sourdough Pastry")
+    db.add(pastry)
+    db.flush()
+    db.add(Product(sku="PA-001", name="Croissant", category_id=pastry.id, price=Decimal('3.00')))
+    db.commit()
+    
+    assert match_expression('br-00"') == '"br"* "00"*'
+    assert search_product_ids(db, "sour")[0] == sourdough.id
+    assert len(search_product_ids(db, "sour")) == 2
+    assert search_product_ids(db, "BR-002") == [rye.id]
+    assert set(search_product_ids(db, "bread")) == {sourdough.id, rye.id, bagel.id}
+
+
+@pytest.mark.sqlite_only
+def test_index_follows_renames_bulk_inserts_and_deletes(db, products):
+    """Test the triggers keep the index in step with the products table"""
+    sourdough, rye, bagel = products
+    bagel.name = "Pretzel"
+    sourdough.category.name = "Loaves"
+    db.execute(insert(Product), [{"sku": "BR-004", "name": "Baguette", "category_id": rye.category_id, "price": Decimal('3.00')}])
+    db.delete(rye)
+    db.commit()
+    
+    assert search_product_ids(db, "bagel") == []
+    assert search_product_ids(db, "pretz") == [bagel.id]
+    assert len(search_product_ids(db, "loaves")) == 3  # Sourdough, Pretzel and the new Baguette
+    assert search_product_ids(db, "rye") == []
+    assert len(search_product_ids(db, "bague")) == 1
+
+
+@pytest.mark.postgres_only
+def test_substring_search_without_fts(db, products):
+    """Test PostgreSQL falls back to case-insensitive substring matches on name and SKU"""
+    sourdough, rye, bagel = products
+    rye.is_active = False
+    db.commit()
+    
+    assert search_product_ids(db, "DOUGH") == [sourdough.id]
+    assert search_product_ids(db, "br-00") == [bagel.id, sourdough.id]
+    assert search_product_ids(db, "rye") == []
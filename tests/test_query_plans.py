@@ -0,0 +1,81 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import event
+from starlette.requests import Request
+from app.models.ar import Customer
+from app.models.inventory import InventoryAdjustment, ItemType
+from app.models.shift import Shift
+from app.routers import ar, auth, reports, shifts, transactions
+from app.services.ar import calculate_aging
+
+pytestmark = pytest.mark.sqlite_only
+
+# Tables that grow with every sale, batch or payment; the small lookup tables may be scanned
+GROWING_TABLES = {
+    "sales", "sale_lines", "returns", "return_lines", "ar_entries", "inventory_adjustments",
+    "batches", "batch_consumption", "shifts", "cash_events",
+}
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+
+def _full_scans(db, run) -> list:
+    """Plan every statement run issues and return the full scans of growing tables"""
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append((statement, parameters))
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        run()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    
+    scans = []
+    connection = db.connection()
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            continue
+        for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+            words = row[3].split()
+            if words[0] == "SCAN" and words[1] in GROWING_TABLES and "INDEX" not in words:
+                scans.append(row[3])
+    return scans
+
+
+@pytest.fixture
+def ledger(db, cashier):
+    customer = Customer(name="Sunrise Cafe", credit_limit=Decimal('500'))
+    shift = Shift(cashier_id=cashier.id, opening_float=Decimal('100'))
+    db.add_all([customer, shift])
+    db.commit()
+    return customer, shift
+
+
+def test_reports_and_lists_use_indexes(db, cashier, ledger):
+    """Test no report or list endpoint scans a table that grows with trade"""
+    customer, shift = ledger
+    user_data = {"user": cashier}
+    endpoints = {
+        "daily sales": lambda: reports.daily_sales_report(_request(), None, user_data, db),
+        "top products": lambda: reports.top_products_report(_request(), 90, user_data, db),
+        "wastage": lambda: reports.wastage_report(_request(), None, None, user_data, db),
+        "history": lambda: transactions.transaction_history(_request(), "2026-01-01", "2026-01-31", user_data, db),
+        "default history": lambda: transactions.transaction_history(_request(), None, None, user_data, db),
+        "dashboard": lambda: auth.dashboard_summary(_request(), user_data, db),
+        "shifts": lambda: shifts.list_shifts(_request(), user_data, db),
+        "reconciliation": lambda: shifts.reconciliation(_request(), shift.id, user_data, db),
+        "customer": lambda: ar.customer_detail(_request(), customer.id, user_data, db),
+    }
+    for name, endpoint in endpoints.items():
+        assert _full_scans(db, endpoint) == [], name
+
+
+def test_service_lookups_use_indexes(db, ledger):
+    """Test aging and stock history lookups search their composite indexes"""
+    customer, _ = ledger
+    assert _full_scans(db, lambda: calculate_aging(db, customer.id)) == []
+    assert _full_scans(db, lambda: db.query(InventoryAdjustment).filter(
+        InventoryAdjustment.item_type == ItemType.PRODUCT,
+        InventoryAdjustment.item_id == 1
+    ).all()) == []
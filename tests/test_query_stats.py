@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from decimal import Decimal
+from starlette.requests import Request
+from starlette.responses import Response
+from app.main import app, count_queries
+from app.models.user import User
+from app.models.shift import Shift
+from app.routers.shifts import list_shifts
+from app.services.principal import principal_for
+from app.services.query_stats import track_queries, query_log
+
+
+def make_shifts(db, cashier, count):
+    for n in range(count):
+        user = User(username=f"cashier{n}", email=f"c{n}@bakery.com", password_hash="x",
+                    role_id=cashier.role_id, is_active=True)
+        db.add(user)
+        db.flush()
+        db.add(Shift(cashier_id=user.id, opening_float=Decimal('100')))
+    db.commit()
+    db.expunge_all()
+
+
+def test_lazy_loads_in_a_loop_are_flagged(db, cashier):
+    """Test loading each shift's cashier one by one shows up as an N+1"""
+    make_shifts(db, cashier, 6)
+    with track_queries() as stats:
+        names = [shift.cashier.username for shift in db.query(Shift).all()]
+    assert len(names) == 6
+    assert stats.queries == 7
+    assert stats.rows == 12
+    assert list(stats.n_plus_one().values()) == [6]
+
+
+def test_shift_list_stays_in_budget(db, cashier, query_budget):
+    """Test the served shift list loads cashiers with the shifts"""
+    assert "/shifts" in [route.path for route in app.routes]
+    user = principal_for(cashier)  # What require_auth hands the handler
+    make_shifts(db, cashier, 6)
+    request = Request({"type": "http", "method": "GET", "path": "/shifts", "headers": []})
+    with query_budget(1):
+        response = list_shifts(request, {"user": user}, db)
+    assert b"cashier5" in response.body
+
+
+def test_middleware_reports_and_records(db, cashier, caplog):
+    """Test each request gets X-DB-* headers and an entry on the debug page"""
+    make_shifts(db, cashier, 6)
+    query_log.clear()
+    
+    async def call_next(request):
+        for shift in db.query(Shift).all():
+            shift.cashier
+        return Response("ok")
+    
+    request = Request({"type": "http", "method": "GET", "path": "/shifts", "headers": []})
+    with caplog.at_level(logging.WARNING):
+        response = asyncio.run(count_queries(request, call_next))
+    assert response.headers["X-DB-Queries"] == "7"
+    assert response.headers["X-DB-N-Plus-One"] == "1"
+    assert "Possible N+1 on GET /shifts" in caplog.text
+    [entry] = query_log.entries()
+    assert entry["path"] == "/shifts" and entry["queries"] == 7
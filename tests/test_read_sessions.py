@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, make_engine, make_read_engine
+from app.models.user import Role
+
+
+def test_reads_see_a_snapshot_and_never_block_writes(tmp_path):
+    """Test a report's open read doesn't hold up checkout and can't write"""
+    url = f"sqlite:///{tmp_path}/rw.db"
+    engine, read_engine = make_engine(url), make_read_engine(url)
+    Base.metadata.create_all(bind=engine)
+    Write, Read = sessionmaker(bind=engine), sessionmaker(bind=read_engine)
+    
+    with Read() as report, Write() as checkout:
+        assert report.query(Role).count() == 0
+        checkout.add(Role(name="cashier"))
+        checkout.commit()
+        # Still inside the report's snapshot
+        assert report.query(Role).count() == 0
+    
+    with Read() as report:
+        assert report.query(Role).count() == 1
+        report.add(Role(name="manager"))
+        with pytest.raises(OperationalError):
+            report.flush()
+    
+    read_engine.dispose()
+    engine.dispose()
+
+
+@pytest.mark.postgres_only
+def test_postgresql_read_sessions_refuse_writes(db):
+    """Test the read engine opens READ ONLY transactions on PostgreSQL"""
+    read_engine = make_read_engine(db.get_bind().url.render_as_string(hide_password=False))
+    with sessionmaker(bind=read_engine)() as report:
+        assert report.query(Role).count() == 0
+        report.add(Role(name="manager"))
+        with pytest.raises(DBAPIError, match="read-only transaction"):
+            report.flush()
+    read_engine.dispose()
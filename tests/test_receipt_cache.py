@@ -0,0 +1,54 @@
+from decimal import Decimal
+from starlette.requests import Request
+from app.models.sale import TenderType
+from app.routers.pos import receipt
+from app.schemas.sale import SaleCreate, SaleLineCreate
+from app.services.pos import create_sale, create_return
+from app.services.receipt import receipt_cache
+
+
+def get_receipt(db, user, sale_id, etag=None):
+    """Call the receipt endpoint directly"""
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    request = Request({"type": "http", "method": "GET", "path": f"/pos/receipt/{sale_id}", "headers": headers})
+    return receipt(request, sale_id, {"user": user}, db)
+
+
+def make_sale(db, cashier, products):
+    """Ring up one sourdough loaf"""
+    sale_data = SaleCreate(
+        tender_type=TenderType.CASH,
+        lines=[SaleLineCreate(product_id=products[0].id, qty=Decimal("1"), unit_price=Decimal("6.00"))]
+    )
+    return create_sale(db, sale_data, cashier.id)
+
+
+def test_reprint_is_served_from_cache(db, cashier, products):
+    """Test a reprint hits the cache and a matching ETag gets a 304"""
+    receipt_cache.clear()
+    sale = make_sale(db, cashier, products)
+    
+    first = get_receipt(db, cashier, sale.id)
+    second = get_receipt(db, cashier, sale.id)
+    assert first.body == second.body
+    assert sale.sale_number in first.body.decode()
+    assert receipt_cache.stats()["hits"] == 1
+    
+    assert get_receipt(db, cashier, sale.id, first.headers["etag"]).status_code == 304
+
+
+def test_return_changes_the_etag(db, cashier, products):
+    """Test a return invalidates the cached receipt"""
+    receipt_cache.clear()
+    sale = make_sale(db, cashier, products)
+    etag = get_receipt(db, cashier, sale.id).headers["etag"]
+    
+    create_return(db, {
+        "original_sale_id": sale.id,
+        "return_lines": [{"line_id": sale.sale_lines[0].id, "qty_returned": Decimal("1")}]
+    }, cashier.id)
+    assert receipt_cache.stats()["size"] == 0
+    
+    response = get_receipt(db, cashier, sale.id, etag)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
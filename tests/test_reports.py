@@ -0,0 +1,54 @@
+import threading
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy.orm import sessionmaker
+from app.models.ar import Customer
+from app.models.sale import TenderType
+from app.schemas.sale import SaleCreate, SaleLineCreate
+from app.services.pos import create_sale
+from app.services.reports import sales_by_period
+
+
+def _sell(db, cashier, product, day, customer_id=None):
+    return create_sale(db, SaleCreate(
+        customer_id=customer_id,
+        lines=[SaleLineCreate(product_id=product.id, qty=Decimal('1'), unit_price=Decimal('5.00'))],
+        tender_type=TenderType.ON_ACCOUNT if customer_id else TenderType.CASH
+    ), cashier.id, sold_at=day)
+
+
+def test_sales_bucket_by_day_week_and_month(db, cashier, products):
+    """Test buckets start on the day, the Monday and the first of the month"""
+    rye = products[1]
+    for day in (datetime(2026, 3, 1, 9), datetime(2026, 3, 2, 9), datetime(2026, 3, 8, 9), datetime(2026, 4, 1, 9)):
+        _sell(db, cashier, rye, day)
+    start, end = date(2026, 2, 1), date(2026, 5, 1)
+    
+    summary = lambda period: [(row.period, row.transaction_count) for row in sales_by_period(db, start, end, period)]
+    assert summary("day") == [(date(2026, 3, 1), 1), (date(2026, 3, 2), 1), (date(2026, 3, 8), 1), (date(2026, 4, 1), 1)]
+    assert summary("week") == [(date(2026, 2, 23), 1), (date(2026, 3, 2), 2), (date(2026, 3, 30), 1)]
+    assert summary("month") == [(date(2026, 3, 1), 3), (date(2026, 4, 1), 1)]
+
+
+@pytest.mark.postgres_only
+def test_concurrent_invoices_keep_the_customer_balance(db, cashier, products):
+    """Test registers invoicing one customer at once don't lose balance updates"""
+    customer = Customer(name="Sunrise Cafe", credit_limit=Decimal('10000'), balance=Decimal('0'))
+    db.add(customer)
+    db.commit()
+    Session = sessionmaker(bind=db.get_bind())
+    
+    def register():
+        with Session() as session:
+            for _ in range(10):
+                _sell(session, cashier, products[1], None, customer.id)
+    
+    threads = [threading.Thread(target=register) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    db.refresh(customer)
+    assert customer.balance == Decimal('200.00')
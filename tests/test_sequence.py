@@ -0,0 +1,47 @@
+import threading
+from sqlalchemy import create_engine
+from app.models.sequence import NumberSequence
+from app.services.sequence import SequenceAllocator
+
+
+def test_numbers_are_sequential_within_a_block(db):
+    """Test numbers come out in order and reserve one block"""
+    allocator = SequenceAllocator(block_size=5)
+    bind = db.get_bind()
+    
+    assert [allocator.next_value(bind, "SALE-20240101") for _ in range(7)] == [1, 2, 3, 4, 5, 6, 7]
+    row = db.query(NumberSequence).filter(NumberSequence.name == "SALE-20240101").one()
+    assert row.next_value == 11  # two blocks of five reserved
+
+
+def test_workers_never_share_numbers(tmp_path):
+    """Test separate allocators (workers) get disjoint numbers"""
+    bind = create_engine(f"sqlite:///{tmp_path / 'seq.db'}", connect_args={"check_same_thread": False})
+    NumberSequence.__table__.create(bind)
+    workers = [SequenceAllocator(block_size=3) for _ in range(4)]
+    issued = []
+    lock = threading.Lock()
+    
+    def allocate(allocator):
+        for _ in range(25):
+            value = allocator.next_value(bind, "PO-20240101")
+            with lock:
+                issued.append(value)
+    
+    threads = [threading.Thread(target=allocate, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    bind.dispose()
+    assert len(issued) == len(set(issued)) == 100
+
+
+def test_number_format(db):
+    """Test prefix, day and register are part of the number"""
+    from datetime import date
+    allocator = SequenceAllocator(block_size=10)
+    
+    assert allocator.next_number(db, "SALE", day=date(2024, 1, 2)) == "SALE-20240102-0001"
+    assert allocator.next_number(db, "SALE", register_id=3, day=date(2024, 1, 2)) == "SALE-20240102-R3-0001"
@@ -0,0 +1,60 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from app.models.session import UserSession
+from app.services.session import MemorySessionBackend, DatabaseSessionBackend
+from app.services import sweeper as sweeper_module
+from app.services.sweeper import sweep
+
+
+def test_sessions_are_shared_through_the_table(db, cashier):
+    """Test a second worker sees a login and a logout made by the first"""
+    worker_a = DatabaseSessionBackend(cache_ttl=0)
+    worker_b = DatabaseSessionBackend(cache_ttl=0)
+    
+    session_id = worker_a.create(db, cashier.id)
+    assert worker_b.get(db, session_id) == cashier.id
+    
+    worker_a.delete(db, session_id)
+    assert worker_b.get(db, session_id) is None
+
+
+def test_expired_sessions_are_rejected_and_swept(db, cashier):
+    """Test expiry is enforced on read and the sweeper deletes the rows"""
+    store = DatabaseSessionBackend(cache_ttl=0)
+    session_id = store.create(db, cashier.id)
+    db.query(UserSession).update({UserSession.expires_at: datetime.now() - timedelta(seconds=1)})
+    db.commit()
+    
+    assert store.get(db, session_id) is None
+    assert sweep(db)["sessions"] == 1
+    assert db.query(UserSession).count() == 0
+
+
+def test_memory_backend_is_bounded(db, cashier):
+    """Test the LRU drops the least recently used session"""
+    store = MemorySessionBackend(capacity=2)
+    first, second = store.create(db, cashier.id), store.create(db, cashier.id)
+    store.get(db, first)
+    store.create(db, cashier.id)
+    assert store.get(db, first) == cashier.id
+    assert store.get(db, second) is None
+
+
+def test_sweeper_logs_failures_and_keeps_running(db, monkeypatch, caplog):
+    """Test a failed sweep is logged and the next one still runs"""
+    calls = []
+    
+    def failing_sweep(db_):
+        calls.append(True)
+        raise RuntimeError("database is locked")
+    
+    monkeypatch.setattr(sweeper_module, "sweep", failing_sweep)
+    sweeper = sweeper_module.Sweeper(interval=0.01, session_factory=lambda: db)
+    monkeypatch.setattr(db, "close", lambda: None)
+    with caplog.at_level(logging.ERROR):
+        sweeper.start()
+        time.sleep(0.1)
+        sweeper.stop()
+    assert len(calls) > 1
+    assert "Sweep failed" in caplog.text
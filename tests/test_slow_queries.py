@@ -0,0 +1,108 @@
+import json
+import pytest
+from app.config import settings
+from app.models.product import Product
+from app.services.query_stats import route_context
+from app.services.slow_queries import explain, mask_plan_values, slow_query_log
+
+
+@pytest.fixture
+def slow_log(monkeypatch, tmp_path):
+    """Log every statement as slow, to a fresh ring buffer and a JSONL file"""
+    monkeypatch.setattr(settings, "slow_query_ms", 0.001)
+    monkeypatch.setattr(settings, "slow_query_log_path", str(tmp_path / "logs" / "slow.jsonl"))
+    slow_query_log.clear()
+    yield tmp_path / "logs" / "slow.jsonl"
+    slow_query_log.clear()
+
+
+def test_full_scan_is_logged_with_its_plan(db, products, slow_log):
+    """Test a slow SELECT is recorded with its route, parameter types and plan"""
+    with route_context("GET /reports/top-products"):
+        assert len(db.query(Product).filter(Product.name == "Rye").all()) == 1
+    
+    [entry] = [e for e in slow_query_log.entries() if e["statement"].startswith("SELECT")]
+    assert entry["route"] == "GET /reports/top-products"
+    assert entry["parameters"] in (["str"], {"name_1": "str"})  # SQLite and PostgreSQL paramstyles
+    assert "Rye" not in json.dumps(entry)
+    assert entry["plan"] and entry["full_scan"]
+    
+    written = [json.loads(line) for line in slow_log.read_text().splitlines()]
+    assert entry in written
+
+
+def test_index_lookup_is_not_a_full_scan(db, products, slow_log):
+    """Test a primary key lookup is logged without the full scan flag"""
+    product_id = products[0].id
+    slow_query_log.clear()
+    db.query(Product).filter(Product.id == product_id).all()
+    [entry] = [e for e in slow_query_log.entries() if e["statement"].startswith("SELECT")]
+    assert entry["route"] is None
+    assert "products" in "\n".join(entry["plan"])
+    assert not entry["full_scan"]
+
+
+def test_writes_are_logged_without_a_plan(db, products, slow_log):
+    """Test slow writes are kept but not explained"""
+    db.add(Product(sku="BR-009", name="Baguette", category_id=products[0].category_id, price=3))
+    db.flush()
+    [entry] = [e for e in slow_query_log.entries() if e["statement"].startswith("INSERT")]
+    assert entry["plan"] == [] and not entry["full_scan"]
+
+
+def test_threshold_zero_turns_the_log_off(db, products, slow_log, monkeypatch):
+    """Test nothing is recorded or written when slow_query_ms is 0"""
+    monkeypatch.setattr(settings, "slow_query_ms", 0)
+    db.query(Product).all()
+    assert slow_query_log.entries() == []
+    assert not slow_log.exists()
+
+
+class AbortingCursor:
+    """Cursor that, like PostgreSQL, refuses everything after an error until a rollback"""
+    
+    def __init__(self):
+        self.connection = self
+        self.statements = []
+        self.aborted = False
+    
+    def cursor(self):
+        return self
+    
+    def execute(self, statement, parameters=None):
+        self.statements.append(statement.split()[0])
+        if statement.startswith("ROLLBACK TO"):
+            self.aborted = False
+        elif self.aborted:
+            raise RuntimeError("current transaction is aborted")
+        elif statement.startswith("EXPLAIN"):
+            self.aborted = True
+            raise RuntimeError("relation does not exist")
+    
+    def close(self):
+        pass
+
+
+def test_failed_explain_leaves_the_transaction_usable(db, products):
+    """Test a failing EXPLAIN is rolled back to its savepoint, keeping the request's work"""
+    cursor = AbortingCursor()
+    assert explain(cursor, "postgresql", "SELECT * FROM gone", ()) == ["EXPLAIN failed: relation does not exist"]
+    assert cursor.statements == ["SAVEPOINT", "EXPLAIN", "ROLLBACK", "RELEASE"]
+    assert not cursor.aborted
+    
+    db.add(Product(sku="BR-009", name="Baguette", category_id=products[0].category_id, price=3))
+    db.flush()
+    raw = db.connection().connection.cursor()
+    assert explain(raw, db.get_bind().dialect.name, "SELECT * FROM gone", ())[0].startswith("EXPLAIN failed")
+    db.commit()
+    assert db.query(Product).filter(Product.sku == "BR-009").count() == 1
+
+
+def test_postgresql_plan_values_are_masked():
+    """Test the values PostgreSQL writes into plan conditions are not logged"""
+    assert mask_plan_values("  Filter: ((name)::text = 'O''Brien'::text) AND (price > 2.50)") == (
+        "  Filter: ((name)::text = ?::text) AND (price > ?)"
+    )
+    assert mask_plan_values("  ->  Index Cond: (id = 42)") == "  ->  Index Cond: (id = ?)"
+    plan_line = "Seq Scan on products  (cost=0.00..11.75 rows=1 width=239)"
+    assert mask_plan_values(plan_line) == plan_line
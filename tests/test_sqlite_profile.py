@@ -0,0 +1,14 @@
+from app.database import make_engine
+
+
+def test_file_databases_get_the_sqlite_profile(tmp_path):
+    """Test WAL and the other PRAGMAs are set on connect, with a sized pool"""
+    engine = make_engine(f"sqlite:///{tmp_path}/profile.db")
+    with engine.connect() as connection:
+        pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1
+        assert pragma("busy_timeout") == 5000
+        assert pragma("temp_store") == 2
+    assert engine.pool.size() == 10
+    engine.dispose()
@@ -0,0 +1,66 @@
+import threading
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import *
+from app.models.inventory import InventoryAdjustment, ItemType
+from app.services.inventory import apply_stock_changes, sum_changes
+
+
+def test_guard_reports_items_that_would_go_negative(db, cashier, products):
+    """Test guarded changes skip items that would go below zero"""
+    sourdough, rye, bagel = products
+    result = apply_stock_changes(
+        db, ItemType.PRODUCT,
+        {sourdough.id: Decimal('-5'), rye.id: Decimal('-11'), 9999: Decimal('-1')},
+        "Test", cashier.id, guard=True
+    )
+    db.commit()
+    
+    assert result.applied == {sourdough.id: Decimal('-5')}
+    assert sorted(result.rejected) == [rye.id, 9999]
+    assert sourdough.on_hand == Decimal('15')  # loaded row is refreshed
+    assert rye.on_hand == Decimal('10')
+    assert db.query(InventoryAdjustment).count() == 1
+
+
+def test_sum_changes_merges_repeated_items():
+    """Test repeated items collapse into one change"""
+    assert sum_changes([(1, Decimal('-2')), (2, Decimal('1')), (1, Decimal('-3'))]) == {
+        1: Decimal('-5'), 2: Decimal('1')
+    }
+
+
+def test_concurrent_decrements_are_not_lost(tmp_path):
+    """Test two registers selling the same item keep the count right"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stock.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        role = Role(name="cashier")
+        category = Category(name="Bread")
+        db.add_all([role, category])
+        db.flush()
+        db.add(User(username="u", email="u@bakery.com", password_hash="x", role_id=role.id))
+        db.add(Product(sku="C1", name="Croissant", category_id=category.id, price=Decimal('3'), on_hand=Decimal('200')))
+        db.commit()
+    
+    def sell():
+        for _ in range(25):
+            with Session() as db:
+                apply_stock_changes(db, ItemType.PRODUCT, {1: Decimal('-1')}, "Sale", 1)
+                db.commit()
+    
+    threads = [threading.Thread(target=sell) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    with Session() as db:
+        assert db.get(Product, 1).on_hand == Decimal('100')
+    engine.dispose()
@@ -0,0 +1,49 @@
+from decimal import Decimal
+from app.models.sale import TenderType
+from app.routers.pos import calculate_cart_totals
+from app.schemas.sale import SaleCreate, SaleLineCreate
+from app.services.catalog import catalog
+from app.services.cart import CartStore
+from app.services.pos import create_sale
+from app.services.tax import compute_tax
+
+
+def test_tax_grouped_by_rate_with_prorated_discount(db, products):
+    """Test each rate bucket is taxed on its share of the discounted subtotal"""
+    sourdough, rye, bagel = products
+    sourdough.custom_tax_rate = Decimal('0.15')
+    db.commit()
+    
+    totals = compute_tax(
+        catalog.get_snapshot(db),
+        [(sourdough.id, Decimal('6.00')), (rye.id, Decimal('5.00')), (bagel.id, Decimal('9.00'))],
+        Decimal('2.00')
+    )
+    assert totals.buckets == {
+        Decimal('0.10'): (Decimal('8.10'), Decimal('0.81')),
+        Decimal('0.15'): (Decimal('5.40'), Decimal('0.81'))
+    }
+    assert totals.tax_rate is None
+    assert totals.total == Decimal('19.62')
+
+
+def test_cart_and_sale_agree(db, cashier, products):
+    """Test the cart display and the posted sale use the same rates"""
+    sourdough, rye, bagel = products
+    sourdough.custom_tax_rate = Decimal('0.15')
+    db.commit()
+    
+    store = CartStore()
+    store.add_item(db, "c1", sourdough, 2)
+    store.add_item(db, "c1", bagel, 3)
+    cart_totals = calculate_cart_totals(store.items(db, "c1"), db)
+    
+    sale = create_sale(db, SaleCreate(
+        tender_type=TenderType.CASH,
+        lines=[
+            SaleLineCreate(product_id=item["product_id"], qty=Decimal(str(item["qty"])), unit_price=Decimal(str(item["unit_price"])))
+            for item in store.items(db, "c1")
+        ]
+    ), cashier.id)
+    assert sale.tax_amount == cart_totals["tax_amount"] == Decimal('2.25')
+    assert sale.total == cart_totals["total"]